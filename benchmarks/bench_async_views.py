@@ -0,0 +1,138 @@
+"""
+Load-tests the sync report endpoints against their native async versions
+under many concurrent, slowly reading clients.
+
+Start the ASGI server without the report cache, so every request renders
+the report (uvicorn and the benchmark must share the .env):
+
+    RECONCILIATION_REPORT_CACHE_MAX_SIZE=0 uvicorn data_reconciliation_api.asgi:application
+
+Then seed a completed job with many report entries and run the benchmark:
+
+    python -m benchmarks.bench_async_views seed --entries 100000
+    python -m benchmarks.bench_async_views run --job-id <id> --endpoint csv --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8000/api/v1/reconciliations/csv"
+
+
+def seed(entries: int):
+    import os
+
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data_reconciliation_api.settings")
+    django.setup()
+    from csv_handler.models import CSVDataReport, ReconciliationRecord
+
+    report = CSVDataReport.objects.create(status="completed", unique_fields="id", report={"seeded": True})
+    records = []
+    for i in range(entries):
+        if i % 2:
+            records.append(ReconciliationRecord(
+                report=report, category=ReconciliationRecord.DISCREPANCY, key=str(i),
+                data={"key": [str(i)], "differences": {"amount": {"source": str(i), "target": str(i + 1)}}}
+            ))
+        else:
+            records.append(ReconciliationRecord(
+                report=report, category=ReconciliationRecord.MISSING_IN_TARGET, key=str(i),
+                data={"id": str(i), "name": f"customer {i}", "amount": str(i)}
+            ))
+    ReconciliationRecord.objects.bulk_create(records, batch_size=5000)
+    print(report.id)
+
+
+async def fetch(url: str, read_size: int, read_delay: float):
+    """GETs `url` over a fresh connection, reading the body `read_size` bytes at a time."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    size = 0
+    while True:
+        data = await reader.read(read_size)
+        if not data:
+            break
+        size += len(data)
+        if read_delay:
+            await asyncio.sleep(read_delay)
+    writer.close()
+    return int(status_line.split()[1]), size
+
+
+async def load(url: str, concurrency: int, requests: int, read_size: int, read_delay: float):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status, _ = await fetch(url, read_size, read_delay)
+            except OSError:
+                status = None
+            if status != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def run(args):
+    paths = {
+        "sync": f"{args.base_url}/{args.job_id}/{args.endpoint}/",
+        "async": f"{args.base_url}/async/{args.job_id}/{args.endpoint}/",
+    }
+    print(f"endpoint: {args.endpoint}  concurrency: {args.concurrency}  requests: {args.requests}  "
+          f"read delay: {args.read_delay}s")
+    for label, url in paths.items():
+        elapsed, latencies, errors = asyncio.run(
+            load(url, args.concurrency, args.requests, args.read_size, args.read_delay)
+        )
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{label:>5}: {args.requests / elapsed:8.1f} req/s  p50 {statistics.median(latencies):.3f}s  "
+              f"p95 {p95:.3f}s  max {latencies[-1]:.3f}s  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="create a completed job with many report entries")
+    seed_parser.add_argument("--entries", type=int, default=100_000)
+
+    run_parser = commands.add_parser("run", help="load-test the sync and async endpoints of a job")
+    run_parser.add_argument("--job-id", required=True)
+    run_parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    run_parser.add_argument("--endpoint", choices=["status", "json", "csv", "html"], default="csv")
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--read-size", type=int, default=16 * 1024)
+    run_parser.add_argument("--read-delay", type=float, default=0.01,
+                            help="seconds each client waits between reads, to simulate slow downloads")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(args.entries)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares row-wise `CSVParser.clean_data` with column-wise `CSVParser.clean_frame`.
+
+Usage:
+    python -m benchmarks.bench_clean_frame --rows 1000000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from csv_handler.csv_parser import CSVParser
+
+
+def generate_rows(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    statuses = ["Paid", "PENDING", " refunded ", "Failed"]
+    for i in range(rows):
+        yield {
+            "id": str(i),
+            "customer": f" Customer {rng.randint(1, 50000)} ",
+            "amount": f"{rng.uniform(1, 10000):.2f}",
+            "status": rng.choice(statuses),
+            "created_on": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "settled_on": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = list(generate_rows(args.rows))
+    frame = pd.DataFrame(rows)
+
+    start = time.perf_counter()
+    expected = CSVParser.clean_data(rows)
+    row_wise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned = CSVParser.clean_frame(frame)
+    column_wise = time.perf_counter() - start
+
+    if cleaned.to_dict(orient="records") != expected:
+        raise SystemExit("clean_frame output differs from clean_data")
+
+    print(f"rows:        {args.rows}")
+    print(f"clean_data:  {row_wise:.2f}s")
+    print(f"clean_frame: {column_wise:.2f}s")
+    print(f"speedup:     {row_wise / column_wise:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Times the hot paths of a reconciliation on synthetic datasets of several
+sizes, and appends the results to a JSON Lines file so that runs can be
+compared over time.
+
+Benchmarks: CSVParser.read_csv and read_csv_chunks (both files),
+DataReconciler.reconcile and reconcile_chunks, and
+CSVReportGenerator.generate_csv and HTMLReportGenerator.generate_html
+on the resulting report. The fastest timing of each benchmark and size
+is compared with the last one recorded in the results file for a dataset
+generated with the same parameters.
+
+Usage:
+    python -m benchmarks.bench_hot_paths --sizes 10k 1m
+    python -m benchmarks.bench_hot_paths --sizes 10m --only read_csv_chunks reconcile_chunks
+
+The list-of-dicts paths (read_csv, reconcile) need tens of GB of memory
+at 10m rows.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from csv_handler.csv_parser import CSVParser
+from data_reconciler.processor import DataReconciler
+from data_reconciler.report_formatter.csv_generator import CSVReportGenerator
+from data_reconciler.report_formatter.html_generator import HTMLReportGenerator
+
+from . import datasets
+
+DEFAULT_OUTPUT = "benchmarks/results/hot_paths.jsonl"
+
+
+def read_csv(paths):
+    results = []
+    for path in paths:
+        with open(path, "rb") as file_obj:
+            results.append(CSVParser.read_csv(file_obj))
+    return results
+
+
+def read_csv_chunks(paths):
+    results = []
+    for path in paths:
+        with open(path, "rb") as file_obj:
+            results.append(list(CSVParser.read_csv_chunks(file_obj)))
+    return results
+
+
+class Context:
+    """The inputs of the benchmarks of one dataset, computed on first use."""
+
+    def __init__(self, paths, unique_fields: List[str]):
+        self.paths = paths
+        self.unique_fields = unique_fields
+        self._values = {}
+
+    def get(self, name: str, compute: Callable[[], Any]):
+        if name not in self._values:
+            self._values[name] = compute()
+        return self._values[name]
+
+    def store(self, name: str, value: Any):
+        """Keeps the output of a benchmark as the input of later ones."""
+        self._values[name] = value
+        return value
+
+    def prepare(self, benchmark: str):
+        """
+        Computes the inputs of `benchmark` that are not there yet, so that
+        building them is not timed as part of its first run.
+        """
+        for name in INPUTS.get(benchmark, ()):
+            getattr(self, name)
+
+    @property
+    def rows(self):
+        return self.get("rows", lambda: read_csv(self.paths))
+
+    @property
+    def chunks(self):
+        return self.get("chunks", lambda: read_csv_chunks(self.paths))
+
+    @property
+    def report(self):
+        return self.get("report", lambda: DataReconciler.reconcile_chunks(
+            iter(self.chunks[0]), iter(self.chunks[1]), self.unique_fields
+        ))
+
+
+# Benchmark name -> function of a Context, in the order they are run.
+BENCHMARKS: Dict[str, Callable[[Context], Any]] = {
+    "read_csv": lambda context: context.store("rows", read_csv(context.paths)),
+    "read_csv_chunks": lambda context: context.store("chunks", read_csv_chunks(context.paths)),
+    "reconcile": lambda context: DataReconciler.reconcile(
+        context.rows[0]["data"], context.rows[1]["data"], context.unique_fields
+    ),
+    "reconcile_chunks": lambda context: DataReconciler.reconcile_chunks(
+        iter(context.chunks[0]), iter(context.chunks[1]), context.unique_fields
+    ),
+    "generate_csv": lambda context: CSVReportGenerator.generate_csv(context.report),
+    "generate_html": lambda context: HTMLReportGenerator.generate_html(context.report),
+}
+
+# Benchmark name -> the Context inputs it reads.
+INPUTS: Dict[str, Tuple[str, ...]] = {
+    "reconcile": ("rows",),
+    "reconcile_chunks": ("chunks",),
+    "generate_csv": ("report",),
+    "generate_html": ("report",),
+}
+
+
+def time_benchmark(function: Callable[[Context], Any], context: Context, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(context)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_results(output: str, dataset: Dict[str, Any]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """
+    Returns the latest result of every benchmark and size recorded in
+    `output` for datasets with the same parameters, with the run's commit.
+    """
+    previous = {}
+    if not os.path.exists(output):
+        return previous
+    with open(output) as results_file:
+        for line in results_file:
+            run = json.loads(line)
+            if run["dataset"] == dataset:
+                for result in run["results"]:
+                    previous[result["benchmark"], result["rows"]] = {**result, "commit": run["commit"]}
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=datasets.parse_rows, default=[10_000, 1_000_000],
+                        help="source row counts, e.g. 10k 1m 10m")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark; the fastest is compared")
+    parser.add_argument("--key-columns", type=int, default=1, help=f"1 to {len(datasets.KEY_COLUMNS)}")
+    parser.add_argument("--missing-rate", type=float, default=0.01)
+    parser.add_argument("--extra-rate", type=float, default=0.01)
+    parser.add_argument("--discrepancy-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="benchmarks/data", help="where generated datasets are kept")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON Lines file the results are appended to")
+    parser.add_argument("--max-slowdown", type=float, default=None,
+                        help="exit with status 1 if a benchmark is this much slower than the previous run, e.g. 0.2")
+    args = parser.parse_args()
+
+    dataset = {
+        "key_columns": args.key_columns,
+        "missing_rate": args.missing_rate,
+        "extra_rate": args.extra_rate,
+        "discrepancy_rate": args.discrepancy_rate,
+        "seed": args.seed,
+    }
+    previous = previous_results(args.output, dataset)
+
+    results = []
+    regressions = []
+    print(f"{'benchmark':<18}{'rows':>10}{'best':>10}{'mean':>10}{'rows/s':>12}{'change':>9}  previous commit")
+    for rows in args.sizes:
+        paths = datasets.generate(
+            args.data_dir, rows, args.key_columns, args.missing_rate, args.extra_rate,
+            args.discrepancy_rate, args.seed
+        )
+        context = Context(paths, datasets.key_fields(args.key_columns))
+        for name in args.only:
+            context.prepare(name)
+            timings = time_benchmark(BENCHMARKS[name], context, args.repeat)
+            best = min(timings)
+            result = {
+                "benchmark": name,
+                "rows": rows,
+                "best_seconds": round(best, 6),
+                "mean_seconds": round(statistics.mean(timings), 6),
+                "rows_per_second": round(rows / best),
+            }
+            results.append(result)
+
+            change, commit = "", ""
+            if (name, rows) in previous:
+                ratio = best / previous[name, rows]["best_seconds"] - 1
+                change, commit = f"{ratio:+.0%}", previous[name, rows]["commit"] or "?"
+                if args.max_slowdown is not None and ratio > args.max_slowdown:
+                    regressions.append(f"{name} at {rows} rows: {change}")
+            print(f"{name:<18}{rows:>10}{best:>9.3f}s{result['mean_seconds']:>9.3f}s"
+                  f"{result['rows_per_second']:>12}{change:>9}  {commit}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a") as results_file:
+        results_file.write(json.dumps({
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "dataset": dataset,
+            "results": results,
+        }) + "\n")
+    if regressions:
+        print("Slower than the previous run by more than "
+              f"{args.max_slowdown:.0%}:\n  " + "\n  ".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
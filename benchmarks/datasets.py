@@ -0,0 +1,151 @@
+"""
+Generates deterministic synthetic source and target CSV files for the
+benchmarks.
+
+Every source row has a unique key. The target holds the same rows except
+for a `missing_rate` share of them, plus an `extra_rate` share of rows
+that are not in the source, and a `discrepancy_rate` share of the shared
+rows have a different amount or status. Values are messy the way real
+exports are (padding, mixed case, two date formats), so CSV cleaning does
+real work. The same arguments always give byte-identical files.
+
+Usage:
+    python -m benchmarks.datasets --rows 1000000 --directory /tmp/reconciliation-data
+"""
+import argparse
+import os
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Names of the key columns, in order; `key_columns` takes the first ones.
+KEY_COLUMNS = ("id", "region", "account")
+# Number of distinct values of the key columns after the first.
+KEY_CARDINALITIES = {"region": 97, "account": 1009}
+STATUSES = np.array(["Paid", "PENDING", " refunded ", "Failed"], dtype=object)
+BLOCK_SIZE = 1_000_000
+
+
+def parse_rows(value: str) -> int:
+    """Parses a row count such as 10000, 10k or 1m."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def key_fields(key_columns: int) -> List[str]:
+    if not 1 <= key_columns <= len(KEY_COLUMNS):
+        raise ValueError(f"key_columns must be between 1 and {len(KEY_COLUMNS)}")
+    return list(KEY_COLUMNS[:key_columns])
+
+
+def _dates() -> np.ndarray:
+    days = pd.date_range("2024-01-01", "2024-12-31")
+    return np.concatenate([days.strftime("%Y-%m-%d"), days.strftime(" %d/%m/%Y")]).astype(object)
+
+
+def _block(ids: np.ndarray, key_columns: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Builds the rows with the given integer ids."""
+    columns = {"id": ids.astype(str)}
+    for name in key_fields(key_columns)[1:]:
+        columns[name] = pd.Series(ids % KEY_CARDINALITIES[name]).astype(str).radd(f"{name}-").to_numpy()
+    cents = rng.integers(100, 1_000_000, len(ids))
+    columns["name"] = pd.Series(rng.integers(1, 50_000, len(ids))).astype(str).radd(" Customer ").to_numpy()
+    columns["amount"] = amounts(cents)
+    columns["status"] = STATUSES[rng.integers(0, len(STATUSES), len(ids))]
+    columns["created_on"] = _dates()[rng.integers(0, 2 * 366, len(ids))]
+    return pd.DataFrame(columns)
+
+
+def amounts(cents: np.ndarray) -> np.ndarray:
+    cents = pd.Series(cents)
+    return ((cents // 100).astype(str) + "." + (cents % 100).astype(str).str.zfill(2)).to_numpy()
+
+
+def file_names(
+    rows: int,
+    key_columns: int,
+    missing_rate: float,
+    extra_rate: float,
+    discrepancy_rate: float,
+    seed: int
+) -> Tuple[str, str]:
+    suffix = f"{rows}-k{key_columns}-m{missing_rate}-e{extra_rate}-d{discrepancy_rate}-s{seed}.csv"
+    return f"source-{suffix}", f"target-{suffix}"
+
+
+def generate(
+    directory: str,
+    rows: int,
+    key_columns: int = 1,
+    missing_rate: float = 0.01,
+    extra_rate: float = 0.01,
+    discrepancy_rate: float = 0.05,
+    seed: int = 0,
+    block_size: int = BLOCK_SIZE
+) -> Tuple[str, str]:
+    """
+    Writes a source and a target CSV file to `directory` and returns their
+    paths. Files generated earlier with the same arguments are reused.
+    Rows are generated `block_size` at a time, so memory use does not grow
+    with `rows`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = tuple(
+        os.path.join(directory, name)
+        for name in file_names(rows, key_columns, missing_rate, extra_rate, discrepancy_rate, seed)
+    )
+    if all(os.path.exists(path) for path in paths):
+        return paths
+
+    rng = np.random.default_rng(seed)
+    partial_paths = [f"{path}.partial" for path in paths]
+    for start in range(0, rows, block_size):
+        ids = np.arange(start, min(start + block_size, rows))
+        source = _block(ids, key_columns, rng)
+        target = source.copy()
+
+        changed = rng.random(len(ids)) < discrepancy_rate
+        by_amount = changed & (rng.random(len(ids)) < 0.5)
+        target.loc[by_amount, "amount"] = amounts(rng.integers(100, 1_000_000, by_amount.sum()))
+        by_status = changed & ~by_amount
+        target.loc[by_status, "status"] = np.where(target.loc[by_status, "status"] == "Failed", "Paid", "Failed")
+        target = target[rng.random(len(ids)) >= missing_rate]
+
+        for frame, path in zip((source, target), partial_paths):
+            frame.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+    extra = int(rows * extra_rate)
+    for start in range(0, extra, block_size):
+        ids = np.arange(rows + start, rows + min(start + block_size, extra))
+        _block(ids, key_columns, rng).to_csv(partial_paths[1], mode="a", header=False, index=False)
+
+    for partial_path, path in zip(partial_paths, paths):
+        os.replace(partial_path, path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("1m"), help="e.g. 10000, 10k or 1m")
+    parser.add_argument("--directory", default="benchmarks/data")
+    parser.add_argument("--key-columns", type=int, default=1, help=f"1 to {len(KEY_COLUMNS)}")
+    parser.add_argument("--missing-rate", type=float, default=0.01,
+                        help="share of source rows missing from the target")
+    parser.add_argument("--extra-rate", type=float, default=0.01,
+                        help="target rows missing from the source, as a share of the source rows")
+    parser.add_argument("--discrepancy-rate", type=float, default=0.05,
+                        help="share of shared rows with a different value")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for path in generate(
+        args.directory, args.rows, args.key_columns, args.missing_rate, args.extra_rate,
+        args.discrepancy_rate, args.seed
+    ):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
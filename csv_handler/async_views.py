@@ -0,0 +1,251 @@
+import asyncio
+import itertools
+import json
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from data_reconciler.report_formatter.csv_generator import CSVReportGenerator
+from data_reconciler.report_formatter.html_generator import HTMLReportGenerator
+from . import events, job_status, prometheus_metrics, report_cache
+from .filters import filter_reports
+from .models import CSVDataReport
+from .pagination import AsyncCSVDataReportPagination
+from .serializers import ListCSVDataReportSerializer
+from .views import iterate_in_thread, report_file_response
+
+# How often an event stream re-reads the job status when Redis is unavailable.
+FALLBACK_POLL_INTERVAL = 2
+
+
+def is_uuid(value) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def server_sent_event(event, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def current_status(job_id):
+    report = await CSVDataReport.objects.only(*job_status.STATUS_FIELDS).aget(id=job_id)
+    return ListCSVDataReportSerializer(report).data
+
+
+async def status_events(job_id):
+    """
+    Yields the current status of a job as a server-sent event, then every
+    event published for it until the job completes or fails, or until
+    RECONCILIATION_EVENTS_TIMEOUT seconds have passed. Falls back to polling
+    the database when Redis is unavailable.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.RECONCILIATION_EVENTS_TIMEOUT
+    heartbeat = settings.RECONCILIATION_EVENTS_HEARTBEAT
+
+    # Subscribe before reading the status, so no transition can be missed.
+    async with events.subscription(job_id) as pubsub:
+        data = await current_status(job_id)
+        yield server_sent_event('status', data)
+        last_sent = loop.time()
+
+        while data["status"] not in job_status.TERMINAL_STATUSES and loop.time() < deadline:
+            if pubsub is None:
+                await asyncio.sleep(FALLBACK_POLL_INTERVAL)
+                latest = await current_status(job_id)
+                if latest["status"] != data["status"]:
+                    data = latest
+                    yield server_sent_event('status', data)
+                    last_sent = loop.time()
+                elif loop.time() - last_sent >= heartbeat:
+                    yield ": keep-alive\n\n"
+                    last_sent = loop.time()
+                continue
+
+            message = await events.next_event(pubsub, timeout=min(heartbeat, max(deadline - loop.time(), 0)))
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            event, data = message
+            yield server_sent_event(event, data)
+
+
+@require_GET
+async def job_events(request, pk):
+    """
+    Streams the status transitions and progress of a job as server-sent
+    events, so clients can hold one connection instead of polling.
+    """
+    if not is_uuid(pk):
+        return JsonResponse({"error": "job_id must be a valid UUID format"}, status=400)
+
+    if not await CSVDataReport.objects.filter(id=pk).aexists():
+        return JsonResponse({"error": "Report not found"}, status=404)
+
+    response = StreamingHttpResponse(status_events(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Native async versions of the status, listing and report endpoints of
+# CSVReconciliationViewSet. They use the async ORM and cache APIs, and
+# reports are streamed chunk by chunk, so a slow client holds no thread
+# while its download is sent.
+
+NO_DISCREPANCY = {"message": "No descripancy found in both datasets."}
+
+
+@require_GET
+async def job_list(request):
+    reports, error = filter_reports(
+        CSVDataReport.objects.only(*job_status.STATUS_FIELDS), request.GET
+    )
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    paginator = AsyncCSVDataReportPagination()
+    try:
+        page, next_url, previous_url = await paginator.paginate_queryset(reports, request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    return JsonResponse({"next": next_url, "previous": previous_url, "results": ListCSVDataReportSerializer(page, many=True).data})
+
+
+@require_GET
+async def get_status(request, pk):
+    if not is_uuid(pk):
+        return JsonResponse({"error": "job_id must be a valid UUID format"}, status=400)
+
+    data = await job_status.aget_cached_status(pk)
+    if data is not None:
+        return JsonResponse(data)
+
+    try:
+        report = await CSVDataReport.objects.only(*job_status.STATUS_FIELDS).aget(id=pk)
+    except CSVDataReport.DoesNotExist:
+        return JsonResponse({"error": "Report not found"}, status=404)
+
+    if report.status in job_status.TERMINAL_STATUSES:
+        data = await job_status.acache_status(report)
+    else:
+        data = ListCSVDataReportSerializer(report).data
+    return JsonResponse(data)
+
+
+async def completed_report(pk):
+    """
+    Fetches a job without its report, for the report endpoints. Returns
+    (report, None) for a completed job, or (None, response) to return.
+    """
+    if not is_uuid(pk):
+        return None, JsonResponse({"error": "job_id must be a valid UUID format"}, status=400)
+
+    try:
+        report = await CSVDataReport.objects.only('id', 'status', 'updated_at').aget(id=pk)
+    except CSVDataReport.DoesNotExist:
+        return None, JsonResponse({"error": "Report not found"}, status=404)
+
+    if report.status != 'completed':
+        return None, JsonResponse({"status": report.status})
+    return report, None
+
+
+@require_GET
+async def report_json(request, pk):
+    report, response = await completed_report(pk)
+    if response is not None:
+        return response
+
+    await sync_to_async(report.load_report_fields)()
+    if report.report_file:
+        return report_file_response(request, report)
+
+    report_data = await report.aget_report()
+    if not report_data:
+        return JsonResponse(NO_DISCREPANCY)
+    return JsonResponse(report_data)
+
+
+def query_runner():
+    """
+    Returns a function that evaluates a queryset from any thread by handing
+    it back to this event loop, which runs it on the thread-sensitive thread
+    like the rest of the view's database access. Renderings stepped on
+    iterate_in_thread's thread pool read their records through it.
+    """
+    loop = asyncio.get_running_loop()
+
+    def run_query(queryset):
+        return asyncio.run_coroutine_threadsafe(sync_to_async(list)(queryset), loop).result()
+
+    return run_query
+
+
+async def rendered_report(request, report, report_format, iter_report, content_type, attachment_name=None):
+    """
+    Async version of CSVReconciliationViewSet._rendered_report: serves the
+    cached rendering, or streams a fresh one and tees it into the cache.
+    """
+    not_modified = report_cache.not_modified_response(request, report, report_format)
+    if not_modified is not None:
+        return report_cache.set_validators(not_modified, report, report_format)
+
+    start = time.perf_counter()
+    rendered = await report_cache.aget_rendered(report, report_format)
+    if rendered is not None:
+        response = HttpResponse(rendered, content_type=content_type)
+        prometheus_metrics.observe_render(report_format, 'hit', start)
+    else:
+        report_data = await sync_to_async(report.stored_report)(run_query=query_runner())
+        if report_data is None:
+            report_data = await report.aget_report()
+            if not report_data:
+                return JsonResponse(NO_DISCREPANCY)
+
+        try:
+            chunks = iter_report(report_data)
+            # Generate the first chunk up front so that errors can still be reported as a 500.
+            first_chunk = await sync_to_async(next, thread_sensitive=False)(chunks, "")
+        except Exception as e:
+            return JsonResponse({"error": f"Error generating {report_format.upper()} report: {str(e)}"}, status=500)
+        response = StreamingHttpResponse(
+            iterate_in_thread(prometheus_metrics.observe_stream(
+                report_cache.tee_to_cache(report, report_format, itertools.chain([first_chunk], chunks)),
+                report_format,
+                start
+            )),
+            content_type=content_type
+        )
+
+    if attachment_name:
+        response['Content-Disposition'] = f'attachment; filename="{attachment_name}"'
+    return report_cache.set_validators(response, report, report_format)
+
+
+@require_GET
+async def report_csv(request, pk):
+    report, response = await completed_report(pk)
+    if response is not None:
+        return response
+    return await rendered_report(
+        request, report, 'csv', CSVReportGenerator.iter_csv, 'text/csv',
+        attachment_name=f"reconciliation_report_{pk}.csv"
+    )
+
+
+@require_GET
+async def report_html(request, pk):
+    report, response = await completed_report(pk)
+    if response is not None:
+        return response
+    return await rendered_report(request, report, 'html', HTMLReportGenerator.iter_html, 'text/html')
@@ -0,0 +1,141 @@
+"""
+Cleaned, columnar copies of uploaded CSV files.
+
+The first time an upload is parsed, its cleaned chunks are also written to
+a Parquet file stored next to it, and later reads of the upload come from
+that file instead, so re-running a job skips CSV parsing and cleaning.
+"""
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.core.files import File
+
+from .csv_parser import CSVParser
+
+logger = logging.getLogger(__name__)
+
+# Part of the cache file names; bump it whenever CSVParser cleans values
+# differently, so files written by the old code are no longer read.
+CLEANING_VERSION = 1
+
+
+def cache_name(file_field) -> str:
+    return f"{file_field.name}.cleaned-v{CLEANING_VERSION}.parquet"
+
+
+def read_chunks(file_field, chunk_size: int, stats: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yields the cleaned DataFrame chunks of an uploaded CSV file, exactly as
+    `CSVParser.read_csv_chunks` does, but from its Parquet copy when there
+    is one. Otherwise the CSV is parsed and, if it is read to the end, the
+    copy is written. A `stats` dict collects timings and counts, as for
+    `CSVParser.read_csv_chunks`, and whether the copy was used.
+    """
+    if stats is None:
+        stats = {}
+    if not settings.RECONCILIATION_COLUMNAR_CACHE:
+        yield from CSVParser.read_csv_chunks(file_field, chunk_size, stats)
+        return
+
+    storage = file_field.storage
+    name = cache_name(file_field)
+    if storage.exists(name):
+        stats["columnar_cache"] = "hit"
+        yield from read_parquet_chunks(storage, name, chunk_size, stats)
+    else:
+        stats["columnar_cache"] = "miss"
+        yield from write_through(CSVParser.read_csv_chunks(file_field, chunk_size, stats), storage, name, stats)
+
+
+def read_rows(file_field, chunk_size: int, stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yields the cleaned rows of an uploaded CSV file one by one, in file order."""
+    return chunk_rows(read_chunks(file_field, chunk_size, stats))
+
+
+def chunk_rows(chunks: Iterable[pd.DataFrame]) -> Iterator[Dict[str, Any]]:
+    """Yields the rows of DataFrame chunks one by one, as dicts."""
+    for chunk in chunks:
+        yield from chunk.to_dict(orient='records')
+
+
+def read_parquet_chunks(
+    storage, name: str, chunk_size: int, stats: Optional[Dict[str, Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads a Parquet copy back `chunk_size` rows at a time. Files on a local
+    storage backend are memory-mapped; others are read through the storage.
+    A `stats` dict collects the rows in the file, the rows and columns read
+    and the seconds spent reading.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("rows", 0)
+    stats.setdefault("read_seconds", 0)
+    start = time.perf_counter()
+    try:
+        source = pa.memory_map(storage.path(name))
+    except NotImplementedError:
+        source = storage.open(name, 'rb')
+    with source:
+        parquet_file = pq.ParquetFile(source)
+        stats["total_rows"] = parquet_file.metadata.num_rows
+        batches = parquet_file.iter_batches(batch_size=chunk_size)
+        stats["read_seconds"] += time.perf_counter() - start
+        for batch in batches:
+            start = time.perf_counter()
+            chunk = batch.to_pandas()
+            stats["read_seconds"] += time.perf_counter() - start
+            stats["rows"] += len(chunk)
+            stats["columns"] = chunk.shape[1]
+            yield chunk
+
+
+def write_through(
+    chunks: Iterator[pd.DataFrame], storage, name: str, stats: Optional[Dict[str, Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields `chunks` unchanged while writing them to a Parquet file, which is
+    saved to `storage` as `name` once the last chunk has been read. Nothing
+    is saved if the chunks are not read to the end, and a chunk that cannot
+    be written only stops the copy, never the reconciliation. The seconds
+    spent writing are added to `stats` as `cache_write_seconds`.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("cache_write_seconds", 0)
+    with tempfile.TemporaryDirectory(prefix="reconciliation-", dir=settings.RECONCILIATION_SPILL_DIR) as directory:
+        path = os.path.join(directory, "cleaned.parquet")
+        writer = None
+        for chunk in chunks:
+            start = time.perf_counter()
+            if writer is not False:
+                try:
+                    # Cleaned values are strings or None; they are kept as
+                    # strings so the reconciliation compares them unchanged.
+                    schema = pa.schema([(column, pa.string()) for column in chunk.columns])
+                    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, schema)
+                    writer.write_table(table)
+                except (pa.ArrowException, ValueError, TypeError):
+                    logger.warning("Could not write a columnar copy of %s", name, exc_info=True)
+                    if writer:
+                        writer.close()
+                    writer = False
+            stats["cache_write_seconds"] += time.perf_counter() - start
+            yield chunk
+
+        start = time.perf_counter()
+        if writer:
+            writer.close()
+            if not storage.exists(name):
+                with open(path, "rb") as parquet_file:
+                    storage.save(name, File(parquet_file))
+        stats["cache_write_seconds"] += time.perf_counter() - start
@@ -1,7 +1,16 @@
 import csv
-from typing import List, Dict, IO, Any
+import time
+from itertools import islice
+from typing import List, Dict, IO, Any, Iterator, Optional
 from datetime import datetime
 
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 50000
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y")
+# Matches every value one of DATE_FORMATS can parse (and a few it cannot).
+DATE_CANDIDATE_PATTERN = r"\d{4}-\d{1,2}-[ \d]?\d|[ \d]?\d/[ \d]?\d/\d{4}"
+
 class CSVParser:
     """
     Utility class for reading, and cleaning (nomralizing) CSV data.
@@ -19,6 +28,64 @@ class CSVParser:
         field_names = reader.fieldnames
         return dict(data=cls.clean_data(data), field_names=list(field_names))
 
+    @classmethod
+    def read_csv_chunks(
+        cls,
+        file_obj: IO,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lazily reads a CSV file-like object and yields cleaned DataFrames of at
+        most `chunk_size` rows, so memory use is bounded by the chunk size
+        rather than the file size.
+
+        If a `stats` dict is passed, the number of rows and columns read, the
+        position reached in the file (`bytes_read`, when the file can tell)
+        and the seconds spent opening the file (which downloads it from
+        remote storage backends), parsing it into DataFrames and cleaning
+        them are added to it.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        if stats is None:
+            stats = {}
+        for key in ("rows", "open_seconds", "parse_seconds", "clean_seconds"):
+            stats.setdefault(key, 0)
+
+        start = time.perf_counter()
+        file_obj.seek(0)
+        stats["open_seconds"] += time.perf_counter() - start
+        decoded = (line.decode('utf-8') for line in file_obj)
+        reader = csv.DictReader(decoded)
+        while True:
+            start = time.perf_counter()
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                stats["parse_seconds"] += time.perf_counter() - start
+                return
+            frame = pd.DataFrame(rows, columns=reader.fieldnames)
+            parsed = time.perf_counter()
+            frame = cls.clean_frame(frame)
+            stats["parse_seconds"] += parsed - start
+            stats["clean_seconds"] += time.perf_counter() - parsed
+            stats["rows"] += len(frame)
+            stats["columns"] = frame.shape[1]
+            try:
+                stats["bytes_read"] = file_obj.tell()
+            except (AttributeError, OSError):
+                pass
+            yield frame
+
+    @classmethod
+    def read_csv_rows(cls, file_obj: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily reads a CSV file-like object and yields cleaned rows one by one,
+        in file order.
+        """
+        for chunk in cls.read_csv_chunks(file_obj, chunk_size):
+            yield from chunk.to_dict(orient='records')
+
     @staticmethod
     def clean_value(value: str) -> str:
         """
@@ -27,15 +94,24 @@ class CSVParser:
         if not isinstance(value, str):
             return value
         value = value.strip()
+        date = CSVParser.normalize_date(value)
+        if date is not None:
+            return date
+        return value.lower()  
 
-        # Try to parse as date (ISO or common formats)
-        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y"):
+    @staticmethod
+    def normalize_date(value: str) -> Optional[str]:
+        """
+        Parse a stripped value as a date (ISO or common formats) and return it
+        as YYYY-MM-DD, or None when it is not a date.
+        """
+        for fmt in DATE_FORMATS:
             try:
                 dt = datetime.strptime(value, fmt)
                 return dt.strftime("%Y-%m-%d")
             except ValueError:
                 continue
-        return value.lower()  
+        return None
 
     @classmethod
     def clean_data(cls, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -47,5 +123,46 @@ class CSVParser:
                 row[key] = cls.clean_value(value)
         return data
 
+    @classmethod
+    def clean_column(cls, column: pd.Series) -> pd.Series:
+        """
+        Normalize a whole column at once. Gives the same values as applying
+        `clean_value` to every cell, but each distinct value is cleaned only
+        once, strip and lowercase are vectorized, and only values shaped like
+        one of DATE_FORMATS are tried as dates.
+        """
+        if column.dtype != object:
+            return column
+
+        all_strings = pd.api.types.infer_dtype(column, skipna=False) == "string"
+        is_string = None if all_strings else column.map(lambda value: isinstance(value, str))
+        values = column if all_strings else column[is_string]
+        if values.empty:
+            return column
+
+        codes, uniques = pd.factorize(values.to_numpy())
+        stripped = pd.Series(uniques, dtype=object).str.strip()
+        cleaned = stripped.str.lower()
+        candidates = stripped.str.fullmatch(DATE_CANDIDATE_PATTERN)
+        if candidates.any():
+            cleaned[candidates] = [
+                cls.normalize_date(value) or value.lower()
+                for value in stripped[candidates]
+            ]
+        cleaned = pd.Series(cleaned.to_numpy().take(codes), index=values.index, dtype=object)
+
+        if all_strings:
+            return cleaned
+        result = column.copy()
+        result[is_string] = cleaned
+        return result
 
-    
\ No newline at end of file
+    @classmethod
+    def clean_frame(cls, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normalize a DataFrame column by column; equivalent to `clean_data`.
+        """
+        cleaned = frame.copy()
+        for position in range(frame.shape[1]):
+            cleaned.isetitem(position, cls.clean_column(frame.iloc[:, position]))
+        return cleaned
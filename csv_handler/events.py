@@ -0,0 +1,82 @@
+import json
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def enabled() -> bool:
+    """Job events need a Redis server; they are disabled for any other URL."""
+    return settings.RECONCILIATION_EVENTS_URL.startswith(REDIS_SCHEMES)
+
+
+def channel_name(job_id) -> str:
+    return f"job-events:{job_id}"
+
+
+@lru_cache(maxsize=None)
+def _client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+
+def publish(job_id, event: str, data: Dict[str, Any]):
+    """
+    Publishes an event about a job to its Redis channel. Publishing is
+    best effort: errors are logged, never raised, so an unavailable Redis
+    server never fails a job.
+    """
+    if not enabled():
+        return
+    message = json.dumps({"event": event, "data": data}, cls=DjangoJSONEncoder)
+    try:
+        _client(settings.RECONCILIATION_EVENTS_URL).publish(channel_name(job_id), message)
+    except redis.RedisError:
+        logger.warning("Could not publish %s event of job %s", event, job_id, exc_info=True)
+
+
+@asynccontextmanager
+async def subscription(job_id):
+    """
+    Subscribes to a job's channel for the duration of the block and yields
+    the subscription, to be read with `next_event`. Yields None if events
+    are disabled or Redis is unavailable; callers should then poll instead.
+    """
+    client = None
+    pubsub = None
+    if enabled():
+        client = aioredis.Redis.from_url(settings.RECONCILIATION_EVENTS_URL, socket_connect_timeout=1)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(channel_name(job_id))
+        except redis.RedisError:
+            logger.warning("Could not subscribe to the events of job %s", job_id, exc_info=True)
+            await pubsub.aclose()
+            pubsub = None
+    try:
+        yield pubsub
+    finally:
+        if pubsub is not None:
+            await pubsub.aclose()
+        if client is not None:
+            await client.aclose()
+
+
+async def next_event(pubsub, timeout: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Waits up to `timeout` seconds for the next event of a subscription and
+    returns it as (event, data), or None if none arrived.
+    """
+    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+    if message is None:
+        return None
+    payload = json.loads(message["data"])
+    return payload["event"], payload["data"]
@@ -0,0 +1,48 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import CSVDataReport
+
+
+def parse_moment(value):
+    """
+    Parses an ISO 8601 datetime, or a date taken as its midnight, into an
+    aware datetime in the current time zone. Returns None if it is neither.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_reports(reports, query_params):
+    """
+    Applies the `status`, `created_after` and `created_before` filters of
+    the job listing. Returns (reports, None), or (None, error message) if a
+    filter is invalid.
+    """
+    job_status_filter = query_params.get('status')
+    if job_status_filter is not None:
+        if job_status_filter not in dict(CSVDataReport.STATUS_CHOICES):
+            return None, f"Unknown status '{job_status_filter}'"
+        reports = reports.filter(status=job_status_filter)
+
+    for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+        value = query_params.get(param)
+        if value is None:
+            continue
+        moment = parse_moment(value)
+        if moment is None:
+            return None, f"{param} must be an ISO 8601 date or datetime"
+        reports = reports.filter(**{lookup: moment})
+    return reports, None
@@ -0,0 +1,81 @@
+"""
+Wall time, CPU time and peak memory of the stages of a reconciliation job.
+
+Each stage is recorded as a dict appended to the job's `stage_metrics`, so
+a slow job shows where its time went without attaching a profiler.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size of the process, so that it can be
+    measured per stage in long-lived worker processes. Only Linux supports
+    this; elsewhere the peak since the process started is reported.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of the process in bytes."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+@contextmanager
+def stage(metrics: List[Dict[str, Any]], name: str, **details):
+    """
+    Times the body of the `with` block as the stage `name` and appends it to
+    `metrics`, also when the block raises. Yields the stage's dict, so that
+    counts and other details can be added to it.
+    """
+    record = {"stage": name, **details}
+    reset_peak_rss()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall
+        record["cpu_seconds"] = time.process_time() - cpu
+        record["peak_rss_bytes"] = peak_rss()
+        metrics.append(_rounded(record))
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    return value
+
+
+def totals(metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sums the wall and CPU times of all stages and returns the highest peak RSS."""
+    return {
+        "wall_seconds": round(sum(record["wall_seconds"] for record in metrics), 6),
+        "cpu_seconds": round(sum(record["cpu_seconds"] for record in metrics), 6),
+        "peak_rss_bytes": max((record["peak_rss_bytes"] for record in metrics), default=None),
+    }
@@ -0,0 +1,102 @@
+"""
+Live progress of a running reconciliation job.
+
+While a job reads its uploads, its progress is written to the job's
+`progress` field and published on its event stream, at most once every
+RECONCILIATION_PROGRESS_INTERVAL seconds, so the status endpoint can show
+how far a long job has got and when it should finish.
+"""
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+from django.conf import settings
+
+from . import events
+from .models import CSVDataReport
+
+SIDES = ('source', 'target')
+
+
+class ProgressReporter:
+    """
+    Reports how much of both uploads a job has read. Each side's chunks are
+    passed through `track` along with the stats dict its reader fills in.
+    """
+
+    def __init__(self, report_data: CSVDataReport, interval: Optional[float] = None):
+        self.report_data = report_data
+        self.interval = settings.RECONCILIATION_PROGRESS_INTERVAL if interval is None else interval
+        self.sizes = {'source': report_data.source_file.size, 'target': report_data.target_file.size}
+        self.stats: Dict[str, Dict[str, Any]] = {side: {} for side in SIDES}
+        self.finished = set()
+        self.started = time.monotonic()
+        self.reported = None
+
+    def restart(self) -> None:
+        """Starts counting again, for when both uploads are read again from the start."""
+        self.stats = {side: {} for side in SIDES}
+        self.finished = set()
+
+    def track(self, side: str, chunks: Iterable[pd.DataFrame], stats: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        """Yields `chunks` unchanged, reporting progress as they are read."""
+        self.stats[side] = stats
+        for chunk in chunks:
+            self.report()
+            yield chunk
+        self.finished.add(side)
+        self.report(force=len(self.finished) == len(SIDES))
+
+    def bytes_read(self, side: str) -> int:
+        stats, size = self.stats[side], self.sizes[side]
+        if side in self.finished:
+            return size
+        if stats.get('total_rows'):
+            # Parquet copies are read by row, so their progress is estimated from the rows read.
+            return int(size * stats.get('rows', 0) / stats['total_rows'])
+        return min(stats.get('bytes_read', 0), size)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the rows and bytes read per side and in total, the rows read
+        per second, and, while reading, the estimated seconds until both
+        uploads are read.
+        """
+        elapsed = time.monotonic() - self.started
+        sides = {
+            side: {
+                'rows': self.stats[side].get('rows', 0),
+                'bytes_read': self.bytes_read(side),
+                'bytes_total': self.sizes[side],
+            }
+            for side in SIDES
+        }
+        rows = sum(side['rows'] for side in sides.values())
+        bytes_read = sum(side['bytes_read'] for side in sides.values())
+        bytes_total = sum(self.sizes.values())
+        fraction = bytes_read / bytes_total if bytes_total else 1.0
+        reading = len(self.finished) < len(SIDES)
+        return {
+            'stage': 'reading' if reading else 'comparing',
+            **sides,
+            'rows': rows,
+            'fraction_read': round(fraction, 4),
+            'elapsed_seconds': round(elapsed, 1),
+            'rows_per_second': round(rows / elapsed) if elapsed > 0 else None,
+            # Only the reading is estimated; how long comparing takes does not follow from the bytes read.
+            'eta_seconds': round(elapsed * (1 - fraction) / fraction, 1) if reading and fraction > 0 else None,
+        }
+
+    def report(self, force: bool = False) -> None:
+        """Saves and publishes the job's progress, unless it was reported less than `interval` seconds ago."""
+        now = time.monotonic()
+        if not force and self.reported is not None and now - self.reported < self.interval:
+            return
+        self.reported = now
+        progress = self.snapshot()
+        self.report_data.progress = progress
+        # A queryset update leaves updated_at, and so cached renderings, alone.
+        CSVDataReport.objects.filter(id=self.report_data.id).update(progress=progress)
+        events.publish(self.report_data.id, 'progress', {
+            "id": str(self.report_data.id), "status": "processing", "stage": progress['stage'], "progress": progress
+        })
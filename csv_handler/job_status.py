@@ -0,0 +1,59 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import events
+from .serializers import ListCSVDataReportSerializer
+
+logger = logging.getLogger(__name__)
+
+# A job in one of these states only changes again if it is re-run, which
+# rewrites its cache entry, so it is safe to cache from any process.
+TERMINAL_STATUSES = ('completed', 'failed')
+
+STATUS_FIELDS = ('id', 'status', 'created_at', 'updated_at', 'report_summary', 'progress')
+
+
+def cache_key(job_id) -> str:
+    return f"job-status:{job_id}"
+
+
+def get_cached_status(job_id):
+    return cache.get(cache_key(job_id))
+
+
+async def aget_cached_status(job_id):
+    return await cache.aget(cache_key(job_id))
+
+
+def cache_status(report):
+    """
+    Stores the status payload of a job in the default cache and returns it.
+    Cache errors are logged rather than raised, so an unavailable cache
+    never fails a job or a request.
+    """
+    data = ListCSVDataReportSerializer(report).data
+    try:
+        cache.set(cache_key(report.id), data, timeout=settings.RECONCILIATION_STATUS_CACHE_TIMEOUT)
+    except Exception:
+        logger.warning("Could not cache the status of job %s", report.id, exc_info=True)
+    return data
+
+
+async def acache_status(report):
+    """Async version of `cache_status`."""
+    data = ListCSVDataReportSerializer(report).data
+    try:
+        await cache.aset(cache_key(report.id), data, timeout=settings.RECONCILIATION_STATUS_CACHE_TIMEOUT)
+    except Exception:
+        logger.warning("Could not cache the status of job %s", report.id, exc_info=True)
+    return data
+
+
+def notify(report):
+    """
+    Caches the new status of a job and publishes it to the clients
+    listening on the job's event stream.
+    """
+    events.publish(report.id, 'status', cache_status(report))
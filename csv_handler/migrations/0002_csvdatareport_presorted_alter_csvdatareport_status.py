@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='presorted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='csvdatareport',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='processing', max_length=10),
+        ),
+    ]
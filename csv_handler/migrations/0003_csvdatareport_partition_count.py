@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0002_csvdatareport_presorted_alter_csvdatareport_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='partition_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0003_csvdatareport_partition_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('missing_in_source', 'Missing in source'), ('missing_in_target', 'Missing in target'), ('discrepancies', 'Discrepancy')], max_length=20)),
+                ('key', models.CharField(max_length=1024)),
+                ('data', models.JSONField()),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='records', to='csv_handler.csvdatareport')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['report', 'category', 'id'], name='csv_handler_report__fdcf17_idx'), models.Index(fields=['report', 'category', 'key'], name='csv_handler_report__5f0c33_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0004_reconciliationrecord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='csvdatareport',
+            index=models.Index(fields=['created_at'], name='csv_handler_created_0ec8e0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='csvdatareport',
+            index=models.Index(fields=['status', 'created_at'], name='csv_handler_status_ebed1c_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0005_csvdatareport_csv_handler_created_0ec8e0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='report_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='report_compression',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
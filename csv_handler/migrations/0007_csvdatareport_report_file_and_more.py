@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:11
+
+import csv_handler.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0006_csvdatareport_report_blob_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='report_file',
+            field=models.FileField(blank=True, null=True, upload_to=csv_handler.models.report_directory_path),
+        ),
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='report_summary',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0007_csvdatareport_report_file_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='reused_from',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reused_by', to='csv_handler.csvdatareport'),
+        ),
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='source_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='target_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='csvdatareport',
+            index=models.Index(fields=['source_sha256', 'target_sha256', 'unique_fields'], name='csv_handler_source__5cc971_idx'),
+        ),
+    ]
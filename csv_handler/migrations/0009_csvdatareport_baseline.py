@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:22
+
+import csv_handler.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0008_csvdatareport_reused_from_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='baseline',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incremental_runs', to='csv_handler.csvdatareport'),
+        ),
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='fingerprints_file',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to=csv_handler.models.report_directory_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0010_csvdatareport_stage_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='csvdatareport',
+            name='progress',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
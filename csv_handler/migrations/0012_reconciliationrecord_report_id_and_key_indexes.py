@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0011_csvdatareport_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reconciliationrecord',
+            index=models.Index(fields=['report', 'id'], name='csv_handler_report__0f496e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reconciliationrecord',
+            index=models.Index(fields=['report', 'key', 'id'], name='csv_handler_report__66c6f8_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csv_handler', '0012_reconciliationrecord_report_id_and_key_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reconciliationrecord',
+            name='csv_handler_report__5f0c33_idx',
+        ),
+        migrations.AlterField(
+            model_name='reconciliationrecord',
+            name='report',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='records', to='csv_handler.csvdatareport'),
+        ),
+    ]
@@ -1,11 +1,33 @@
+import io
+import json
+import os
+import time
 import uuid
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+
+from data_reconciler.incremental import IncrementalReconciler
+from data_reconciler.processor import DataReconciler
+from . import report_compression
 
 
 def upload_directory_path(instance, filename):
     return f'csv_datasets/{instance.id}/{filename}'
 
+
+def report_directory_path(instance, filename):
+    return f'reports/{instance.id}/{filename}'
+
 class CSVDataReport(models.Model):
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed')
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     source_file = models.FileField(upload_to=upload_directory_path)
     target_file = models.FileField(upload_to=upload_directory_path)
@@ -13,12 +35,242 @@ class CSVDataReport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(
-        max_length=10, 
-            choices=[
-            ('processing', 'Processing'), 
-            ('completed', 'Completed'), 
-            ('failed', 'Failed')
-        ],
+        max_length=10,
+        choices=STATUS_CHOICES,
         default='processing'
     )
-    report = models.JSONField(null=True, blank=True)
\ No newline at end of file
+    report = models.JSONField(null=True, blank=True)
+    # The report serialized and compressed when RECONCILIATION_REPORT_COMPRESSION
+    # is enabled, in which case `report` is left empty. Read it with get_report().
+    report_blob = models.BinaryField(null=True, blank=True, editable=False)
+    # Codec, sizes, ratio and timings of the compressed report.
+    report_compression = models.JSONField(null=True, blank=True)
+    # Reports of at least RECONCILIATION_REPORT_OFFLOAD_THRESHOLD bytes are
+    # written to this file in the default storage backend instead.
+    report_file = models.FileField(upload_to=report_directory_path, null=True, blank=True)
+    # Number of entries in each category of the report, and of discrepancies
+    # per column, as computed by DataReconciler.summarize.
+    report_summary = models.JSONField(null=True, blank=True)
+    presorted = models.BooleanField(default=False)
+    # sha256 digests of the uploads, which are stored content-addressed.
+    source_sha256 = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    target_sha256 = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # The completed job with the same inputs whose report this job reuses.
+    reused_from = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='reused_by', editable=False
+    )
+    # A previous run of the same feed; only the keys that changed since are diffed.
+    baseline = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='incremental_runs'
+    )
+    # Per-key fingerprints of the source and target rows, written by
+    # IncrementalReconciler, for later runs to use this job as their baseline.
+    fingerprints_file = models.FileField(upload_to=report_directory_path, null=True, blank=True, editable=False)
+    # Wall time, CPU time, peak RSS and counts of each stage of the last run,
+    # as recorded by job_metrics.stage.
+    stage_metrics = models.JSONField(null=True, blank=True)
+    # Rows and bytes read, throughput and ETA of the running job, as last
+    # reported by job_progress.ProgressReporter.
+    progress = models.JSONField(null=True, blank=True)
+    # Number of key-hash partitions the job was split into, if any.
+    partition_count = models.PositiveIntegerField(null=True, blank=True)
+
+    # Fields holding the report, to defer or save together.
+    REPORT_FIELDS = ('report', 'report_blob', 'report_compression', 'report_file', 'report_summary')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['source_sha256', 'target_sha256', 'unique_fields']),
+        ]
+
+    def set_report(self, report):
+        """
+        Sets the report, compressed with the RECONCILIATION_REPORT_COMPRESSION
+        codec unless it is 'none', and written to `report_file` rather than
+        the database if it is at least RECONCILIATION_REPORT_OFFLOAD_THRESHOLD
+        bytes long once encoded. Save REPORT_FIELDS to store it.
+        """
+        self._discard_file('report_file')
+        self.report, self.report_blob, self.report_compression = None, None, None
+        self.report_summary = None
+        if report is None:
+            return
+
+        self.report_summary = DataReconciler.summarize(report)
+        codec = settings.RECONCILIATION_REPORT_COMPRESSION
+        threshold = settings.RECONCILIATION_REPORT_OFFLOAD_THRESHOLD
+        if codec == report_compression.NONE:
+            blob = report_compression.serialize(report)
+            if len(blob) < threshold:
+                self.report = report
+                return
+        else:
+            blob, self.report_compression = report_compression.compress(report, codec)
+            if len(blob) < threshold:
+                self.report_blob = blob
+                return
+        self.report_file.save(f"report.json{report_compression.SUFFIXES[codec]}", ContentFile(blob), save=False)
+
+    def copy_report(self, other):
+        """
+        Sets the report to the one stored on another job, as it is stored
+        there, copying an offloaded report file. Save REPORT_FIELDS to store it.
+        """
+        other.load_report_fields()
+        self._discard_file('report_file')
+        self.report, self.report_blob = other.report, other.report_blob
+        self.report_compression, self.report_summary = other.report_compression, other.report_summary
+        if other.report_file:
+            with other.report_file.open('rb') as report_file:
+                self.report_file.save(os.path.basename(other.report_file.name), File(report_file), save=False)
+
+    def set_fingerprints(self, fingerprints):
+        """
+        Sets the fingerprints frame of the job's inputs, as returned by
+        IncrementalReconciler.reconcile, or drops it when None. Save
+        'fingerprints_file' to store it.
+        """
+        self._discard_file('fingerprints_file')
+        if fingerprints is not None:
+            buffer = io.BytesIO()
+            IncrementalReconciler.write_fingerprints(fingerprints, buffer)
+            self.fingerprints_file.save("fingerprints.parquet", ContentFile(buffer.getvalue()), save=False)
+
+    def get_fingerprints(self):
+        if not self.fingerprints_file:
+            return None
+        with self.fingerprints_file.open('rb') as fingerprints_file:
+            return IncrementalReconciler.read_fingerprints(fingerprints_file)
+
+    def _discard_file(self, field_name):
+        field_file = getattr(self, field_name)
+        if field_file:
+            # Only drop the previous file once the new one is committed.
+            storage, name = field_file.storage, field_file.name
+            transaction.on_commit(lambda: storage.delete(name))
+            setattr(self, field_name, None)
+
+    @property
+    def report_codec(self):
+        return self.report_compression['codec'] if self.report_compression else report_compression.NONE
+
+    def load_report_fields(self):
+        deferred = self.get_deferred_fields().intersection(self.REPORT_FIELDS)
+        if deferred:
+            self.refresh_from_db(fields=deferred)
+
+    def iter_report_file(self, decode=True, chunk_size=64 * 1024):
+        """
+        Yields the offloaded report file in chunks of `chunk_size` bytes,
+        decompressed unless `decode` is False. The time spent reading and
+        decompressing is recorded once the whole file has been read.
+        """
+        self.load_report_fields()
+        decode_seconds = 0.0
+        with self.report_file.open('rb') as fileobj:
+            stream = report_compression.open_decoded(fileobj, self.report_codec) if decode else fileobj
+            while True:
+                start = time.perf_counter()
+                chunk = stream.read(chunk_size)
+                decode_seconds += time.perf_counter() - start
+                if not chunk:
+                    break
+                yield chunk
+        if decode:
+            self._record_decode_time(decode_seconds)
+
+    def get_report(self):
+        """
+        Returns the report, loading deferred report fields in one query and
+        reading it from storage and decompressing it as needed.
+        """
+        self.load_report_fields()
+        if self.report_file:
+            return json.loads(b"".join(self.iter_report_file()))
+        if self.report_blob is not None:
+            start = time.perf_counter()
+            raw = report_compression.decode(bytes(self.report_blob), self.report_codec)
+            self._record_decode_time(time.perf_counter() - start)
+            return json.loads(raw)
+        return self.report
+
+    def _record_decode_time(self, seconds):
+        """
+        Adds how long the report took to decompress to `report_compression`
+        the first time it is read, so reads stay free of writes after that.
+        """
+        if not self.report_compression or 'decode_seconds' in self.report_compression:
+            return
+        self.report_compression = {**self.report_compression, 'decode_seconds': round(seconds, 6)}
+        # A queryset update leaves updated_at, and so cached renderings, alone.
+        CSVDataReport.objects.filter(id=self.id).update(report_compression=self.report_compression)
+
+    async def aget_report(self):
+        """Async version of `get_report`; decompression runs in a worker thread."""
+        return await sync_to_async(self.get_report)()
+
+    def stored_report(self, chunk_size=2000, run_query=list):
+        """
+        Returns the report as a dict of lazy iterators over its stored
+        ReconciliationRecord rows, or None if the job has no stored records.
+        Rows are read `chunk_size` at a time by `run_query`, each chunk with
+        its own keyset query, so no database cursor is held between chunks
+        and the iterators can be stepped from any thread.
+        """
+        if not self.records.exists():
+            return None
+        return {
+            category: self._iter_records(category, chunk_size, run_query)
+            for category, _ in ReconciliationRecord.CATEGORY_CHOICES
+        }
+
+    def _iter_records(self, category, chunk_size, run_query):
+        last_id = 0
+        while True:
+            rows = run_query(
+                self.records.filter(category=category, id__gt=last_id).order_by('id')
+                .values_list('id', 'data')[:chunk_size]
+            )
+            for _, data in rows:
+                yield data
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+
+class ReconciliationRecord(models.Model):
+    """
+    A single entry of a job's report (a missing record or a discrepancy),
+    stored as its own row so large reports can be paged through.
+    """
+    MISSING_IN_SOURCE = 'missing_in_source'
+    MISSING_IN_TARGET = 'missing_in_target'
+    DISCREPANCY = 'discrepancies'
+    CATEGORY_CHOICES = [
+        (MISSING_IN_SOURCE, 'Missing in source'),
+        (MISSING_IN_TARGET, 'Missing in target'),
+        (DISCREPANCY, 'Discrepancy'),
+    ]
+
+    # Indexed as the leading column of every index in Meta.
+    report = models.ForeignKey(CSVDataReport, on_delete=models.CASCADE, related_name='records', db_index=False)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
+    key = models.CharField(max_length=1024)
+    data = models.JSONField()
+
+    @staticmethod
+    def format_key(values):
+        """Joins the values of a record's unique fields, as shown in reports."""
+        return ", ".join(map(str, values))[:1024]
+
+    class Meta:
+        # Records are paged in id order, with or without a category or key
+        # filter. Every index slows down the bulk inserts of finished reports,
+        # so there is none for queries no endpoint makes.
+        indexes = [
+            models.Index(fields=['report', 'id']),
+            models.Index(fields=['report', 'key', 'id']),
+            models.Index(fields=['report', 'category', 'id']),
+        ]
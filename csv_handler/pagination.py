@@ -0,0 +1,111 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+
+
+class ReconciliationRecordPagination(CursorPagination):
+    """
+    Keyset pagination over a job's ReconciliationRecord rows, in insertion order.
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class CSVDataReportPagination(CursorPagination):
+    """
+    Keyset pagination over reconciliation jobs, newest first.
+    """
+    ordering = '-created_at'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class AsyncCSVDataReportPagination:
+    """
+    Keyset pagination for the async job listing, newest first. DRF's
+    paginators evaluate querysets synchronously, so the async views use this
+    instead. The cursor encodes the (created_at, id) of the job the page
+    starts after, and whether it pages backwards from it, so responses carry
+    the same `next` and `previous` links as CSVDataReportPagination.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        """
+        Returns the (created_at, id, reverse) of the cursor, or None. Raises
+        ValueError if it is invalid.
+        """
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            created_at, job_id, *reverse = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+        if created_at is None or reverse not in ([], [True]):
+            raise ValueError("Invalid cursor")
+        return created_at, job_id, bool(reverse)
+
+    def encode_cursor(self, report, reverse=False):
+        position = [report.created_at.isoformat(), str(report.id)]
+        if reverse:
+            position.append(True)
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def page_url(self, request, report, reverse=False):
+        params = request.GET.copy()
+        params[self.cursor_query_param] = self.encode_cursor(report, reverse)
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    async def paginate_queryset(self, queryset, request):
+        """
+        Returns the page of `queryset` the request asks for, and the URLs of
+        the next and previous pages (None where there is none). Raises
+        ValueError for an invalid cursor.
+        """
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+        ordering = ('created_at', 'id') if reverse else ('-created_at', '-id')
+        if cursor is not None:
+            created_at, job_id, _ = cursor
+            if reverse:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=job_id))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=job_id))
+
+        page = [report async for report in queryset.order_by(*ordering)[:page_size + 1]]
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+        if not page:
+            return page, None, None
+
+        # The cursor's own job lies on the side the request paged from, so
+        # that side always has a page; the other side has one if the query
+        # found more rows than fit.
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        next_url = self.page_url(request, page[-1]) if has_next else None
+        previous_url = self.page_url(request, page[0], reverse=True) if has_previous else None
+        return page, next_url, previous_url
@@ -0,0 +1,135 @@
+"""
+Prometheus metrics of the API and the Celery workers, served at /metrics.
+
+Counters and histograms live in the process that updates them. When the
+PROMETHEUS_MULTIPROC_DIR environment variable points to a directory
+shared by every process (uvicorn workers, Celery prefork children and the
+web process), prometheus_client writes them there, and a scrape of any
+web process adds up the values of all of them. Job counts by status are
+read from the database at scrape time, so they are the same whichever
+process is scraped.
+"""
+import os
+import socket
+import time
+from typing import Iterable, Iterator
+
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess, values
+from prometheus_client.core import GaugeMetricFamily
+
+from .models import CSVDataReport
+
+
+def process_identifier() -> str:
+    """
+    Names this process's files in PROMETHEUS_MULTIPROC_DIR. The web and
+    worker containers share the directory but not a PID namespace, so the
+    PID alone is not unique across them.
+    """
+    return f"{socket.gethostname()}_{os.getpid()}"
+
+
+if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+    # Must be set before the first metric is created.
+    values.ValueClass = values.MultiProcessValue(process_identifier)
+
+
+TASK_DURATION = Histogram(
+    'reconciliation_task_duration_seconds',
+    'Duration of reconciliation tasks, by task and outcome.',
+    ['task', 'outcome'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, float('inf')),
+)
+ROWS_RECONCILED = Counter(
+    'reconciliation_rows_reconciled_total',
+    'Rows read from uploaded files by reconciliation tasks, by side.',
+    ['side'],
+)
+REPORT_RENDER_DURATION = Histogram(
+    'reconciliation_report_render_seconds',
+    'Time to serve a rendered report, until its last byte is sent, by format and report cache use.',
+    ['format', 'cache'],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf')),
+)
+
+
+# Processing jobs are reported as queued until a worker reports their progress, and as running after.
+JOB_STATES = ('queued', 'running', 'completed', 'failed')
+
+
+class JobCollector:
+    """Reports the number of jobs in each state, counted in the database at scrape time."""
+
+    def collect(self):
+        counts = dict.fromkeys(JOB_STATES, 0)
+        rows = (
+            CSVDataReport.objects.order_by()
+            .values('status', queued=Q(progress__isnull=True))
+            .annotate(count=Count('id'))
+        )
+        for row in rows:
+            job_state = row['status']
+            if job_state == 'processing':
+                job_state = 'queued' if row['queued'] else 'running'
+            counts[job_state] += row['count']
+        jobs = GaugeMetricFamily('reconciliation_jobs', 'Reconciliation jobs, by status.', labels=['status'])
+        for job_status, count in counts.items():
+            jobs.add_metric([job_status], count)
+        yield jobs
+
+
+def observe_task(task: str, outcome: str, start: float) -> None:
+    """Records a task that started at `start`, a time.perf_counter() value."""
+    TASK_DURATION.labels(task=task, outcome=outcome).observe(time.perf_counter() - start)
+
+
+def count_rows(stage_metrics) -> None:
+    """Adds the rows read in the stages recorded by job_metrics to the rows counter."""
+    for record in stage_metrics or []:
+        for side in ('source', 'target'):
+            rows = record.get(side, {}).get('rows')
+            if rows:
+                ROWS_RECONCILED.labels(side=side).inc(rows)
+
+
+def observe_render(report_format: str, cache: str, start: float) -> None:
+    """Records a report rendering that started at `start`, a time.perf_counter() value."""
+    REPORT_RENDER_DURATION.labels(format=report_format, cache=cache).observe(time.perf_counter() - start)
+
+
+def observe_stream(chunks: Iterable[str], report_format: str, start: float) -> Iterator[str]:
+    """
+    Yields the `chunks` of a freshly rendered report unchanged and records
+    the render time once the last one has been sent. Streams the client
+    abandons are not recorded.
+    """
+    yield from chunks
+    observe_render(report_format, 'miss', start)
+
+
+def registry() -> CollectorRegistry:
+    """
+    Returns a registry of the metrics of every process sharing the
+    PROMETHEUS_MULTIPROC_DIR directory, or of this process if it is not set,
+    and the job counts.
+    """
+    collected = CollectorRegistry()
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.MultiProcessCollector(collected)
+    else:
+        collected.register(_ProcessMetrics())
+    collected.register(JobCollector())
+    return collected
+
+
+class _ProcessMetrics:
+    def collect(self):
+        return REGISTRY.collect()
+
+
+def metrics_view(request):
+    """Serves all metrics in the Prometheus text format."""
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
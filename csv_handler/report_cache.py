@@ -0,0 +1,70 @@
+import hashlib
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+REPORT_CACHE_ALIAS = 'reports'
+
+
+def cache_key(report, report_format: str) -> str:
+    """
+    Keys a rendered report by job id, format and the time the job last
+    changed, so re-running a job never serves a stale rendering.
+    """
+    return f"report:{report.id}:{report_format}:{report.updated_at.timestamp()}"
+
+
+def etag(report, report_format: str) -> str:
+    return '"%s"' % hashlib.sha256(cache_key(report, report_format).encode()).hexdigest()[:32]
+
+
+def not_modified_response(request, report, report_format: str):
+    """
+    Returns a 304 response if the client's If-None-Match or
+    If-Modified-Since headers show it already has this rendering,
+    otherwise None.
+    """
+    return get_conditional_response(
+        request,
+        etag=etag(report, report_format),
+        last_modified=int(report.updated_at.timestamp())
+    )
+
+
+def set_validators(response, report, report_format: str):
+    response['ETag'] = etag(report, report_format)
+    response['Last-Modified'] = http_date(report.updated_at.timestamp())
+    return response
+
+
+def get_rendered(report, report_format: str) -> Optional[str]:
+    return caches[REPORT_CACHE_ALIAS].get(cache_key(report, report_format))
+
+
+async def aget_rendered(report, report_format: str) -> Optional[str]:
+    return await caches[REPORT_CACHE_ALIAS].aget(cache_key(report, report_format))
+
+
+def tee_to_cache(report, report_format: str, chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Yields `chunks` unchanged and stores their concatenation in the report
+    cache once the last one has been sent. Renderings larger than
+    RECONCILIATION_REPORT_CACHE_MAX_SIZE characters are not cached, and
+    neither are streams the client abandons half way.
+    """
+    max_size = settings.RECONCILIATION_REPORT_CACHE_MAX_SIZE
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size > max_size:
+                parts = None
+            else:
+                parts.append(chunk)
+        yield chunk
+    if parts is not None:
+        caches[REPORT_CACHE_ALIAS].set(cache_key(report, report_format), "".join(parts))
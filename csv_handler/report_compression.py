@@ -0,0 +1,81 @@
+import gzip
+import json
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+NONE = 'none'
+GZIP = 'gzip'
+ZSTD = 'zstd'
+CODECS = (NONE, GZIP, ZSTD)
+# File name suffixes of reports offloaded to storage.
+SUFFIXES = {NONE: '', GZIP: '.gz', ZSTD: '.zst'}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured("zstd report compression requires the zstandard package")
+    return zstandard
+
+
+def encode(raw: bytes, codec: str) -> bytes:
+    if codec == GZIP:
+        return gzip.compress(raw, compresslevel=6)
+    if codec == ZSTD:
+        return _zstandard().ZstdCompressor(level=3).compress(raw)
+    raise ImproperlyConfigured(f"Unknown report compression codec '{codec}', expected one of {', '.join(CODECS)}")
+
+
+def decode(blob: bytes, codec: str) -> bytes:
+    if codec == GZIP:
+        return gzip.decompress(blob)
+    if codec == ZSTD:
+        return _zstandard().ZstdDecompressor().decompress(blob)
+    raise ValueError(f"Unknown report compression codec '{codec}'")
+
+
+def open_decoded(fileobj, codec: str):
+    """
+    Returns a file that reads a binary file holding a report encoded with
+    `codec` back decoded, decompressing on the fly. Only `fileobj` needs to
+    be closed afterwards.
+    """
+    if codec == NONE:
+        return fileobj
+    if codec == GZIP:
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if codec == ZSTD:
+        return _zstandard().ZstdDecompressor().stream_reader(fileobj, closefd=False)
+    raise ValueError(f"Unknown report compression codec '{codec}'")
+
+
+def serialize(report) -> bytes:
+    return json.dumps(report, separators=(",", ":")).encode()
+
+
+def compress(report, codec: str):
+    """
+    Serializes a report to JSON and compresses it with `codec`. Returns the
+    compressed bytes and the statistics recorded on the job: the codec, the
+    raw and compressed sizes in bytes, their ratio, and how long encoding
+    took.
+    """
+    start = time.perf_counter()
+    raw = serialize(report)
+    blob = encode(raw, codec)
+    encode_seconds = time.perf_counter() - start
+
+    return blob, {
+        "codec": codec,
+        "raw_size": len(raw),
+        "compressed_size": len(blob),
+        "ratio": round(len(raw) / len(blob), 2) if blob else None,
+        "encode_seconds": round(encode_seconds, 6),
+    }
+
+
+def decompress(blob, codec: str):
+    """Decompresses and parses a report stored by `compress`."""
+    return json.loads(decode(bytes(blob), codec))
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import CSVDataReport
+from . import uploads
+from .models import CSVDataReport, ReconciliationRecord
 
 
 def validate_is_csv(file):
@@ -35,12 +36,59 @@ class CSVDataReportSerializer(serializers.ModelSerializer):
         allow_blank=False,
         help_text="comma separated list of unique columns that should be used to identify individual records"
     )
+    presorted = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="set to true if both files are already sorted by the unique columns, to reconcile them in a single streaming pass"
+    )
+    baseline = serializers.PrimaryKeyRelatedField(
+        queryset=CSVDataReport.objects.only('id', 'unique_fields'),
+        required=False,
+        allow_null=True,
+        help_text="id of a previous job on the same feed; only the records that changed since that job are compared again"
+    )
 
     class Meta:
         model = CSVDataReport
-        fields = ['unique_fields', 'source_file', 'target_file']
+        fields = ['unique_fields', 'source_file', 'target_file', 'presorted', 'baseline']
+
+    def validate(self, attrs):
+        baseline = attrs.get('baseline')
+        if baseline is not None and baseline.unique_fields != attrs['unique_fields']:
+            raise serializers.ValidationError(
+                {"baseline": "The baseline job must use the same unique_fields."}
+            )
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Stores each upload under its sha256 digest, skipping the upload
+        entirely when a file with the same content is already stored.
+        """
+        for field in ('source_file', 'target_file'):
+            upload = validated_data[field]
+            digest = uploads.file_sha256(upload)
+            name = uploads.content_name(digest)
+            storage = CSVDataReport._meta.get_field(field).storage
+            if not storage.exists(name):
+                name = storage.save(name, upload)
+            validated_data[field] = name
+            validated_data[field.replace('_file', '_sha256')] = digest
+        return super().create(validated_data)
 
 class ListCSVDataReportSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
     class Meta:
         model = CSVDataReport
-        fields = ['id', 'created_at', 'updated_at', 'status']
\ No newline at end of file
+        fields = ['id', 'created_at', 'updated_at', 'status', 'report_summary', 'progress']
+
+    def get_progress(self, obj):
+        # The last progress of a finished job is left on it, but only means something while it runs.
+        return obj.progress if obj.status == 'processing' else None
+
+
+class ReconciliationRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReconciliationRecord
+        fields = ['id', 'category', 'key', 'data']
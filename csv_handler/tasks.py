@@ -1,7 +1,443 @@
-from celery import shared_task
-from .models import CSVDataReport
-from .csv_parser import CSVParser
-from data_reconciler.processor import DataReconciler
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from itertools import islice
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .models import CSVDataReport, ReconciliationRecord
+from . import columnar_cache, events, job_metrics, job_progress, job_status, prometheus_metrics
+from data_reconciler.external import ExternalReconciler
+from data_reconciler.incremental import IncrementalReconciler
+from data_reconciler.merge_join import SortedMergeReconciler, UnsortedInputError
+
+logger = logging.getLogger(__name__)
+
+
+def input_size(report_data):
+    return report_data.source_file.size + report_data.target_file.size
+
+
+def publish_progress(job_id, stage, **details):
+    """Tells the clients listening on a job's event stream which stage it has reached."""
+    events.publish(job_id, 'progress', {"id": str(job_id), "status": "processing", "stage": stage, **details})
+
+
+def iter_records(report_data, reconciliation_result):
+    """Yields a ReconciliationRecord for every entry of a report."""
+    index = report_data.unique_fields.split(',')
+    for category in (ReconciliationRecord.MISSING_IN_TARGET, ReconciliationRecord.MISSING_IN_SOURCE):
+        for record in reconciliation_result.get(category, []):
+            yield ReconciliationRecord(
+                report=report_data,
+                category=category,
+                key=ReconciliationRecord.format_key(record.get(field) for field in index),
+                data=record
+            )
+    for discrepancy in reconciliation_result.get(ReconciliationRecord.DISCREPANCY, []):
+        yield ReconciliationRecord(
+            report=report_data,
+            category=ReconciliationRecord.DISCREPANCY,
+            key=ReconciliationRecord.format_key(discrepancy["key"]),
+            data=discrepancy
+        )
+
+
+def bulk_insert(records):
+    batch_size = settings.RECONCILIATION_RECORD_BATCH_SIZE
+    while batch := list(islice(records, batch_size)):
+        ReconciliationRecord.objects.bulk_create(batch)
+
+
+def store_records(report_data, reconciliation_result):
+    """Bulk inserts the entries of a report into the ReconciliationRecord table."""
+    report_data.records.all().delete()
+    bulk_insert(iter_records(report_data, reconciliation_result))
+
+
+def save_report(report_data, reconciliation_result):
+    publish_progress(report_data.id, 'saving')
+    entries = sum(len(reconciliation_result.get(category, [])) for category in dict(ReconciliationRecord.CATEGORY_CHOICES))
+    with job_metrics.stage(report_data.stage_metrics, 'save', entries=entries), transaction.atomic():
+        store_records(report_data, reconciliation_result)
+        report_data.set_report(reconciliation_result)
+        report_data.reused_from = None
+        report_data.status = 'completed'
+        report_data.save(update_fields=[
+            *CSVDataReport.REPORT_FIELDS, 'fingerprints_file', 'reused_from', 'status', 'partition_count', 'updated_at'
+        ])
+    report_data.save(update_fields=['stage_metrics'])
+    job_status.notify(report_data)
+
+
+def find_reusable_job(report_data):
+    """
+    Returns the most recently completed job that reconciled uploads with the
+    same contents on the same unique fields, if there is one.
+    """
+    if not (report_data.source_sha256 and report_data.target_sha256):
+        return None
+    return CSVDataReport.objects.filter(
+        status='completed',
+        source_sha256=report_data.source_sha256,
+        target_sha256=report_data.target_sha256,
+        unique_fields=report_data.unique_fields,
+        presorted=report_data.presorted,
+    ).exclude(id=report_data.id).defer(*CSVDataReport.REPORT_FIELDS).order_by('-updated_at').first()
+
+
+def reuse_report(report_data, previous):
+    """
+    Completes a job with a copy of the report and records of a previous job
+    with the same inputs, instead of reconciling the files again.
+    """
+    publish_progress(report_data.id, 'reusing', reused_from=str(previous.id))
+    with job_metrics.stage(report_data.stage_metrics, 'reuse', reused_from=str(previous.id)), transaction.atomic():
+        report_data.records.all().delete()
+        bulk_insert(
+            ReconciliationRecord(report=report_data, category=category, key=key, data=data)
+            for category, key, data in previous.records.order_by('id').values_list('category', 'key', 'data').iterator()
+        )
+        report_data.copy_report(previous)
+        report_data.set_fingerprints(previous.get_fingerprints())
+        report_data.reused_from = previous
+        report_data.partition_count = previous.partition_count
+        report_data.status = 'completed'
+        report_data.save(update_fields=[
+            *CSVDataReport.REPORT_FIELDS, 'fingerprints_file', 'reused_from', 'status', 'partition_count', 'updated_at'
+        ])
+    report_data.save(update_fields=['stage_metrics'])
+    job_status.notify(report_data)
+
+
+def baseline_fingerprints(report_data):
+    """
+    Returns the fingerprints of a job's baseline, or None if it has none,
+    or one that did not complete or has no fingerprints.
+    """
+    baseline = report_data.baseline
+    if baseline is None:
+        return None
+    fingerprints = baseline.get_fingerprints() if baseline.status == 'completed' else None
+    if fingerprints is None:
+        logger.warning("Job %s: baseline %s has no fingerprints; reconciling in full.", report_data.id, baseline.id)
+    return fingerprints
+
+
+def load_baseline(report_data):
+    """Returns the fingerprints and report of a job's baseline, or (None, None) if it has no usable one."""
+    fingerprints = baseline_fingerprints(report_data)
+    if fingerprints is None:
+        return None, None
+    return fingerprints, report_data.baseline.get_report()
+
+
+def record_fingerprints(report_data, fingerprints, metrics, incremental):
+    """
+    Sets the fingerprints of a run, for later jobs to use it as their
+    baseline. For a run against a baseline, also records in the stage
+    `metrics` how many keys were diffed again, None if it was in full.
+    """
+    if incremental:
+        changed_keys = fingerprints.attrs["changed_keys"] if fingerprints is not None else None
+        metrics['changed_keys'] = changed_keys
+        if changed_keys is None:
+            logger.warning(
+                "Job %s: keys or columns differ from baseline %s; reconciled in full.",
+                report_data.id, report_data.baseline_id
+            )
+        else:
+            logger.info("Job %s: %d keys changed since baseline %s.", report_data.id, changed_keys, report_data.baseline_id)
+    report_data.set_fingerprints(fingerprints)
+
+
+def read_side(report_data, side, metrics, progress):
+    """
+    Yields the cleaned chunks of the job's `side` upload, recording read
+    stats in `metrics[side]` and reporting them to `progress`.
+    """
+    stats = metrics.setdefault(side, {})
+    file_field = getattr(report_data, f'{side}_file')
+    return progress.track(side, columnar_cache.read_chunks(file_field, settings.RECONCILIATION_CSV_CHUNK_SIZE, stats), stats)
+
+
+def reconcile_files(report_data, index, metrics, progress):
+    """
+    Reconciles a job's uploads in memory, incrementally against its baseline
+    if it has one, or out-of-core when they add up to at least
+    RECONCILIATION_OUT_OF_CORE_THRESHOLD bytes. Details of the run are added
+    to the `metrics` of the stage.
+    """
+    source_chunks = read_side(report_data, 'source', metrics, progress)
+    target_chunks = read_side(report_data, 'target', metrics, progress)
+    baseline, baseline_report = load_baseline(report_data)
+
+    if input_size(report_data) >= settings.RECONCILIATION_OUT_OF_CORE_THRESHOLD:
+        report_data.partition_count = settings.RECONCILIATION_PARTITION_COUNT
+        metrics['engine'] = 'out_of_core'
+        publish_progress(report_data.id, 'reconciling', engine='out_of_core')
+        reconciliation_result, fingerprints = ExternalReconciler.reconcile_incremental(
+            source_chunks,
+            target_chunks,
+            index,
+            baseline,
+            baseline_report,
+            partition_count=report_data.partition_count,
+            spill_dir=settings.RECONCILIATION_SPILL_DIR
+        )
+    else:
+        metrics['engine'] = 'in_memory' if baseline is None else 'incremental'
+        publish_progress(report_data.id, 'reconciling', engine=metrics['engine'])
+        reconciliation_result, fingerprints = IncrementalReconciler.reconcile(
+            source_chunks,
+            target_chunks,
+            index,
+            baseline,
+            baseline_report,
+            stats=metrics
+        )
+    record_fingerprints(report_data, fingerprints, metrics, incremental=baseline is not None)
+    return reconciliation_result
+
+
+def reconcile_presorted_files(report_data, index, metrics, progress):
+    """
+    Reconciles uploads that are sorted by `index` in a single streaming pass.
+    Falls back to `reconcile_files` if either file turns out to be unsorted.
+    """
+    metrics['engine'] = 'presorted'
+    publish_progress(report_data.id, 'reconciling', engine='presorted')
+    if report_data.baseline_id is not None:
+        # The merge join streams both files, so it has no per-key fingerprints to compare.
+        logger.warning(
+            "Job %s: presorted jobs are reconciled in full; baseline %s ignored.", report_data.id, report_data.baseline_id
+        )
+        metrics['changed_keys'] = None
+    try:
+        return SortedMergeReconciler.reconcile(
+            columnar_cache.chunk_rows(read_side(report_data, 'source', metrics, progress)),
+            columnar_cache.chunk_rows(read_side(report_data, 'target', metrics, progress)),
+            index
+        )
+    except UnsortedInputError as exc:
+        logger.warning("Job %s: %s; falling back to the default engine.", report_data.id, exc)
+        # Both files are read again from the start, and against the baseline if there is one.
+        for side in job_progress.SIDES:
+            metrics.pop(side, None)
+        metrics.pop('changed_keys', None)
+        progress.restart()
+        return reconcile_files(report_data, index, metrics, progress)
+
+
+def partition_directory(job_id):
+    return f'csv_datasets/{job_id}/partitions'
+
+
+def partition_file_name(job_id, name, partition_id):
+    return f'{partition_directory(job_id)}/{name}_{partition_id}.arrows'
+
+
+def delete_partition_files(job_id):
+    directory = partition_directory(job_id)
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for file_name in files:
+        default_storage.delete(f'{directory}/{file_name}')
+
+
+def dispatch_partitions(report_data, index, progress):
+    """
+    Hash-partitions both uploads on `index` into the default storage backend,
+    so that every worker can read them, and starts a chord with one
+    `reconcile_partition` task per partition and `merge_partition_results`
+    as its callback. The fingerprints of a usable baseline are partitioned
+    the same way. Partition files already stored are deleted if the chord
+    cannot be started.
+
+    Both uploads are read, cleaned and spilled by this task alone, one after
+    the other, before any partition task starts: only the diffing runs in
+    parallel, so the job takes at least as long as reading its inputs does
+    on one worker.
+    """
+    try:
+        start_partition_chord(report_data, index, progress)
+    except Exception:
+        delete_partition_files(report_data.id)
+        raise
+
+
+def start_partition_chord(report_data, index, progress):
+    partition_count = settings.RECONCILIATION_FAN_OUT_PARTITION_COUNT
+    publish_progress(report_data.id, 'partitioning', engine='fan_out')
+    columns = {}
+    # Storage name of each side's file, by partition; None for an empty side.
+    file_names = [{} for _ in range(partition_count)]
+    with (
+        job_metrics.stage(report_data.stage_metrics, 'partition', engine='fan_out', partitions=partition_count) as metrics,
+        tempfile.TemporaryDirectory(prefix="reconciliation-", dir=settings.RECONCILIATION_SPILL_DIR) as directory
+    ):
+        for name in job_progress.SIDES:
+            columns[name] = ExternalReconciler.spill(
+                read_side(report_data, name, metrics, progress), index, partition_count, directory, name
+            )
+            if columns[name] is None:
+                raise ValueError(f"{name.capitalize()} dataset cannot be empty")
+            for partition_id in range(partition_count):
+                path = ExternalReconciler.spill_path(directory, name, partition_id)
+                file_names[partition_id][name] = None
+                if os.path.exists(path):
+                    with open(path, "rb") as spill_file:
+                        # The storage renames files whose name is taken, so the saved name is passed on.
+                        file_names[partition_id][name] = default_storage.save(
+                            partition_file_name(report_data.id, name, partition_id), File(spill_file)
+                        )
+        save_baseline_partitions(report_data, index, columns, file_names, metrics)
+
+    # Saved before the chord starts, as its callback extends the stage metrics.
+    report_data.partition_count = partition_count
+    report_data.save(update_fields=['partition_count', 'stage_metrics'])
+
+    job_id = str(report_data.id)
+    publish_progress(job_id, 'dispatched', partition_count=partition_count)
+    chord(
+        reconcile_partition.s(
+            job_id, partition_id, file_names[partition_id], list(columns["source"]), list(columns["target"])
+        )
+        for partition_id in range(partition_count)
+    )(merge_partition_results.s(job_id).on_error(mark_reconciliation_failed.si(job_id)))
+
+
+def save_baseline_partitions(report_data, index, columns, file_names, metrics):
+    """
+    Splits the fingerprints of a fanned-out job's baseline into the job's
+    partitions, and adds the storage name of each to `file_names` under
+    'baseline'. Leaves `file_names` alone if the job has no usable baseline.
+    """
+    baseline = baseline_fingerprints(report_data)
+    if baseline is None:
+        return
+    if not IncrementalReconciler.baseline_matches(baseline, index, columns["source"], columns["target"]):
+        logger.warning(
+            "Job %s: keys or columns differ from baseline %s; reconciled in full.", report_data.id, report_data.baseline_id
+        )
+        metrics['changed_keys'] = None
+        return
+    partitions = ExternalReconciler.baseline_partitions(baseline, index, len(file_names))
+    for partition_id, partition in enumerate(partitions):
+        buffer = io.BytesIO()
+        IncrementalReconciler.write_fingerprints(partition, buffer)
+        file_names[partition_id]["baseline"] = default_storage.save(
+            f'{partition_directory(report_data.id)}/baseline_{partition_id}.parquet', ContentFile(buffer.getvalue())
+        )
+
+
+def read_fingerprints_file(name):
+    with default_storage.open(name, "rb") as fingerprints_file:
+        return IncrementalReconciler.read_fingerprints(fingerprints_file)
+
+
+@shared_task
+def reconcile_partition(job_id, partition_id, file_names, source_columns, target_columns):
+    """
+    Reconciles one key-hash partition of a fanned-out job, whose files are
+    stored under `file_names` by side, against the partition of the
+    baseline's fingerprints stored under 'baseline', if any. Stores the
+    partial result next to them, with the keys diffed again and the name
+    of the partition's fingerprints file. Returns its storage name.
+    """
+    report_data = CSVDataReport.objects.get(id=job_id)
+    index = report_data.unique_fields.split(',')
+
+    frames = []
+    for name, columns in (("source", source_columns), ("target", target_columns)):
+        if file_names[name] is not None:
+            with default_storage.open(file_names[name], "rb") as spill_file:
+                frames.append(ExternalReconciler.load_partition(spill_file, columns))
+        else:
+            frames.append(ExternalReconciler.load_partition(None, columns))
+
+    baseline = read_fingerprints_file(file_names["baseline"]) if "baseline" in file_names else None
+    result, fingerprints, changed_keys = IncrementalReconciler.diff_partition(
+        frames[0].set_index(index), frames[1].set_index(index), baseline
+    )
+    if changed_keys is not None:
+        result["changed_keys"] = [list(key) if isinstance(key, tuple) else [key] for key in changed_keys]
+    result["fingerprints_file"] = None
+    if fingerprints is not None:
+        buffer = io.BytesIO()
+        IncrementalReconciler.write_fingerprints(fingerprints, buffer)
+        result["fingerprints_file"] = default_storage.save(
+            f'{partition_directory(job_id)}/fingerprints_{partition_id}.parquet', ContentFile(buffer.getvalue())
+        )
+    result_name = default_storage.save(
+        f'{partition_directory(job_id)}/result_{partition_id}.json',
+        ContentFile(json.dumps(result).encode('utf-8'))
+    )
+    publish_progress(job_id, 'partition_reconciled', partition_id=partition_id)
+    return result_name
+
+
+@shared_task
+def merge_partition_results(result_names, job_id):
+    """
+    Chord callback of a fanned-out job: concatenates the partial results and
+    fingerprints of every partition into the job's report and fingerprints,
+    carrying its baseline's entries forward for the keys that did not change.
+    """
+    start = time.perf_counter()
+    outcome = 'failed'
+    report_data = CSVDataReport.objects.get(id=job_id)
+    report_data.stage_metrics = report_data.stage_metrics or []
+    try:
+        with job_metrics.stage(report_data.stage_metrics, 'merge', partitions=len(result_names)) as metrics:
+            partials = []
+            for name in result_names:
+                with default_storage.open(name, "rb") as result_file:
+                    partials.append(json.load(result_file))
+            fingerprints = [
+                read_fingerprints_file(name) if name is not None else None
+                for name in (partial.pop("fingerprints_file") for partial in partials)
+            ]
+            incremental = all("changed_keys" in partial for partial in partials)
+            changed_keys = (
+                [map(tuple, partial.pop("changed_keys")) for partial in partials] if incremental else None
+            )
+            reconciliation_result, fingerprints = IncrementalReconciler.combine_partitions(
+                partials,
+                fingerprints,
+                changed_keys,
+                report_data.unique_fields.split(','),
+                report_data.baseline.get_report() if incremental else None
+            )
+            record_fingerprints(report_data, fingerprints, metrics, incremental)
+        save_report(report_data, reconciliation_result)
+        outcome = 'completed'
+    except Exception:
+        report_data.status = 'failed'
+        report_data.save(update_fields=['status', 'stage_metrics', 'updated_at'])
+        job_status.notify(report_data)
+        raise
+    finally:
+        delete_partition_files(job_id)
+        prometheus_metrics.observe_task('merge_partition_results', outcome, start)
+
+
+@shared_task
+def mark_reconciliation_failed(job_id):
+    """Error callback of a fanned-out job."""
+    report_data = CSVDataReport.objects.defer('report', 'report_blob').get(id=job_id)
+    report_data.status = 'failed'
+    report_data.save(update_fields=['status', 'updated_at'])
+    job_status.notify(report_data)
+    delete_partition_files(job_id)
 
 
 @shared_task
@@ -14,21 +450,38 @@ def reconcile_csv_files(job_id):
     except CSVDataReport.DoesNotExist:
         return f"Report with id {job_id} not found."
 
+    start = time.perf_counter()
+    outcome = 'failed'
+    report_data.stage_metrics = []
     try:
-        source_data = CSVParser.read_csv(report_data.source_file)
-        target_data = CSVParser.read_csv(report_data.target_file)
+        previous = find_reusable_job(report_data)
+        if previous is not None:
+            reuse_report(report_data, previous)
+            outcome = 'reused'
+            return
+
         index = report_data.unique_fields.split(',')
+        progress = job_progress.ProgressReporter(report_data)
+        progress.report()
+        if not report_data.presorted and input_size(report_data) >= settings.RECONCILIATION_FAN_OUT_THRESHOLD:
+            # The job is completed by merge_partition_results.
+            dispatch_partitions(report_data, index, progress)
+            outcome = 'dispatched'
+            return
 
-        reconciliation_result = DataReconciler.reconcile(
-            source_data.get("data"),
-            target_data.get("data"),
-            index
-        )
+        with job_metrics.stage(report_data.stage_metrics, 'reconcile') as metrics:
+            if report_data.presorted:
+                reconciliation_result = reconcile_presorted_files(report_data, index, metrics, progress)
+            else:
+                reconciliation_result = reconcile_files(report_data, index, metrics, progress)
 
-        report_data.report = reconciliation_result
-        report_data.status = 'completed'
-        report_data.save(update_fields=['report', 'status'])
+        save_report(report_data, reconciliation_result)
+        outcome = 'completed'
     except Exception:
         report_data.status = 'failed'
-        report_data.save(update_fields=['report', 'status'])
+        report_data.save(update_fields=['report', 'status', 'stage_metrics', 'updated_at'])
+        job_status.notify(report_data)
         raise
+    finally:
+        prometheus_metrics.count_rows(report_data.stage_metrics)
+        prometheus_metrics.observe_task('reconcile_csv_files', outcome, start)
@@ -0,0 +1,141 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import CSVDataReport, ReconciliationRecord
+
+
+class AsyncViewTests(TestCase):
+    async def read(self, response):
+        if response.streaming:
+            return b"".join([chunk async for chunk in response.streaming_content])
+        return response.content
+
+    async def create_report_with_records(self):
+        report = await CSVDataReport.objects.acreate(status="completed", report={"diff": "found"})
+        await ReconciliationRecord.objects.abulk_create([
+            ReconciliationRecord(report=report, category=ReconciliationRecord.MISSING_IN_TARGET,
+                                 key="1", data={"id": "1", "name": "alice"}),
+            ReconciliationRecord(report=report, category=ReconciliationRecord.DISCREPANCY,
+                                 key="2", data={"key": ["2"], "differences": {"name": {"source": "bob", "target": "rob"}}}),
+        ])
+        return report
+
+    # ---------- Listing ----------
+    async def test_list_is_keyset_paginated(self):
+        reports = []
+        for day in range(1, 6):
+            report = await CSVDataReport.objects.acreate(status="completed")
+            await CSVDataReport.objects.filter(id=report.id).aupdate(created_at=datetime(2024, 1, day, tzinfo=timezone.utc))
+            reports.append(str(report.id))
+
+        response = await self.async_client.get(reverse("csv-reconciliation-async-list"), {"page_size": 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([job["id"] for job in data["results"]], reports[:1:-1])
+        self.assertIsNone(data["previous"])
+
+        response = await self.async_client.get(data["next"])
+        data = response.json()
+        self.assertEqual([job["id"] for job in data["results"]], [reports[1], reports[0]])
+        self.assertIsNone(data["next"])
+
+        response = await self.async_client.get(data["previous"])
+        data = response.json()
+        self.assertEqual([job["id"] for job in data["results"]], reports[:1:-1])
+        self.assertIsNone(data["previous"])
+        self.assertIsNotNone(data["next"])
+
+    async def test_list_filters_and_invalid_cursor(self):
+        await CSVDataReport.objects.acreate(status="failed")
+        completed = await CSVDataReport.objects.acreate(status="completed")
+        url = reverse("csv-reconciliation-async-list")
+
+        response = await self.async_client.get(url, {"status": "completed"})
+        self.assertEqual([job["id"] for job in response.json()["results"]], [str(completed.id)])
+        response = await self.async_client.get(url, {"status": "unknown"})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    # ---------- Status ----------
+    async def test_status(self):
+        report = await CSVDataReport.objects.acreate(status="processing")
+        response = await self.async_client.get(reverse("csv-reconciliation-async-status", args=[report.id]))
+        self.assertEqual(response.json()["status"], "processing")
+
+        response = await self.async_client.get(reverse("csv-reconciliation-async-status", args=["bad"]))
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get(reverse("csv-reconciliation-async-status", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, 404)
+
+    # ---------- Reports ----------
+    async def test_json_report(self):
+        report = await CSVDataReport.objects.acreate(status="processing")
+        url = reverse("csv-reconciliation-async-json", args=[report.id])
+        self.assertEqual((await self.async_client.get(url)).json(), {"status": "processing"})
+
+        await CSVDataReport.objects.filter(id=report.id).aupdate(status="completed", report={})
+        self.assertIn("message", (await self.async_client.get(url)).json())
+
+        await CSVDataReport.objects.filter(id=report.id).aupdate(report={"diff": "found"})
+        self.assertEqual((await self.async_client.get(url)).json(), {"diff": "found"})
+
+        with override_settings(RECONCILIATION_REPORT_COMPRESSION="gzip"):
+            report.set_report({"diff": "compressed"})
+        await report.asave(update_fields=CSVDataReport.REPORT_FIELDS)
+        self.assertEqual((await self.async_client.get(url)).json(), {"diff": "compressed"})
+
+        with override_settings(RECONCILIATION_REPORT_OFFLOAD_THRESHOLD=0):
+            await sync_to_async(report.set_report)({"diff": "offloaded"})
+        await report.asave(update_fields=CSVDataReport.REPORT_FIELDS)
+        response = await self.async_client.get(url)
+        self.assertEqual(json.loads(await self.read(response)), {"diff": "offloaded"})
+        await sync_to_async(report.report_file.delete)(save=False)
+
+    async def test_csv_report_matches_the_sync_endpoint(self):
+        report = await self.create_report_with_records()
+        response = await self.async_client.get(reverse("csv-reconciliation-async-csv", args=[report.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("attachment", response["Content-Disposition"])
+        content = await self.read(response)
+
+        sync_response = await self.async_client.get(reverse("csv-reconciliation-get-report-in-csv", args=[report.id]))
+        self.assertEqual(content, await self.read(sync_response))
+        self.assertIn(b"2,name,bob,rob", content)
+
+    async def test_html_report_is_cached_and_supports_conditional_get(self):
+        report = await self.create_report_with_records()
+        url = reverse("csv-reconciliation-async-html", args=[report.id])
+        response = await self.async_client.get(url)
+        content = await self.read(response)
+        self.assertIn(b"<td>alice</td>", content)
+
+        cached = await self.async_client.get(url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content, content)
+
+        not_modified = await self.async_client.get(url, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+    @patch("csv_handler.async_views.CSVReportGenerator.iter_csv")
+    async def test_csv_generation_error(self, mock_iter_csv):
+        mock_iter_csv.side_effect = Exception("CSV generation failed")
+        report = await self.create_report_with_records()
+        response = await self.async_client.get(reverse("csv-reconciliation-async-csv", args=[report.id]))
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("Error generating CSV report", response.json()["error"])
+
+    async def test_report_of_unfinished_or_unknown_job(self):
+        report = await CSVDataReport.objects.acreate(status="processing")
+        response = await self.async_client.get(reverse("csv-reconciliation-async-html", args=[report.id]))
+        self.assertEqual(response.json(), {"status": "processing"})
+        response = await self.async_client.get(reverse("csv-reconciliation-async-csv", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, 404)
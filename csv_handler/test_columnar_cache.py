@@ -0,0 +1,70 @@
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+
+from . import columnar_cache
+from .csv_parser import CSVParser
+from .models import CSVDataReport
+from .tasks import reconcile_csv_files
+
+
+class ColumnarCacheTests(TestCase):
+    def setUp(self):
+        self.report = CSVDataReport.objects.create(
+            source_file=SimpleUploadedFile(
+                "source.csv", b"id,name,joined\n1, Alice ,05/01/2024\n2,BOB,\n3,Carol\n", content_type="text/csv"
+            ),
+            target_file=SimpleUploadedFile(
+                "target.csv", b"id,name,joined\n1,alice,2024-01-05\n2,Robert,\n", content_type="text/csv"
+            ),
+            unique_fields="id",
+        )
+        self.file = self.report.source_file
+        self.name = columnar_cache.cache_name(self.file)
+
+    def tearDown(self):
+        for file_field in (self.report.source_file, self.report.target_file):
+            file_field.storage.delete(columnar_cache.cache_name(file_field))
+
+    def test_chunks_are_read_back_from_the_columnar_copy(self):
+        expected = list(CSVParser.read_csv_chunks(self.file, chunk_size=2))
+        first = list(columnar_cache.read_chunks(self.file, chunk_size=2))
+        self.assertTrue(self.file.storage.exists(self.name))
+
+        with patch("csv_handler.columnar_cache.CSVParser.read_csv_chunks") as mock_read_csv:
+            cached = list(columnar_cache.read_chunks(self.file, chunk_size=2))
+        mock_read_csv.assert_not_called()
+
+        for chunks in (first, cached):
+            self.assertEqual(len(chunks), len(expected))
+            for chunk, expected_chunk in zip(chunks, expected):
+                pd.testing.assert_frame_equal(chunk, expected_chunk)
+        self.assertIsNone(cached[1].loc[0, "joined"])
+        self.assertEqual(
+            list(columnar_cache.read_rows(self.file, chunk_size=2))[0],
+            {"id": "1", "name": "alice", "joined": "2024-01-05"}
+        )
+
+    def test_partially_read_file_is_not_cached(self):
+        chunks = columnar_cache.read_chunks(self.file, chunk_size=1)
+        next(chunks)
+        chunks.close()
+        self.assertFalse(self.file.storage.exists(self.name))
+
+    @override_settings(RECONCILIATION_COLUMNAR_CACHE=False)
+    def test_cache_can_be_disabled(self):
+        list(columnar_cache.read_chunks(self.file, chunk_size=2))
+        self.assertFalse(self.file.storage.exists(self.name))
+
+    def test_rerun_skips_csv_parsing(self):
+        reconcile_csv_files(self.report.id)
+        self.report.refresh_from_db()
+        first_report = self.report.get_report()
+
+        with patch("csv_handler.columnar_cache.CSVParser.read_csv_chunks") as mock_read_csv:
+            reconcile_csv_files(self.report.id)
+        mock_read_csv.assert_not_called()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, "completed")
+        self.assertEqual(self.report.get_report(), first_report)
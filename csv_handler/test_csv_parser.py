@@ -1,5 +1,6 @@
 from django.test import SimpleTestCase
 import io
+import pandas as pd
 from .csv_parser import CSVParser
 
 
@@ -32,3 +33,42 @@ class CSVParserTests(SimpleTestCase):
         self.assertEqual(result["data"], [
             {"Name": "alice", "Date": "2024-08-15", "Score": "90"}
         ])
+
+    def test_read_csv_chunks_yields_cleaned_batches(self):
+        csv_bytes = io.BytesIO(
+            b"Name,Date\n Alice ,01/01/2025\nBOB,2024-08-15\nCarol,x\n"
+        )
+        chunks = list(CSVParser.read_csv_chunks(csv_bytes, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(list(chunks[0].columns), ["Name", "Date"])
+        self.assertEqual(chunks[0].to_dict(orient="records"), [
+            {"Name": "alice", "Date": "2025-01-01"},
+            {"Name": "bob", "Date": "2024-08-15"},
+        ])
+        self.assertEqual(chunks[1].to_dict(orient="records"), [
+            {"Name": "carol", "Date": "x"},
+        ])
+
+    def test_read_csv_chunks_header_only_yields_nothing(self):
+        chunks = list(CSVParser.read_csv_chunks(io.BytesIO(b"Name,Date\n")))
+        self.assertEqual(chunks, [])
+
+    def test_read_csv_chunks_rejects_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(CSVParser.read_csv_chunks(io.BytesIO(b"Name\n"), chunk_size=0))
+
+    def test_clean_frame_matches_clean_data(self):
+        rows = [
+            {"Name": " Alice ", "Date": "01/02/2025", "Mixed": "2024-1-5", "Note": None},
+            {"Name": "BOB", "Date": "12/31/2024", "Mixed": " 13/01/2025 ", "Note": "X"},
+            {"Name": "Carol", "Date": "2024-02-30", "Mixed": "10-20", "Note": " Y "},
+            {"Name": "Dave", "Date": "01/02/2025", "Mixed": 42, "Note": "2024-08-15"},
+        ]
+        frame = pd.DataFrame(rows)
+        expected = CSVParser.clean_data([dict(row) for row in rows])
+        self.assertEqual(CSVParser.clean_frame(frame).to_dict(orient="records"), expected)
+
+    def test_clean_frame_does_not_modify_input(self):
+        frame = pd.DataFrame([{"Name": " Alice "}])
+        CSVParser.clean_frame(frame)
+        self.assertEqual(frame.loc[0, "Name"], " Alice ")
@@ -0,0 +1,88 @@
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import patch, MagicMock
+
+import redis
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import events
+from .models import CSVDataReport
+
+
+class PublishTests(TestCase):
+    @override_settings(RECONCILIATION_EVENTS_URL="memory://")
+    def test_publish_is_a_no_op_without_redis(self):
+        with patch("csv_handler.events._client") as mock_client:
+            events.publish(uuid.uuid4(), "status", {"status": "completed"})
+        mock_client.assert_not_called()
+
+    @override_settings(RECONCILIATION_EVENTS_URL="redis://localhost:6379/0")
+    def test_publish_never_raises(self):
+        client = MagicMock()
+        client.publish.side_effect = redis.ConnectionError("down")
+        with patch("csv_handler.events._client", return_value=client), \
+                self.assertLogs("csv_handler.events", "WARNING"):
+            events.publish(uuid.uuid4(), "status", {"status": "completed"})
+        client.publish.assert_called_once()
+
+
+class JobEventsViewTests(TestCase):
+    def url(self, job_id):
+        return reverse("csv-reconciliation-events", args=[job_id])
+
+    async def read_events(self, response):
+        return [chunk.decode() async for chunk in response.streaming_content]
+
+    async def test_invalid_uuid(self):
+        response = await self.async_client.get(self.url("not-a-uuid"))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_not_found(self):
+        response = await self.async_client.get(self.url(uuid.uuid4()))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_finished_job_sends_its_status_and_closes(self):
+        report = await CSVDataReport.objects.acreate(status="completed")
+        response = await self.async_client.get(self.url(report.id))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = await self.read_events(response)
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].startswith("event: status\ndata: "))
+        self.assertIn('"status": "completed"', chunks[0])
+
+    @override_settings(RECONCILIATION_EVENTS_URL="memory://")
+    async def test_stream_polls_the_database_without_redis(self):
+        report = await CSVDataReport.objects.acreate(status="processing")
+        with patch("csv_handler.async_views.FALLBACK_POLL_INTERVAL", 0.01):
+            response = await self.async_client.get(self.url(report.id))
+            stream = aiter(response.streaming_content)
+            self.assertIn(b'"status": "processing"', await anext(stream))
+
+            await CSVDataReport.objects.filter(id=report.id).aupdate(status="failed")
+            self.assertIn(b'"status": "failed"', await anext(stream))
+            with self.assertRaises(StopAsyncIteration):
+                await anext(stream)
+
+    async def test_published_events_are_forwarded(self):
+        report = await CSVDataReport.objects.acreate(status="processing")
+
+        @asynccontextmanager
+        async def subscription(job_id):
+            yield object()
+
+        published = [
+            None,
+            ("progress", {"status": "processing", "stage": "reconciling"}),
+            ("status", {"status": "completed"}),
+        ]
+        with patch("csv_handler.events.subscription", subscription), \
+                patch("csv_handler.events.next_event", side_effect=published):
+            response = await self.async_client.get(self.url(report.id))
+            chunks = await self.read_events(response)
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[1], ": keep-alive\n\n")
+        self.assertTrue(chunks[2].startswith("event: progress\n"))
+        self.assertIn('"stage": "reconciling"', chunks[2])
+        self.assertTrue(chunks[3].startswith("event: status\n"))
@@ -0,0 +1,74 @@
+import os
+import socket
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY, Counter, values
+
+from . import prometheus_metrics
+from .models import CSVDataReport
+from .tasks import reconcile_csv_files
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class PrometheusMetricsTests(TestCase):
+
+    def test_job_counts_by_status(self):
+        CSVDataReport.objects.create(status="processing")
+        CSVDataReport.objects.create(status="processing")
+        CSVDataReport.objects.create(status="processing", progress={"stage": "reading"})
+        CSVDataReport.objects.create(status="completed")
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn('reconciliation_jobs{status="queued"} 2.0', body)
+        self.assertIn('reconciliation_jobs{status="running"} 1.0', body)
+        self.assertIn('reconciliation_jobs{status="completed"} 1.0', body)
+        self.assertIn('reconciliation_jobs{status="failed"} 0.0', body)
+
+    def test_tasks_record_duration_and_rows(self):
+        report = CSVDataReport.objects.create(
+            source_file=SimpleUploadedFile("source.csv", b"id,name\n1,Alice\n2,Bob\n3,Carol\n"),
+            target_file=SimpleUploadedFile("target.csv", b"id,name\n1,Alice\n2,Robert\n"),
+            unique_fields="id",
+        )
+        tasks = sample("reconciliation_task_duration_seconds_count", task="reconcile_csv_files", outcome="completed")
+        source_rows = sample("reconciliation_rows_reconciled_total", side="source")
+        target_rows = sample("reconciliation_rows_reconciled_total", side="target")
+
+        reconcile_csv_files(report.id)
+
+        self.assertEqual(
+            sample("reconciliation_task_duration_seconds_count", task="reconcile_csv_files", outcome="completed"),
+            tasks + 1
+        )
+        self.assertEqual(sample("reconciliation_rows_reconciled_total", side="source"), source_rows + 3)
+        self.assertEqual(sample("reconciliation_rows_reconciled_total", side="target"), target_rows + 2)
+
+    def test_report_rendering_is_timed(self):
+        report = CSVDataReport.objects.create(status="completed", report={"missing_in_target": [{"id": "1"}]})
+        url = reverse("csv-reconciliation-get-report-in-html", args=[report.id])
+        misses = sample("reconciliation_report_render_seconds_count", format="html", cache="miss")
+        hits = sample("reconciliation_report_render_seconds_count", format="html", cache="hit")
+
+        b"".join(self.client.get(url).streaming_content)
+        self.client.get(url)
+
+        self.assertEqual(sample("reconciliation_report_render_seconds_count", format="html", cache="miss"), misses + 1)
+        self.assertEqual(sample("reconciliation_report_render_seconds_count", format="html", cache="hit"), hits + 1)
+
+    def test_metric_files_are_named_per_container(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}), \
+                patch.object(values, "ValueClass", values.MultiProcessValue(prometheus_metrics.process_identifier)):
+            Counter("reconciliation_test", "Test counter.", registry=None).inc()
+
+            self.assertEqual(os.listdir(directory), [f"counter_{socket.gethostname()}_{os.getpid()}.db"])
@@ -32,6 +32,44 @@ class CSVDataReportSerializerTests(TestCase):
         self.assertEqual(report.unique_fields, "id")
         self.assertEqual(report.status, "processing")
 
+    def test_presorted_defaults_to_false(self):
+        data = {
+            "unique_fields": "id",
+            "source_file": self.valid_csv_file,
+            "target_file": self.valid_csv_file_2,
+        }
+        serializer = CSVDataReportSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertFalse(serializer.save().presorted)
+
+    def test_presorted_option_is_saved(self):
+        data = {
+            "unique_fields": "id",
+            "source_file": self.valid_csv_file,
+            "target_file": self.valid_csv_file_2,
+            "presorted": "true",
+        }
+        serializer = CSVDataReportSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertTrue(serializer.save().presorted)
+
+    def test_baseline_must_use_the_same_unique_fields(self):
+        baseline = CSVDataReport.objects.create(unique_fields="id,name", status="completed")
+        data = {
+            "unique_fields": "id",
+            "source_file": self.valid_csv_file,
+            "target_file": self.valid_csv_file_2,
+            "baseline": str(baseline.id),
+        }
+        serializer = CSVDataReportSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("baseline", serializer.errors)
+
+        data["unique_fields"] = "id,name"
+        serializer = CSVDataReportSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().baseline, baseline)
+
     def test_invalid_extension_raises_error(self):
         """Should reject non-CSV file extensions."""
         invalid_file = SimpleUploadedFile(
@@ -78,7 +116,7 @@ class CSVDataReportSerializerTests(TestCase):
 
 class ListCSVDataReportSerializerTests(TestCase):
     def test_serializes_expected_fields(self):
-        """List serializer should return only id, created_at, updated_at, and status."""
+        """List serializer should return only id, created_at, updated_at, status, report_summary and progress."""
         report = CSVDataReport.objects.create(
             unique_fields="id",
             source_file=SimpleUploadedFile("source.csv", b"id\n1", content_type="text/csv"),
@@ -91,4 +129,6 @@ class ListCSVDataReportSerializerTests(TestCase):
         self.assertIn("created_at", data)
         self.assertIn("updated_at", data)
         self.assertIn("status", data)
-        self.assertEqual(len(data.keys()), 4)
+        self.assertIn("report_summary", data)
+        self.assertIn("progress", data)
+        self.assertEqual(len(data.keys()), 6)
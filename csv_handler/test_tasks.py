@@ -1,14 +1,27 @@
-from django.test import TestCase
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from unittest.mock import patch, MagicMock
-from .tasks import reconcile_csv_files
-from .models import CSVDataReport
+from .tasks import reconcile_csv_files, partition_directory
+from .models import CSVDataReport, ReconciliationRecord
+from . import job_status
+from .job_progress import ProgressReporter
+from data_reconciler.external import ExternalReconciler
+from data_reconciler.processor import DataReconciler
+from data_reconciliation_api.celery import app
 
 
 class ReconcileCSVFilesTaskTests(TestCase):
     def setUp(self):
         self.report = CSVDataReport.objects.create(
-            source_file="dummy_source.csv",
-            target_file="dummy_target.csv",
+            source_file=SimpleUploadedFile(
+                "dummy_source.csv", b"id,name\n1,Alice\n2,Bob\n3,Carol\n", content_type="text/csv"
+            ),
+            target_file=SimpleUploadedFile(
+                "dummy_target.csv", b"id,name\n1,Alice\n2,Robert\n4,Dave\n", content_type="text/csv"
+            ),
             unique_fields="id",
             status="pending",
             report={}
@@ -18,12 +31,12 @@ class ReconcileCSVFilesTaskTests(TestCase):
         result = reconcile_csv_files(9999)  # Non-existent ID
         self.assertEqual(result, "Report with id 9999 not found.")
 
-    @patch("csv_handler.csv_parser.CSVParser.read_csv")
+    @patch("csv_handler.csv_parser.CSVParser.read_csv_chunks")
     @patch("data_reconciler.processor.DataReconciler")
     def test_successful_reconciliation(self, mock_reconcile, mock_read_csv):
         mock_read_csv.side_effect = [
-            {"data": [{"id": "1", "name": "alice"}]},
-            {"data": [{"id": "1", "name": "alice"}]},
+            iter([pd.DataFrame([{"id": "1", "name": "alice"}])]),
+            iter([pd.DataFrame([{"id": "1", "name": "alice"}])]),
         ]
         mock_reconcile.return_value = {"discrepancies": []}
 
@@ -33,7 +46,7 @@ class ReconcileCSVFilesTaskTests(TestCase):
         self.assertEqual(self.report.status, "completed")
         self.assertEqual(self.report.report["discrepancies"], [])
 
-    @patch("csv_handler.csv_parser.CSVParser.read_csv")
+    @patch("csv_handler.csv_parser.CSVParser.read_csv_chunks")
     def test_reconciliation_failure_sets_failed_status(self, mock_read_csv):
         mock_read_csv.side_effect = Exception("Bad CSV")
 
@@ -42,3 +55,382 @@ class ReconcileCSVFilesTaskTests(TestCase):
 
         self.report.refresh_from_db()
         self.assertEqual(self.report.status, "failed")
+        self.assertEqual(job_status.get_cached_status(self.report.id)["status"], "failed")
+
+    def test_small_inputs_are_reconciled_in_memory(self):
+        with patch("csv_handler.tasks.ExternalReconciler.reconcile") as mock_external:
+            reconcile_csv_files(self.report.id)
+
+        mock_external.assert_not_called()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, "completed")
+        self.assertEqual(job_status.get_cached_status(self.report.id)["status"], "completed")
+        self.assertEqual(self.report.report["missing_in_target"], [{"id": "3", "name": "carol"}])
+
+    def test_progress_and_status_are_published(self):
+        with patch("csv_handler.events.publish") as mock_publish:
+            reconcile_csv_files(self.report.id)
+
+        published = [(call.args[1], call.args[2]) for call in mock_publish.call_args_list]
+        self.assertIn(("progress", {"id": str(self.report.id), "status": "processing",
+                                    "stage": "reconciling", "engine": "in_memory"}), published)
+        self.assertEqual(published[-1][0], "status")
+        self.assertEqual(published[-1][1]["status"], "completed")
+
+    def test_stage_metrics_are_recorded(self):
+        reconcile_csv_files(self.report.id)
+
+        self.report.refresh_from_db()
+        stages = {record["stage"]: record for record in self.report.stage_metrics}
+        self.assertEqual(list(stages), ["reconcile", "save"])
+        for record in stages.values():
+            self.assertGreaterEqual(record["wall_seconds"], 0)
+            self.assertGreaterEqual(record["cpu_seconds"], 0)
+            self.assertGreater(record["peak_rss_bytes"], 0)
+        self.assertEqual(stages["reconcile"]["engine"], "in_memory")
+        self.assertEqual(stages["reconcile"]["source"]["rows"], 3)
+        self.assertEqual(stages["reconcile"]["target"]["columns"], 2)
+        self.assertEqual(stages["save"]["entries"], 3)
+
+    @override_settings(RECONCILIATION_PROGRESS_INTERVAL=0)
+    def test_progress_is_reported_while_reading(self):
+        with patch("csv_handler.events.publish") as mock_publish:
+            reconcile_csv_files(self.report.id)
+
+        updates = [
+            call.args[2]["progress"] for call in mock_publish.call_args_list
+            if call.args[1] == "progress" and "progress" in call.args[2]
+        ]
+        self.assertEqual(updates[0]["rows"], 0)
+        self.assertIsNone(updates[0]["eta_seconds"])
+        self.assertEqual(updates[-1]["stage"], "comparing")
+        self.report.refresh_from_db()
+        progress = self.report.progress
+        self.assertEqual(progress, updates[-1])
+        self.assertEqual(progress["rows"], 6)
+        self.assertEqual(progress["source"]["bytes_read"], self.report.source_file.size)
+        self.assertEqual(progress["fraction_read"], 1.0)
+        self.assertIsNone(progress["eta_seconds"])
+        self.assertIsNotNone(progress["rows_per_second"])
+
+    def test_eta_is_only_estimated_while_reading(self):
+        progress = ProgressReporter(self.report, interval=0)
+        progress.started -= 10
+        list(progress.track("source", [], {"rows": 3}))
+        progress.stats["target"] = {"rows": 1, "bytes_read": 0}
+
+        reading = progress.snapshot()
+        self.assertEqual(reading["stage"], "reading")
+        self.assertGreater(reading["eta_seconds"], 0)
+
+        list(progress.track("target", [], {"rows": 3}))
+        comparing = progress.snapshot()
+        self.assertEqual(comparing["stage"], "comparing")
+        self.assertEqual(comparing["fraction_read"], 1.0)
+        self.assertIsNone(comparing["eta_seconds"])
+
+    @override_settings(RECONCILIATION_PROGRESS_INTERVAL=3600)
+    def test_progress_updates_are_throttled(self):
+        with patch("csv_handler.events.publish") as mock_publish:
+            reconcile_csv_files(self.report.id)
+
+        stages = [
+            call.args[2]["progress"]["stage"] for call in mock_publish.call_args_list
+            if call.args[1] == "progress" and "progress" in call.args[2]
+        ]
+        # Only the initial update and the one once both files have been read.
+        self.assertEqual(stages, ["reading", "comparing"])
+
+    @override_settings(RECONCILIATION_RECORD_BATCH_SIZE=1)
+    def test_report_entries_are_stored_as_records(self):
+        reconcile_csv_files(self.report.id)
+
+        records = ReconciliationRecord.objects.filter(report=self.report)
+        self.assertEqual(
+            sorted(records.values_list("category", "key")),
+            [("discrepancies", "2"), ("missing_in_source", "4"), ("missing_in_target", "3")]
+        )
+        discrepancy = records.get(category=ReconciliationRecord.DISCREPANCY)
+        self.assertEqual(discrepancy.data["differences"], {"name": {"source": "bob", "target": "robert"}})
+
+        # Re-running a job replaces its records instead of duplicating them.
+        reconcile_csv_files(self.report.id)
+        self.assertEqual(records.count(), 3)
+
+    def test_report_is_stored_compressed(self):
+        for codec in ("gzip", "zstd"):
+            with self.subTest(codec=codec), override_settings(RECONCILIATION_REPORT_COMPRESSION=codec):
+                reconcile_csv_files(self.report.id)
+
+                report = CSVDataReport.objects.defer(*CSVDataReport.REPORT_FIELDS).get(id=self.report.id)
+                self.assertEqual(report.get_report()["missing_in_target"], [{"id": "3", "name": "carol"}])
+                self.assertIsNone(report.report)
+                stats = report.report_compression
+                self.assertEqual(stats["codec"], codec)
+                self.assertEqual(stats["compressed_size"], len(bytes(report.report_blob)))
+                self.assertGreater(stats["raw_size"], 0)
+                self.assertGreaterEqual(stats["encode_seconds"], 0)
+                # Decoding is timed on the first read, and stored with the other statistics.
+                self.assertGreaterEqual(stats["decode_seconds"], 0)
+                report.refresh_from_db(fields=["report_compression"])
+                self.assertEqual(report.report_compression, stats)
+
+        # Switching compression off stores the report as plain JSON again.
+        reconcile_csv_files(self.report.id)
+        self.report.refresh_from_db()
+        self.assertIsNone(self.report.report_blob)
+        self.assertIsNone(self.report.report_compression)
+        self.assertEqual(self.report.get_report()["missing_in_source"], [{"id": "4", "name": "dave"}])
+
+    @override_settings(RECONCILIATION_REPORT_OFFLOAD_THRESHOLD=0)
+    def test_large_report_is_offloaded_to_storage(self):
+        reconcile_csv_files(self.report.id)
+
+        self.report.refresh_from_db()
+        first_file = self.report.report_file.name
+        self.assertTrue(default_storage.exists(first_file))
+        self.assertIsNone(self.report.report)
+        self.assertEqual(self.report.report_summary, {
+            "missing_in_target": 1, "missing_in_source": 1, "discrepancies": 1,
+            "discrepancy_columns": {"name": 1},
+        })
+        self.assertEqual(self.report.get_report()["missing_in_source"], [{"id": "4", "name": "dave"}])
+
+        # Re-running the job replaces the file once the new report is committed.
+        with self.captureOnCommitCallbacks(execute=True), override_settings(RECONCILIATION_REPORT_COMPRESSION="gzip"):
+            reconcile_csv_files(self.report.id)
+        self.report.refresh_from_db()
+        self.assertFalse(default_storage.exists(first_file))
+        self.assertTrue(self.report.report_file.name.endswith(".json.gz"))
+        self.assertNotIn("decode_seconds", self.report.report_compression)
+        self.assertEqual(self.report.get_report()["missing_in_target"], [{"id": "3", "name": "carol"}])
+        self.report.refresh_from_db(fields=["report_compression"])
+        self.assertGreaterEqual(self.report.report_compression["decode_seconds"], 0)
+        self.report.report_file.delete(save=False)
+
+    @override_settings(RECONCILIATION_OUT_OF_CORE_THRESHOLD=0, RECONCILIATION_PARTITION_COUNT=4)
+    def test_large_inputs_are_reconciled_out_of_core(self):
+        with patch(
+            "csv_handler.tasks.ExternalReconciler.reconcile_incremental", wraps=ExternalReconciler.reconcile_incremental
+        ) as mock_external:
+            reconcile_csv_files(self.report.id)
+
+        mock_external.assert_called_once()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, "completed")
+        self.assertEqual(self.report.partition_count, 4)
+        self.assertEqual(self.report.report["missing_in_target"], [{"id": "3", "name": "carol"}])
+        self.assertEqual(self.report.report["missing_in_source"], [{"id": "4", "name": "dave"}])
+        self.assertEqual(len(self.report.report["discrepancies"]), 1)
+        self.assertEqual(self.report.report["discrepancies"][0]["key"], ["2"])
+
+    def test_presorted_job_uses_merge_join(self):
+        self.report.presorted = True
+        self.report.save(update_fields=["presorted"])
+        with patch("csv_handler.tasks.reconcile_files") as mock_default:
+            reconcile_csv_files(self.report.id)
+
+        mock_default.assert_not_called()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, "completed")
+        self.assertEqual(self.report.report["missing_in_source"], [{"id": "4", "name": "dave"}])
+        self.assertEqual(self.report.report["discrepancies"][0]["key"], ["2"])
+
+    def test_presorted_job_falls_back_when_unsorted(self):
+        unsorted = CSVDataReport.objects.create(
+            source_file=SimpleUploadedFile("source.csv", b"id,name\n2,Bob\n1,Alice\n", content_type="text/csv"),
+            target_file=SimpleUploadedFile("target.csv", b"id,name\n1,Alice\n2,Robert\n", content_type="text/csv"),
+            unique_fields="id",
+            presorted=True,
+        )
+        reconcile_csv_files(unsorted.id)
+
+        unsorted.refresh_from_db()
+        self.assertEqual(unsorted.status, "completed")
+        self.assertEqual(len(unsorted.report["discrepancies"]), 1)
+        self.assertEqual(unsorted.report["discrepancies"][0]["key"], ["2"])
+
+    @override_settings(RECONCILIATION_FAN_OUT_THRESHOLD=0, RECONCILIATION_FAN_OUT_PARTITION_COUNT=4)
+    def test_large_inputs_are_fanned_out_across_partitions(self):
+        app.conf.task_always_eager = True
+        try:
+            reconcile_csv_files(self.report.id)
+        finally:
+            app.conf.task_always_eager = False
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, "completed")
+        self.assertEqual(self.report.partition_count, 4)
+        self.assertEqual(self.report.report["missing_in_target"], [{"id": "3", "name": "carol"}])
+        self.assertEqual(self.report.report["missing_in_source"], [{"id": "4", "name": "dave"}])
+        self.assertEqual(len(self.report.report["discrepancies"]), 1)
+        self.assertEqual(self.report.report["discrepancies"][0]["key"], ["2"])
+        self.assertEqual([record["stage"] for record in self.report.stage_metrics], ["partition", "merge", "save"])
+        # Partition and partial result files are cleaned up after the merge
+        self.assertEqual(default_storage.listdir(partition_directory(self.report.id))[1], [])
+
+    @override_settings(RECONCILIATION_FAN_OUT_THRESHOLD=0, RECONCILIATION_FAN_OUT_PARTITION_COUNT=4)
+    def test_partition_files_are_deleted_when_dispatch_fails(self):
+        empty_target = CSVDataReport.objects.create(
+            source_file=self.report.source_file.name,
+            target_file=SimpleUploadedFile("empty_target.csv", b"id,name\n", content_type="text/csv"),
+            unique_fields="id",
+        )
+        with self.assertRaises(ValueError):
+            reconcile_csv_files(empty_target.id)
+
+        empty_target.refresh_from_db()
+        self.assertEqual(empty_target.status, "failed")
+        self.assertEqual(default_storage.listdir(partition_directory(empty_target.id))[1], [])
+
+    @override_settings(RECONCILIATION_FAN_OUT_THRESHOLD=0, RECONCILIATION_FAN_OUT_PARTITION_COUNT=1)
+    def test_partitions_are_read_under_their_saved_names(self):
+        # A leftover file makes the storage save the partition under another name.
+        default_storage.save(f"{partition_directory(self.report.id)}/source_0.arrows", ContentFile(b"stale"))
+        app.conf.task_always_eager = True
+        try:
+            reconcile_csv_files(self.report.id)
+        finally:
+            app.conf.task_always_eager = False
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, "completed")
+        self.assertEqual(self.report.report["missing_in_target"], [{"id": "3", "name": "carol"}])
+
+    def _job_with_same_inputs(self, **fields):
+        return CSVDataReport.objects.create(
+            source_file=self.report.source_file.name,
+            target_file=self.report.target_file.name,
+            source_sha256="a" * 64,
+            target_sha256="b" * 64,
+            unique_fields="id",
+            **fields
+        )
+
+    def test_job_with_same_inputs_reuses_completed_report(self):
+        previous = self._job_with_same_inputs()
+        reconcile_csv_files(previous.id)
+        previous.refresh_from_db()
+
+        job = self._job_with_same_inputs()
+        with patch("csv_handler.tasks.reconcile_files") as mock_reconcile:
+            reconcile_csv_files(job.id)
+        mock_reconcile.assert_not_called()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.reused_from_id, previous.id)
+        self.assertEqual(job.get_report(), previous.get_report())
+        self.assertEqual(job.report_summary, previous.report_summary)
+        self.assertEqual(
+            list(job.records.order_by("id").values_list("category", "key", "data")),
+            list(previous.records.order_by("id").values_list("category", "key", "data"))
+        )
+
+        # The same inputs reconciled as presorted files are not a match
+        presorted = self._job_with_same_inputs(presorted=True)
+        reconcile_csv_files(presorted.id)
+        presorted.refresh_from_db()
+        self.assertIsNone(presorted.reused_from_id)
+
+    @override_settings(RECONCILIATION_REPORT_OFFLOAD_THRESHOLD=0)
+    def test_reused_offloaded_report_is_copied(self):
+        previous = self._job_with_same_inputs()
+        reconcile_csv_files(previous.id)
+        job = self._job_with_same_inputs()
+        reconcile_csv_files(job.id)
+
+        previous.refresh_from_db()
+        job.refresh_from_db()
+        self.assertEqual(job.reused_from_id, previous.id)
+        self.assertNotEqual(job.report_file.name, previous.report_file.name)
+        self.assertEqual(job.get_report(), previous.get_report())
+
+    def test_job_with_baseline_only_diffs_changed_keys(self):
+        reconcile_csv_files(self.report.id)
+        self.report.refresh_from_db()
+        self.assertTrue(self.report.fingerprints_file)
+
+        job = CSVDataReport.objects.create(
+            source_file=self.report.source_file.name,
+            target_file=SimpleUploadedFile(
+                "dummy_target.csv", b"id,name\n1,Alice\n2,Bob\n4,Dave\n", content_type="text/csv"
+            ),
+            unique_fields="id",
+            baseline=self.report,
+        )
+        with patch(
+            "data_reconciler.incremental.DataReconciler.reconcile_indexed",
+            wraps=DataReconciler.reconcile_indexed
+        ) as mock_reconcile:
+            reconcile_csv_files(job.id)
+
+        self.assertEqual(list(mock_reconcile.call_args.args[0].index), ["2"])
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.report["discrepancies"], [])
+        self.assertEqual(job.report["missing_in_target"], [{"id": "3", "name": "carol"}])
+        self.assertEqual(job.report["missing_in_source"], [{"id": "4", "name": "dave"}])
+        self.assertEqual(len(job.get_fingerprints()), 4)
+
+    def _job_with_baseline(self):
+        return CSVDataReport.objects.create(
+            source_file=self.report.source_file.name,
+            target_file=SimpleUploadedFile(
+                "dummy_target.csv", b"id,name\n1,Alice\n2,Bob\n4,Dave\n", content_type="text/csv"
+            ),
+            unique_fields="id",
+            baseline=self.report,
+        )
+
+    def assert_only_changed_key_was_diffed(self, job, stage):
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        changed_keys = [record["changed_keys"] for record in job.stage_metrics if record["stage"] == stage]
+        self.assertEqual(changed_keys, [1])
+        self.assertEqual(job.report["discrepancies"], [])
+        self.assertEqual(job.report["missing_in_target"], [{"id": "3", "name": "carol"}])
+        self.assertEqual(job.report["missing_in_source"], [{"id": "4", "name": "dave"}])
+        self.assertEqual(len(job.get_fingerprints()), 4)
+
+    @override_settings(RECONCILIATION_OUT_OF_CORE_THRESHOLD=0, RECONCILIATION_PARTITION_COUNT=4)
+    def test_out_of_core_jobs_are_fingerprinted_and_use_their_baseline(self):
+        reconcile_csv_files(self.report.id)
+        self.report.refresh_from_db()
+        self.assertEqual(len(self.report.get_fingerprints()), 4)
+
+        job = self._job_with_baseline()
+        reconcile_csv_files(job.id)
+
+        self.assert_only_changed_key_was_diffed(job, "reconcile")
+
+    @override_settings(RECONCILIATION_FAN_OUT_THRESHOLD=0, RECONCILIATION_FAN_OUT_PARTITION_COUNT=4)
+    def test_fanned_out_jobs_are_fingerprinted_and_use_their_baseline(self):
+        app.conf.task_always_eager = True
+        try:
+            reconcile_csv_files(self.report.id)
+            self.report.refresh_from_db()
+            self.assertEqual(len(self.report.get_fingerprints()), 4)
+
+            job = self._job_with_baseline()
+            reconcile_csv_files(job.id)
+        finally:
+            app.conf.task_always_eager = False
+
+        self.assert_only_changed_key_was_diffed(job, "merge")
+        # Baseline, fingerprints and result files of the partitions are cleaned up after the merge.
+        self.assertEqual(default_storage.listdir(partition_directory(job.id))[1], [])
+
+    def test_presorted_job_records_that_its_baseline_is_ignored(self):
+        reconcile_csv_files(self.report.id)
+        job = self._job_with_baseline()
+        job.presorted = True
+        job.save(update_fields=["presorted"])
+
+        with self.assertLogs("csv_handler.tasks", "WARNING") as logs:
+            reconcile_csv_files(job.id)
+
+        self.assertIn("baseline", logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertIsNone(job.stage_metrics[0]["changed_keys"])
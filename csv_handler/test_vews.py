@@ -1,10 +1,18 @@
+import gzip
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock import patch
 
-from .models import CSVDataReport
+from .models import CSVDataReport, ReconciliationRecord
 
 
 class CSVFileUploadViewTests(APITestCase):
@@ -91,13 +99,115 @@ class CSVFileUploadViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('status', response.data)
 
+    @patch('csv_handler.views.reconcile_csv_files.delay')
+    def test_identical_uploads_are_stored_once(self, mock_delay):
+        digest = hashlib.sha256(self.dummy_csv).hexdigest()
+        jobs = []
+        for _ in range(2):
+            response = self.client.post(
+                self.url,
+                {
+                    'source_file': SimpleUploadedFile("source.csv", self.dummy_csv, content_type="text/csv"),
+                    'target_file': SimpleUploadedFile("other_name.csv", self.dummy_csv, content_type="text/csv"),
+                    "unique_fields": "col1",
+                },
+                format='multipart'
+            )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            jobs.append(CSVDataReport.objects.get(id=response.data["job_id"]))
+
+        for job in jobs:
+            self.assertEqual(job.source_sha256, digest)
+            self.assertEqual(job.target_sha256, digest)
+            self.assertEqual(job.source_file.name, f"csv_datasets/content/{digest}.csv")
+            self.assertEqual(job.target_file.name, job.source_file.name)
+        with jobs[0].source_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.dummy_csv)
+
     # ---------- List Reports ----------
     def test_list_reports(self):
         CSVDataReport.objects.create(status="processing")
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertIsInstance(response.data["results"], list)
+        self.assertGreaterEqual(len(response.data["results"]), 1)
+
+    def _create_reports_at(self, *moments):
+        reports = []
+        for job_status, moment in moments:
+            report = CSVDataReport.objects.create(status=job_status)
+            CSVDataReport.objects.filter(id=report.id).update(created_at=moment)
+            reports.append(report)
+        return reports
+
+    def test_list_reports_is_cursor_paginated_newest_first(self):
+        from datetime import datetime, timezone
+        reports = self._create_reports_at(
+            *(("completed", datetime(2024, 1, day, tzinfo=timezone.utc)) for day in range(1, 6))
+        )
+        response = self.client.get(self.list_url, {"page_size": 3})
+        self.assertEqual(
+            [job["id"] for job in response.data["results"]],
+            [str(report.id) for report in reports[:1:-1]]
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual([job["id"] for job in response.data["results"]], [str(reports[1].id), str(reports[0].id)])
+        self.assertIsNone(response.data["next"])
+
+    def test_list_reports_filters(self):
+        from datetime import datetime, timezone
+        old, failed, recent = self._create_reports_at(
+            ("completed", datetime(2024, 1, 1, tzinfo=timezone.utc)),
+            ("failed", datetime(2024, 2, 1, tzinfo=timezone.utc)),
+            ("completed", datetime(2024, 3, 1, tzinfo=timezone.utc)),
+        )
+        response = self.client.get(self.list_url, {"status": "completed"})
+        self.assertEqual([job["id"] for job in response.data["results"]], [str(recent.id), str(old.id)])
+
+        response = self.client.get(self.list_url, {"created_after": "2024-01-15", "created_before": "2024-03-01T00:00:00Z"})
+        self.assertEqual([job["id"] for job in response.data["results"]], [str(failed.id)])
+
+    def test_list_reports_invalid_filters(self):
+        response = self.client.get(self.list_url, {"status": "unknown"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.list_url, {"created_after": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.list_url, {"created_before": "2024-13-45"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # ---------- Job Status ----------
+    def test_status_invalid_uuid(self):
+        response = self.client.get(reverse("csv-reconciliation-get-report-status", args=["not-a-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_status_not_found(self):
+        import uuid
+        response = self.client.get(reverse("csv-reconciliation-get-report-status", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_status_of_running_job_is_read_from_the_database(self):
+        report = CSVDataReport.objects.create(status="processing", report={"diff": "found"})
+        url = reverse("csv-reconciliation-get-report-status", args=[report.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"id", "created_at", "updated_at", "status", "report_summary", "progress"})
+        self.assertEqual(response.data["status"], "processing")
+
+        CSVDataReport.objects.filter(id=report.id).update(progress={"rows": 10, "eta_seconds": 4.5})
+        self.assertEqual(self.client.get(url).data["progress"], {"rows": 10, "eta_seconds": 4.5})
+
+        CSVDataReport.objects.filter(id=report.id).update(status="completed")
+        self.assertEqual(self.client.get(url).data["status"], "completed")
+        self.assertIsNone(self.client.get(url).data["progress"])
+
+    def test_status_of_finished_job_is_cached(self):
+        report = CSVDataReport.objects.create(status="completed", report={"diff": "found"})
+        url = reverse("csv-reconciliation-get-report-status", args=[report.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data["status"], "completed")
+        self.assertEqual(response.data["id"], str(report.id))
 
     # ---------- JSON Report ----------
     def test_json_invalid_uuid(self):
@@ -127,6 +237,120 @@ class CSVFileUploadViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("diff", response.data)
 
+    @override_settings(RECONCILIATION_REPORT_COMPRESSION="gzip")
+    def test_json_with_compressed_report(self):
+        report = CSVDataReport.objects.create(status="completed")
+        report.set_report({"missing_in_target": [{"id": "1"}]})
+        report.save()
+        response = self.client.get(reverse("csv-reconciliation-get-report", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"missing_in_target": [{"id": "1"}]})
+
+    # ---------- Summary ----------
+    def test_summary(self):
+        report = CSVDataReport.objects.create(status="processing")
+        url = reverse("csv-reconciliation-get-report-summary", args=[report.id])
+        self.assertEqual(self.client.get(url).data, {"status": "processing"})
+
+        report.set_report({
+            "missing_in_target": [{"id": "1"}],
+            "missing_in_source": [],
+            "discrepancies": [
+                {"key": ["2"], "differences": {"name": {"source": "a", "target": "b"}}},
+                {"key": ["3"], "differences": {"name": {"source": "c", "target": "d"},
+                                               "email": {"source": "e", "target": "f"}}},
+            ],
+        })
+        report.status = "completed"
+        report.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data, {
+            "missing_in_target": 1, "missing_in_source": 0, "discrepancies": 2,
+            "discrepancy_columns": {"name": 2, "email": 1},
+        })
+        listed = self.client.get(self.list_url).data["results"][0]
+        self.assertEqual(listed["report_summary"], response.data)
+
+    def test_summary_of_job_without_stored_summary(self):
+        report = CSVDataReport.objects.create(status="completed", report={"missing_in_source": [{"id": "4"}]})
+        response = self.client.get(reverse("csv-reconciliation-get-report-summary", args=[report.id]))
+        self.assertEqual(response.data["missing_in_source"], 1)
+        report.refresh_from_db()
+        self.assertEqual(report.report_summary, response.data)
+
+    def test_summary_invalid_or_unknown_job(self):
+        import uuid
+        response = self.client.get(reverse("csv-reconciliation-get-report-summary", args=["bad-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("csv-reconciliation-get-report-summary", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # ---------- Metrics ----------
+    def test_metrics(self):
+        report = CSVDataReport.objects.create(status="completed", stage_metrics=[
+            {"stage": "reconcile", "engine": "in_memory", "wall_seconds": 1.5, "cpu_seconds": 1.25,
+             "peak_rss_bytes": 2048},
+            {"stage": "save", "entries": 3, "wall_seconds": 0.5, "cpu_seconds": 0.25, "peak_rss_bytes": 1024},
+        ])
+        response = self.client.get(reverse("csv-reconciliation-get-job-metrics", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([stage["stage"] for stage in response.data["stages"]], ["reconcile", "save"])
+        self.assertEqual(response.data["totals"], {"wall_seconds": 2.0, "cpu_seconds": 1.5, "peak_rss_bytes": 2048})
+
+        pending = CSVDataReport.objects.create(status="pending")
+        response = self.client.get(reverse("csv-reconciliation-get-job-metrics", args=[pending.id]))
+        self.assertEqual(response.data["stages"], [])
+        self.assertIsNone(response.data["totals"]["peak_rss_bytes"])
+
+    def test_metrics_invalid_or_unknown_job(self):
+        import uuid
+        response = self.client.get(reverse("csv-reconciliation-get-job-metrics", args=["bad-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("csv-reconciliation-get-job-metrics", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(RECONCILIATION_REPORT_OFFLOAD_THRESHOLD=0)
+    def test_json_is_streamed_from_storage(self):
+        offloaded = {"missing_in_target": [{"id": "1"}]}
+        for codec in ("none", "gzip", "zstd"):
+            with self.subTest(codec=codec), override_settings(RECONCILIATION_REPORT_COMPRESSION=codec):
+                report = CSVDataReport.objects.create(status="completed")
+                report.set_report(offloaded)
+                report.save()
+                response = self.client.get(reverse("csv-reconciliation-get-report", args=[report.id]))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(json.loads(b"".join(response.streaming_content)), offloaded)
+                report.report_file.delete(save=False)
+
+    @override_settings(RECONCILIATION_REPORT_OFFLOAD_THRESHOLD=0, RECONCILIATION_REPORT_COMPRESSION="zstd")
+    async def test_json_is_streamed_from_storage_under_asgi(self):
+        offloaded = {"missing_in_target": [{"id": "1"}]}
+        report = CSVDataReport(status="completed")
+        await sync_to_async(report.set_report)(offloaded)
+        await report.asave()
+        response = await self.async_client.get(reverse("csv-reconciliation-get-report", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        self.assertEqual(json.loads(b"".join([chunk async for chunk in response.streaming_content])), offloaded)
+        await sync_to_async(report.report_file.delete)(save=False)
+
+    @override_settings(RECONCILIATION_REPORT_OFFLOAD_THRESHOLD=0, RECONCILIATION_REPORT_COMPRESSION="gzip")
+    def test_json_gzip_file_is_passed_through(self):
+        report = CSVDataReport.objects.create(status="completed")
+        report.set_report({"missing_in_target": [{"id": "1"}]})
+        report.save()
+        response = self.client.get(
+            reverse("csv-reconciliation-get-report", args=[report.id]), headers={"Accept-Encoding": "gzip, br"}
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(b"".join(response.streaming_content))),
+                         {"missing_in_target": [{"id": "1"}]})
+        report.report_file.delete(save=False)
+
     # ---------- CSV Report ----------
     def test_csv_invalid_uuid(self):
         response = self.client.get(reverse("csv-reconciliation-get-report-in-csv", args=["bad-uuid"]))
@@ -155,7 +379,30 @@ class CSVFileUploadViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.get("Content-Type"), "text/csv")
 
-    @patch("data_reconciler.report_formatter.csv_generator.CSVReportGenerator.generate_csv", side_effect=Exception("CSV error"))
+    def test_csv_is_streamed_from_stored_records(self):
+        report = CSVDataReport.objects.create(status="completed", report={})
+        ReconciliationRecord.objects.create(
+            report=report, category=ReconciliationRecord.MISSING_IN_TARGET, key="1", data={"id": "1", "name": "alice"}
+        )
+        response = self.client.get(reverse("csv-reconciliation-get-report-in-csv", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("id,name\r\n1,alice\r\n", content)
+
+    async def test_csv_is_streamed_asynchronously_under_asgi(self):
+        report = await CSVDataReport.objects.acreate(status="completed", report={})
+        await ReconciliationRecord.objects.acreate(
+            report=report, category=ReconciliationRecord.MISSING_IN_TARGET, key="1", data={"id": "1", "name": "alice"}
+        )
+        response = await self.async_client.get(reverse("csv-reconciliation-get-report-in-csv", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # An async iterator is sent chunk by chunk, where Django's ASGI handler reads a sync one to the end first.
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn("id,name\r\n1,alice\r\n", content)
+
+    @patch("data_reconciler.report_formatter.csv_generator.CSVReportGenerator.iter_csv", side_effect=Exception("CSV error"))
     def test_csv_generation_error(self, mock_gen):
         report = CSVDataReport.objects.create(status="completed", report={"diff": "found"})
         response = self.client.get(reverse("csv-reconciliation-get-report-in-csv", args=[report.id]))
@@ -190,9 +437,173 @@ class CSVFileUploadViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.get("Content-Type"), "text/html")
 
-    @patch("data_reconciler.report_formatter.html_generator.HTMLReportGenerator.generate_html", side_effect=Exception("HTML error"))
+    @override_settings(RECONCILIATION_REPORT_COMPRESSION="zstd")
+    def test_html_with_compressed_report(self):
+        report = CSVDataReport.objects.create(status="completed")
+        report.set_report({"missing_in_source": [{"id": "7", "name": "dave"}]})
+        report.save()
+        response = self.client.get(reverse("csv-reconciliation-get-report-in-html", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("<tr><td>7</td><td>dave</td></tr>", b"".join(response.streaming_content).decode())
+
+    def test_html_is_streamed_from_stored_records(self):
+        report = CSVDataReport.objects.create(status="completed", report={})
+        ReconciliationRecord.objects.create(
+            report=report, category=ReconciliationRecord.MISSING_IN_SOURCE, key="7", data={"id": "7", "name": "<b>"}
+        )
+        response = self.client.get(reverse("csv-reconciliation-get-report-in-html", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("<tr><td>7</td><td>&lt;b&gt;</td></tr>", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    async def test_html_is_streamed_asynchronously_under_asgi(self):
+        report = await CSVDataReport.objects.acreate(status="completed", report={})
+        await ReconciliationRecord.objects.acreate(
+            report=report, category=ReconciliationRecord.MISSING_IN_SOURCE, key="7", data={"id": "7", "name": "dave"}
+        )
+        response = await self.async_client.get(reverse("csv-reconciliation-get-report-in-html", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn("<tr><td>7</td><td>dave</td></tr>", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    @patch("data_reconciler.report_formatter.html_generator.HTMLReportGenerator.iter_html", side_effect=Exception("HTML error"))
     def test_html_generation_error(self, mock_gen):
         report = CSVDataReport.objects.create(status="completed", report={"diff": "found"})
         response = self.client.get(reverse("csv-reconciliation-get-report-in-html", args=[report.id]))
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
         self.assertIn("error", response.data)
+
+    # ---------- Rendered Report Cache ----------
+    def test_rendered_report_is_cached(self):
+        report = CSVDataReport.objects.create(status="completed", report={"missing_in_target": [{"id": "1"}]})
+        url = reverse("csv-reconciliation-get-report-in-csv", args=[report.id])
+        first = self.client.get(url)
+        first_content = b"".join(first.streaming_content)
+
+        with patch("data_reconciler.report_formatter.csv_generator.CSVReportGenerator.iter_csv") as mock_iter:
+            second = self.client.get(url)
+        mock_iter.assert_not_called()
+        self.assertEqual(second.content, first_content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second["Content-Disposition"], first["Content-Disposition"])
+
+    def test_conditional_requests_get_not_modified(self):
+        report = CSVDataReport.objects.create(status="completed", report={"missing_in_target": [{"id": "1"}]})
+        url = reverse("csv-reconciliation-get-report-in-html", args=[report.id])
+        response = self.client.get(url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_when_the_job_is_rerun(self):
+        report = CSVDataReport.objects.create(status="completed", report={"missing_in_target": [{"id": "1"}]})
+        url = reverse("csv-reconciliation-get-report-in-csv", args=[report.id])
+        etag = self.client.get(url)["ETag"]
+
+        report.report = {"missing_in_target": [{"id": "2"}]}
+        report.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn(b"2", b"".join(response.streaming_content))
+
+    @override_settings(RECONCILIATION_REPORT_CACHE_MAX_SIZE=10)
+    def test_large_renderings_are_not_cached(self):
+        report = CSVDataReport.objects.create(status="completed", report={"missing_in_target": [{"id": "1"}]})
+        url = reverse("csv-reconciliation-get-report-in-csv", args=[report.id])
+        b"".join(self.client.get(url).streaming_content)
+        self.assertTrue(self.client.get(url).streaming)
+
+    # ---------- Paginated Records ----------
+    def _completed_report_with_records(self):
+        report = CSVDataReport.objects.create(status="completed", report={"diff": "found"})
+        ReconciliationRecord.objects.bulk_create(
+            [ReconciliationRecord(report=report, category=ReconciliationRecord.MISSING_IN_TARGET,
+                                  key=str(i), data={"id": str(i)}) for i in range(3)]
+            + [ReconciliationRecord(report=report, category=ReconciliationRecord.DISCREPANCY,
+                                    key="9", data={"key": ["9"]})]
+        )
+        return report
+
+    def test_records_invalid_uuid(self):
+        response = self.client.get(reverse("csv-reconciliation-get-report-records", args=["not-a-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_records_not_found(self):
+        import uuid
+        response = self.client.get(reverse("csv-reconciliation-get-report-records", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_records_processing_status(self):
+        report = CSVDataReport.objects.create(status="processing")
+        response = self.client.get(reverse("csv-reconciliation-get-report-records", args=[report.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "processing")
+
+    def test_records_are_paginated(self):
+        report = self._completed_report_with_records()
+        url = reverse("csv-reconciliation-get-report-records", args=[report.id])
+        response = self.client.get(url, {"page_size": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([record["key"] for record in response.data["results"]], ["0", "1", "2"])
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([record["key"] for record in response.data["results"]], ["9"])
+        self.assertIsNone(response.data["next"])
+
+    def test_records_filtered_by_category_and_key(self):
+        report = self._completed_report_with_records()
+        url = reverse("csv-reconciliation-get-report-records", args=[report.id])
+        response = self.client.get(url, {"category": "discrepancies"})
+        self.assertEqual([record["key"] for record in response.data["results"]], ["9"])
+
+        response = self.client.get(url, {"key": "1"})
+        self.assertEqual([record["data"] for record in response.data["results"]], [{"id": "1"}])
+
+    def test_records_pages_are_read_in_index_order(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("checks an SQLite query plan")
+        report = self._completed_report_with_records()
+        url = reverse("csv-reconciliation-get-report-records", args=[report.id])
+        for params, search in (
+            ({}, "(report_id=?)"),
+            ({"key": "1"}, "(report_id=? AND key=?)"),
+            ({"category": "discrepancies"}, "(report_id=? AND category=?)"),
+        ):
+            with self.subTest(params=params), CaptureQueriesContext(connection) as queries:
+                self.client.get(url, params)
+                sql = next(query["sql"] for query in queries if 'FROM "csv_handler_reconciliationrecord"' in query["sql"])
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                    plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+                self.assertIn("USING INDEX", plan)
+                self.assertIn(search, plan)
+                # The page is read in id order from the index, not sorted.
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_records_table_only_has_the_indexes_pages_use(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, ReconciliationRecord._meta.db_table)
+        indexes = sorted(
+            constraint["columns"] for constraint in constraints.values()
+            if constraint["index"] and not constraint["primary_key"]
+        )
+        self.assertEqual(indexes, [
+            ["report_id", "category", "id"], ["report_id", "id"], ["report_id", "key", "id"],
+        ])
+
+    def test_records_invalid_category(self):
+        report = self._completed_report_with_records()
+        url = reverse("csv-reconciliation-get-report-records", args=[report.id])
+        response = self.client.get(url, {"category": "everything"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,66 @@
+"""
+Content hashing and content-addressed storage of uploaded CSV files.
+
+The upload handlers below hash every file while Django streams it in, so
+identical uploads are recognised without reading them a second time.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+def content_name(digest: str) -> str:
+    """Storage name of an upload with the given sha256 digest."""
+    return f'csv_datasets/content/{digest}.csv'
+
+
+def file_sha256(file) -> str:
+    """
+    Returns the sha256 hex digest of an uploaded file, as computed by the
+    upload handlers, or by reading it if it did not come through them.
+    """
+    digest = getattr(file, 'sha256', None)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        for chunk in file.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+    return digest
+
+
+class HashingMemoryFileUploadHandler(MemoryFileUploadHandler):
+    """MemoryFileUploadHandler that records the sha256 digest of small uploads as `file.sha256`."""
+
+    def new_file(self, *args, **kwargs):
+        # Set first: the parent raises StopFutureHandlers when it takes the file.
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # Larger uploads are passed on to, and hashed by, the next handler.
+        if self.activated:
+            self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """TemporaryFileUploadHandler that records the sha256 digest of uploads as `file.sha256`."""
+
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
@@ -1,10 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import CSVReconciliationViewSet
 
 router = DefaultRouter()
 router.register(r'', CSVReconciliationViewSet, basename='csv-reconciliation')
 
 urlpatterns = [
+    path('<str:pk>/events/', async_views.job_events, name='csv-reconciliation-events'),
+    # Native async versions of the listing, status and report endpoints.
+    path('async/', async_views.job_list, name='csv-reconciliation-async-list'),
+    path('async/<str:pk>/status/', async_views.get_status, name='csv-reconciliation-async-status'),
+    path('async/<str:pk>/json/', async_views.report_json, name='csv-reconciliation-async-json'),
+    path('async/<str:pk>/csv/', async_views.report_csv, name='csv-reconciliation-async-csv'),
+    path('async/<str:pk>/html/', async_views.report_html, name='csv-reconciliation-async-html'),
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
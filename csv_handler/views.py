@@ -1,17 +1,73 @@
+import time
 import uuid
-from django.http import HttpResponse
+from itertools import chain
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
 
-from .models import CSVDataReport
-from .serializers import CSVDataReportSerializer, ListCSVDataReportSerializer
+from drf_spectacular.utils import OpenApiParameter
+from .models import CSVDataReport, ReconciliationRecord
+from . import job_metrics, job_status, prometheus_metrics, report_cache, report_compression
+from .filters import filter_reports
+from .pagination import CSVDataReportPagination, ReconciliationRecordPagination
+from .serializers import CSVDataReportSerializer, ListCSVDataReportSerializer, ReconciliationRecordSerializer
+from data_reconciler.processor import DataReconciler
 from data_reconciler.report_formatter.html_generator import HTMLReportGenerator
 from data_reconciler.report_formatter.csv_generator import CSVReportGenerator
 from .tasks import reconcile_csv_files
 
+
+async def iterate_in_thread(chunks, thread_sensitive=False):
+    """
+    Steps a sync iterator in a worker thread one item at a time, so a
+    rendering streams with bounded memory without blocking the event loop.
+    Django's ASGI handler would otherwise read a sync iterator to the end
+    before sending any of it. Steps run on a thread pool unless
+    `thread_sensitive` is set, so concurrent downloads render in parallel;
+    the iterators must then not hold thread-bound state between steps.
+    """
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=thread_sensitive)(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def streamed(request, chunks):
+    """
+    Adapts the sync `chunks` of a sync view's StreamingHttpResponse to the
+    server. Under ASGI they are stepped by iterate_in_thread on the
+    request's thread, where the view ran and its database connection lives.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return iterate_in_thread(chunks, thread_sensitive=True)
+    return chunks
+
+
+def report_file_response(request, report):
+    """
+    Streams a report offloaded to storage as JSON, without loading it.
+    Gzip-compressed files are sent as they are to clients that accept gzip.
+    """
+    passthrough = (
+        report.report_codec == report_compression.GZIP
+        and 'gzip' in request.headers.get('Accept-Encoding', '')
+    )
+    response = StreamingHttpResponse(
+        streamed(request, report.iter_report_file(decode=not passthrough)), content_type='application/json'
+    )
+    if passthrough:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
 @extend_schema_view(
     create=extend_schema(
         summary="Submit new CSV files for reconciliation",
@@ -51,10 +107,20 @@ class CSVReconciliationViewSet(viewsets.ViewSet):
     
     @extend_schema(
         summary="get list of all submitted reconciliation jobs",
-        description="get list of all submitted reconciliation jobs, returning their status and id",
+        description="get list of all submitted reconciliation jobs, newest first, returning their status and id. "
+                    "Results are cursor paginated: follow the `next` link to get the following page.",
+        parameters=[
+            OpenApiParameter("status", str, enum=[choice for choice, _ in CSVDataReport.STATUS_CHOICES],
+                             description="only return jobs with this status"),
+            OpenApiParameter("created_after", str,
+                             description="only return jobs created at or after this ISO 8601 date or datetime"),
+            OpenApiParameter("created_before", str,
+                             description="only return jobs created before this ISO 8601 date or datetime"),
+            OpenApiParameter("page_size", int, description="number of jobs per page (max 500)"),
+        ],
         responses={
-            200: ListCSVDataReportSerializer,
-            400: {"description": "Invalid input job_id."},
+            200: ListCSVDataReportSerializer(many=True),
+            400: {"description": "Invalid filter."},
             500: {"description": "unexpected error"},
         
         },
@@ -62,9 +128,119 @@ class CSVReconciliationViewSet(viewsets.ViewSet):
     )
     @action(detail=False, methods=["get"], url_path="", url_name="list-reports")
     def get(self, request):
-        reports = CSVDataReport.objects.all()
-        serializer = ListCSVDataReportSerializer(reports, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        reports = CSVDataReport.objects.only(*job_status.STATUS_FIELDS)
+
+        reports, error = filter_reports(reports, request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = CSVDataReportPagination()
+        page = paginator.paginate_queryset(reports, request, view=self)
+        serializer = ListCSVDataReportSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+    @extend_schema(
+        summary="Gets the status of a specific job",
+        description="A cheap endpoint to poll while a job runs. It never loads the report itself.",
+        responses={
+            200: ListCSVDataReportSerializer,
+            400: {"description": "Invalid input job_id."},
+            404: {"description": "Report not found"},
+        },
+        auth=[],
+    )
+    @action(detail=True, methods=["get"], url_path="status", url_name="get-report-status")
+    def get_status(self, request, pk=None):
+        try:
+            uuid.UUID(pk)
+        except ValueError:
+            return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = job_status.get_cached_status(pk)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        try:
+            report = CSVDataReport.objects.only(*job_status.STATUS_FIELDS).get(id=pk)
+        except CSVDataReport.DoesNotExist:
+            return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if report.status in job_status.TERMINAL_STATUSES:
+            data = job_status.cache_status(report)
+        else:
+            data = ListCSVDataReportSerializer(report).data
+        return Response(data, status=status.HTTP_200_OK)
+
+
+    @extend_schema(
+        summary="Gets the summary of a specific job's report",
+        description=(
+            "Counts the entries of each section of a completed job's report, and the discrepancies "
+            "each column is involved in. Reads the counts stored with the job, not the report."
+        ),
+        responses={
+            200: {"description": "missing_in_target, missing_in_source and discrepancies counts, "
+                                 "and discrepancy_columns, a histogram of discrepancies per column."},
+            400: {"description": "Invalid input job_id."},
+            404: {"description": "Report not found"},
+        },
+        auth=[],
+    )
+    @action(detail=True, methods=["get"], url_name="get-report-summary")
+    def summary(self, request, pk=None):
+        try:
+            uuid.UUID(pk)
+        except ValueError:
+            return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = CSVDataReport.objects.only('id', 'status', 'report_summary').get(id=pk)
+        except CSVDataReport.DoesNotExist:
+            return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if report.status != 'completed':
+            return Response({"status": report.status}, status=status.HTTP_200_OK)
+
+        if report.report_summary is None:
+            # Jobs completed before summaries were stored are summarized once, on first request.
+            report.report_summary = DataReconciler.summarize(report.get_report() or {})
+            report.save(update_fields=['report_summary'])
+        return Response(report.report_summary, status=status.HTTP_200_OK)
+
+
+    @extend_schema(
+        summary="Gets the timings and memory use of a specific job",
+        description=(
+            "Lists the stages a job went through with the wall time, CPU time and peak memory "
+            "of each, and the rows and columns it read, for finding out why a job was slow."
+        ),
+        responses={
+            200: {"description": "stages, one entry per stage in the order they ran, and their totals."},
+            400: {"description": "Invalid input job_id."},
+            404: {"description": "Report not found"},
+        },
+        auth=[],
+    )
+    @action(detail=True, methods=["get"], url_name="get-job-metrics")
+    def metrics(self, request, pk=None):
+        try:
+            uuid.UUID(pk)
+        except ValueError:
+            return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = CSVDataReport.objects.only('id', 'status', 'stage_metrics').get(id=pk)
+        except CSVDataReport.DoesNotExist:
+            return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        stages = report.stage_metrics or []
+        return Response({
+            "id": str(report.id),
+            "status": report.status,
+            "stages": stages,
+            "totals": job_metrics.totals(stages),
+        }, status=status.HTTP_200_OK)
 
 
     @extend_schema(
@@ -85,16 +261,21 @@ class CSVReconciliationViewSet(viewsets.ViewSet):
             return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            report  = CSVDataReport.objects.get(id=pk)
+            report = CSVDataReport.objects.defer(*CSVDataReport.REPORT_FIELDS).get(id=pk)
         except CSVDataReport.DoesNotExist:
             return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
         
         if report.status != 'completed':
             return Response({"status": report.status}, status=status.HTTP_200_OK)
         
-        if not report.report:
+        report.load_report_fields()
+        if report.report_file:
+            return report_file_response(request, report)
+
+        report_data = report.get_report()
+        if not report_data:
             return Response({"message": "No descripancy found in both datasets."}, status=status.HTTP_200_OK)
-        return Response(report.report, status=status.HTTP_200_OK)
+        return Response(report_data, status=status.HTTP_200_OK)
     
 
     @extend_schema(
@@ -115,24 +296,18 @@ class CSVReconciliationViewSet(viewsets.ViewSet):
             return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            report = CSVDataReport.objects.get(id=pk)
+            report = CSVDataReport.objects.defer(*CSVDataReport.REPORT_FIELDS).get(id=pk)
         except CSVDataReport.DoesNotExist:
             return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
 
         if report.status != 'completed':
             return Response({"status": report.status}, status=status.HTTP_200_OK)
-        
-        if not report.report:
-            return Response({"message": "No descripancy found in both datasets."}, status=status.HTTP_200_OK)
 
-        try:
-            csv_content = CSVReportGenerator.generate_csv(report.report)
-            response = HttpResponse(csv_content, content_type='text/csv', status=status.HTTP_200_OK)
-            response['Content-Disposition'] = f'attachment; filename="reconciliation_report_{pk}.csv"'
-            return response
-        except Exception as e:
-            return Response({"error": f"Error generating CSV report: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+        return self._rendered_report(
+            request, report, 'csv', CSVReportGenerator.iter_csv, 'text/csv',
+            attachment_name=f"reconciliation_report_{pk}.csv"
+        )
+
     
     @extend_schema(
         summary="Views the reconciliation report for a specific job as an HTML page",
@@ -152,19 +327,117 @@ class CSVReconciliationViewSet(viewsets.ViewSet):
             return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            report = CSVDataReport.objects.get(id=pk)
+            report = CSVDataReport.objects.defer(*CSVDataReport.REPORT_FIELDS).get(id=pk)
         except CSVDataReport.DoesNotExist:
             return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
 
         if report.status != 'completed':
             return Response({"status": report.status}, status=status.HTTP_200_OK)
-        
-        if not report.report:
-            return Response({"message": "No descripancy found in both datasets."}, status=status.HTTP_200_OK)
+
+        return self._rendered_report(request, report, 'html', HTMLReportGenerator.iter_html, 'text/html')
+
+
+    def _rendered_report(self, request, report, report_format, iter_report, content_type, attachment_name=None):
+        """
+        Serves a completed report rendered by `iter_report`, from the report
+        cache when it has been rendered before. Responses carry an ETag and
+        Last-Modified header, and matching conditional requests get a 304.
+        """
+        not_modified = report_cache.not_modified_response(request, report, report_format)
+        if not_modified is not None:
+            return report_cache.set_validators(not_modified, report, report_format)
+
+        start = time.perf_counter()
+        rendered = report_cache.get_rendered(report, report_format)
+        if rendered is not None:
+            response = HttpResponse(rendered, content_type=content_type, status=status.HTTP_200_OK)
+            prometheus_metrics.observe_render(report_format, 'hit', start)
+        else:
+            response = self._stream_report(request, report, report_format, iter_report, content_type, start)
+            if isinstance(response, Response):
+                return response
+
+        if attachment_name:
+            response['Content-Disposition'] = f'attachment; filename="{attachment_name}"'
+        return report_cache.set_validators(response, report, report_format)
+
+
+    def _stream_report(self, request, report, report_format, iter_report, content_type, start):
+        """
+        Streams a freshly rendered report and tees it into the report cache,
+        or returns an error Response if nothing can be rendered. The render
+        time since `start` is recorded once the last chunk has been sent.
+        """
+        # Stream from the records table when possible, so the JSON report is never loaded.
+        report_data = report.stored_report()
+        if report_data is None:
+            report_data = report.get_report()
+            if not report_data:
+                return Response({"message": "No descripancy found in both datasets."}, status=status.HTTP_200_OK)
 
         try:
-            html_content = HTMLReportGenerator.generate_html(report.report)
-            return HttpResponse(html_content, status=status.HTTP_200_OK, content_type='text/html')
+            chunks = iter_report(report_data)
+            # Generate the first chunk up front so that errors can still be reported as a 500.
+            first_chunk = next(chunks, "")
         except Exception as e:
-            return Response({"error": f"Error generating HTML report: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(
+                {"error": f"Error generating {report_format.upper()} report: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return StreamingHttpResponse(
+            streamed(request, prometheus_metrics.observe_stream(
+                report_cache.tee_to_cache(report, report_format, chain([first_chunk], chunks)), report_format, start
+            )),
+            content_type=content_type,
+            status=status.HTTP_200_OK
+        )
+
+
+    @extend_schema(
+        summary="Pages through the entries of a specific job's reconciliation report",
+        description="Returns the missing records and discrepancies of a completed job one page at a time, "
+                    "using cursor pagination. Follow the `next` link to get the following page.",
+        parameters=[
+            OpenApiParameter("category", str, enum=[choice for choice, _ in ReconciliationRecord.CATEGORY_CHOICES],
+                             description="only return entries of this category"),
+            OpenApiParameter("key", str, description="only return entries for this key, e.g. `1, order_42`"),
+            OpenApiParameter("page_size", int, description="number of entries per page (max 1000)"),
+        ],
+        responses={
+            200: ReconciliationRecordSerializer(many=True),
+            400: {"description": "Invalid input job_id or category."},
+            500: {"description": "unexpected error"},
         
+        },
+        auth=[],
+    )
+    @action(detail=True, methods=["get"], url_name="get-report-records")
+    def records(self, request, pk=None):
+        try:
+            uuid.UUID(pk)
+        except ValueError:
+            return Response({"error": "job_id must be a valid UUID format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = CSVDataReport.objects.only('id', 'status').get(id=pk)
+        except CSVDataReport.DoesNotExist:
+            return Response({"error": "Report not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if report.status != 'completed':
+            return Response({"status": report.status}, status=status.HTTP_200_OK)
+
+        records = ReconciliationRecord.objects.filter(report=report)
+        category = request.query_params.get('category')
+        if category is not None:
+            if category not in dict(ReconciliationRecord.CATEGORY_CHOICES):
+                return Response({"error": f"Unknown category '{category}'"}, status=status.HTTP_400_BAD_REQUEST)
+            records = records.filter(category=category)
+        key = request.query_params.get('key')
+        if key is not None:
+            records = records.filter(key=key)
+
+        paginator = ReconciliationRecordPagination()
+        page = paginator.paginate_queryset(records, request, view=self)
+        serializer = ReconciliationRecordSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
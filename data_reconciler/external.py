@@ -0,0 +1,236 @@
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, IO, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .incremental import IncrementalReconciler
+from .processor import DataReconciler
+
+DEFAULT_PARTITION_COUNT = 64
+# Every piece of a spill file is an Arrow IPC stream preceded by its length.
+PIECE_LENGTH = struct.Struct("<Q")
+
+
+class ExternalReconciler:
+    """
+    Out-of-core reconciliation for inputs larger than memory.
+
+    Both datasets are hash-partitioned on their unique fields into spill files
+    on local disk. Matching keys always land in the same partition, so each
+    partition can be reconciled on its own and the results concatenated.
+    """
+
+    @staticmethod
+    def partition_ids(frame: pd.DataFrame, unique_fields: List[str], partition_count: int) -> np.ndarray:
+        """Returns the partition each row of `frame` belongs to."""
+        hashes = pd.util.hash_pandas_object(frame[unique_fields], index=False)
+        return (hashes % partition_count).to_numpy()
+
+    @classmethod
+    def spill(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        unique_fields: List[str],
+        partition_count: int,
+        directory: str,
+        name: str
+    ) -> Optional[pd.Index]:
+        """
+        Splits each chunk by partition and appends the pieces to
+        `<directory>/<name>_<partition>.arrows`. Returns the dataset's
+        columns, or None if `chunks` was empty.
+        """
+        columns = None
+        for chunk in chunks:
+            columns = chunk.columns
+            ids = cls.partition_ids(chunk, unique_fields, partition_count)
+            for partition_id, part in chunk.groupby(ids, sort=False):
+                with open(cls.spill_path(directory, name, partition_id), "ab") as spill_file:
+                    cls.write_piece(part, spill_file)
+        return columns
+
+    @staticmethod
+    def spill_path(directory: str, name: str, partition_id: int) -> str:
+        return os.path.join(directory, f"{name}_{partition_id}.arrows")
+
+    @staticmethod
+    def write_piece(frame: pd.DataFrame, spill_file: IO) -> None:
+        """
+        Appends a DataFrame to a spill file as an Arrow IPC stream. Unlike
+        pickle, reading it back cannot run code, so spill files can be
+        shared between workers through storage other processes write to.
+        """
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        piece = sink.getvalue()
+        spill_file.write(PIECE_LENGTH.pack(piece.size))
+        spill_file.write(piece)
+
+    @staticmethod
+    def _read_exactly(spill_file: IO, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            block = spill_file.read(size - len(data))
+            if not block:
+                raise ValueError("Spill file is truncated")
+            data += block
+        return data
+
+    @classmethod
+    def load_partition(cls, spill_file: Optional[IO], columns: pd.Index) -> pd.DataFrame:
+        """
+        Reads every piece written to a spill file back into one DataFrame.
+        A missing spill file (None) is an empty partition.
+        """
+        frames = []
+        if spill_file is not None:
+            while True:
+                header = spill_file.read(PIECE_LENGTH.size)
+                if not header:
+                    break
+                header += cls._read_exactly(spill_file, PIECE_LENGTH.size - len(header))
+                (size, ) = PIECE_LENGTH.unpack(header)
+                frames.append(pa.ipc.open_stream(cls._read_exactly(spill_file, size)).read_pandas())
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def partition_frames(
+        cls, directory: str, partition_id: int, source_columns: pd.Index, target_columns: pd.Index
+    ) -> List[pd.DataFrame]:
+        """Reads the source and target rows of one partition back from their spill files."""
+        frames = []
+        for name, columns in (("source", source_columns), ("target", target_columns)):
+            path = cls.spill_path(directory, name, partition_id)
+            if os.path.exists(path):
+                with open(path, "rb") as spill_file:
+                    frames.append(cls.load_partition(spill_file, columns))
+            else:
+                frames.append(cls.load_partition(None, columns))
+        return frames
+
+    @classmethod
+    def reconcile_partition(
+        cls,
+        directory: str,
+        partition_id: int,
+        source_columns: pd.Index,
+        target_columns: pd.Index,
+        unique_fields: List[str]
+    ) -> Dict[str, Any]:
+        frames = cls.partition_frames(directory, partition_id, source_columns, target_columns)
+        return DataReconciler.reconcile_frames(frames[0], frames[1], unique_fields)
+
+    @classmethod
+    def baseline_partitions(
+        cls, baseline: pd.DataFrame, unique_fields: List[str], partition_count: int
+    ) -> Iterator[pd.DataFrame]:
+        """Splits the fingerprints frame of a baseline run into the same key-hash partitions as its rows."""
+        ids = cls.partition_ids(baseline.index.to_frame(index=False), unique_fields, partition_count)
+        for partition_id in range(partition_count):
+            part = baseline[ids == partition_id]
+            part.attrs = dict(baseline.attrs)
+            yield part
+
+    @classmethod
+    @contextmanager
+    def spilled(
+        cls,
+        source_chunks: Iterable[pd.DataFrame],
+        target_chunks: Iterable[pd.DataFrame],
+        unique_fields: List[str],
+        partition_count: int,
+        spill_dir: Optional[str]
+    ) -> Iterator[Tuple[str, pd.Index, pd.Index]]:
+        """
+        Spills both datasets into a temporary directory under `spill_dir`,
+        removed on exit, and yields it with the columns of each dataset.
+        """
+        if unique_fields == []:
+            raise ValueError("Unique fields cannot be empty")
+        if partition_count < 1:
+            raise ValueError("partition_count must be a positive integer")
+
+        with tempfile.TemporaryDirectory(prefix="reconciliation-", dir=spill_dir) as directory:
+            source_columns = cls.spill(source_chunks, unique_fields, partition_count, directory, "source")
+            if source_columns is None:
+                raise ValueError("Source dataset cannot be empty")
+            target_columns = cls.spill(target_chunks, unique_fields, partition_count, directory, "target")
+            if target_columns is None:
+                raise ValueError("Target dataset cannot be empty")
+            yield directory, source_columns, target_columns
+
+    @classmethod
+    def reconcile(
+        cls,
+        source_chunks: Iterable[pd.DataFrame],
+        target_chunks: Iterable[pd.DataFrame],
+        unique_fields: List[str],
+        partition_count: int = DEFAULT_PARTITION_COUNT,
+        spill_dir: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Reconciles two chunked datasets one partition at a time, so peak memory
+        scales with the partition size instead of the input size. Spill files
+        are written under `spill_dir` (the system temp directory by default)
+        and removed afterwards.
+        """
+        with cls.spilled(source_chunks, target_chunks, unique_fields, partition_count, spill_dir) as spilled:
+            directory, source_columns, target_columns = spilled
+            return DataReconciler.merge_results(
+                cls.reconcile_partition(directory, partition_id, source_columns, target_columns, unique_fields)
+                for partition_id in range(partition_count)
+            )
+
+    @classmethod
+    def reconcile_incremental(
+        cls,
+        source_chunks: Iterable[pd.DataFrame],
+        target_chunks: Iterable[pd.DataFrame],
+        unique_fields: List[str],
+        baseline: Optional[pd.DataFrame] = None,
+        baseline_report: Optional[Dict[str, Any]] = None,
+        partition_count: int = DEFAULT_PARTITION_COUNT,
+        spill_dir: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+        """
+        Like `reconcile`, but also fingerprints every partition, and returns
+        the report and fingerprints frame of the run as
+        IncrementalReconciler.reconcile does, so large runs can be the
+        baseline of later ones. Given the fingerprints and report of a
+        baseline run with the same columns, each partition only diffs its
+        keys that changed since. The fingerprints of every key are held in
+        memory, as is the baseline's.
+        """
+        with cls.spilled(source_chunks, target_chunks, unique_fields, partition_count, spill_dir) as spilled:
+            directory, source_columns, target_columns = spilled
+            if baseline is not None and not IncrementalReconciler.baseline_matches(
+                baseline, unique_fields, source_columns, target_columns
+            ):
+                baseline = None
+            baselines = (
+                cls.baseline_partitions(baseline, unique_fields, partition_count)
+                if baseline is not None else [None] * partition_count
+            )
+
+            results, fingerprints, changed_keys = [], [], []
+            for partition_id, partition_baseline in enumerate(baselines):
+                source_df, target_df = cls.partition_frames(directory, partition_id, source_columns, target_columns)
+                result, partition_fingerprints, partition_changed = IncrementalReconciler.diff_partition(
+                    source_df.set_index(unique_fields), target_df.set_index(unique_fields), partition_baseline
+                )
+                results.append(result)
+                fingerprints.append(partition_fingerprints)
+                changed_keys.append(partition_changed)
+
+        return IncrementalReconciler.combine_partitions(
+            results, fingerprints, changed_keys if baseline is not None else None, unique_fields, baseline_report
+        )
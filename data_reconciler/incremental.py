@@ -0,0 +1,258 @@
+import json
+import time
+from typing import List, Dict, Any, Iterable, IO, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .processor import DataReconciler
+
+# Column names of the fingerprints of each side in a fingerprints frame.
+SIDES = ("source", "target")
+
+
+class IncrementalReconciler:
+    """
+    Reconciles a run of a feed against a previous run of the same feed.
+
+    Every run records a 64-bit fingerprint of each source and target row,
+    by key. When a baseline run's fingerprints and report are passed in,
+    only the keys whose rows changed on either side, appeared or went away
+    are diffed again; the baseline's results for every other key are
+    carried forward unchanged. The fingerprints frame is indexed by key,
+    has a nullable "source" and "target" column (null where a side has no
+    row for the key), and holds the columns of each side in `attrs`.
+    """
+
+    @staticmethod
+    def side_fingerprints(frame: pd.DataFrame) -> Optional[pd.Series]:
+        """
+        Returns the fingerprints of the rows of a frame indexed by key, or
+        None if its keys are not unique or its values cannot be hashed.
+        """
+        if not frame.index.is_unique:
+            return None
+        # Cleaned values only use None for nulls, so they need not be factorized.
+        hashes = DataReconciler.row_fingerprints(frame, categorize=False)
+        if hashes is None:
+            return None
+        return pd.Series(hashes.view(np.int64), index=frame.index, dtype="Int64")
+
+    @classmethod
+    def fingerprints(cls, source_df: pd.DataFrame, target_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Returns the fingerprints frame of two frames indexed by key, or None if either cannot be fingerprinted."""
+        sides = {}
+        for side, frame in zip(SIDES, (source_df, target_df)):
+            sides[side] = cls.side_fingerprints(frame)
+            if sides[side] is None:
+                return None
+        fingerprints = pd.concat(sides, axis=1)
+        fingerprints.attrs["columns"] = {side: list(frame.columns) for side, frame in zip(SIDES, (source_df, target_df))}
+        return fingerprints
+
+    @staticmethod
+    def compatible(fingerprints: pd.DataFrame, baseline: pd.DataFrame) -> bool:
+        """Whether two runs have the same key fields and the same columns on each side, in the same order."""
+        return (
+            list(fingerprints.index.names) == list(baseline.index.names)
+            and fingerprints.attrs.get("columns") == baseline.attrs.get("columns")
+        )
+
+    @staticmethod
+    def baseline_matches(
+        baseline: pd.DataFrame, unique_fields: List[str], source_columns: Iterable[str], target_columns: Iterable[str]
+    ) -> bool:
+        """Whether a baseline run has the given key fields and the same other columns on each side, in the same order."""
+        columns = {
+            side: [column for column in side_columns if column not in unique_fields]
+            for side, side_columns in zip(SIDES, (source_columns, target_columns))
+        }
+        return list(baseline.index.names) == list(unique_fields) and baseline.attrs.get("columns") == columns
+
+    @staticmethod
+    def changed_keys(fingerprints: pd.DataFrame, baseline: pd.DataFrame) -> pd.Index:
+        """
+        Returns the keys whose source or target row was added, removed or
+        changed since the baseline run.
+        """
+        previous = baseline.reindex(fingerprints.index)
+        unchanged = np.ones(len(fingerprints), dtype=bool)
+        for side in SIDES:
+            current, before = fingerprints[side], previous[side]
+            same = current.eq(before).fillna(False) | (current.isna() & before.isna())
+            unchanged &= same.to_numpy(dtype=bool)
+        removed = baseline.index.difference(fingerprints.index)
+        return fingerprints.index[~unchanged].append(removed)
+
+    @staticmethod
+    def carry_forward(report: Dict[str, Any], changed_keys: pd.Index, unique_fields: List[str]) -> Dict[str, Any]:
+        """Returns the entries of a baseline report whose keys are not in `changed_keys`."""
+        changed = {key if isinstance(key, tuple) else (key, ) for key in changed_keys}
+
+        def unchanged_records(records):
+            return [
+                record for record in records
+                if tuple(record.get(field) for field in unique_fields) not in changed
+            ]
+
+        return {
+            "missing_in_target": unchanged_records(report.get("missing_in_target", [])),
+            "missing_in_source": unchanged_records(report.get("missing_in_source", [])),
+            "discrepancies": [
+                discrepancy for discrepancy in report.get("discrepancies", [])
+                if tuple(discrepancy["key"]) not in changed
+            ],
+        }
+
+    @classmethod
+    def diff(
+        cls,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        baseline: Optional[pd.DataFrame] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], Optional[pd.DataFrame], Optional[pd.Index]]:
+        """
+        Diffs two frames indexed by key. Returns the result, the fingerprints
+        frame (None if the keys are not unique) and the keys diffed again
+        since a compatible `baseline`, or None if both frames were diffed in
+        full. The seconds spent fingerprinting are recorded in `stats`.
+        """
+        start = time.perf_counter()
+        fingerprints = cls.fingerprints(source_df, target_df)
+        if stats is not None:
+            stats["fingerprint_seconds"] = time.perf_counter() - start
+
+        if fingerprints is None or baseline is None or not cls.compatible(fingerprints, baseline):
+            return DataReconciler.reconcile_indexed(source_df, target_df), fingerprints, None
+        changed_keys = cls.changed_keys(fingerprints, baseline)
+        rediffed = DataReconciler.reconcile_indexed(
+            source_df.loc[source_df.index.isin(changed_keys)],
+            target_df.loc[target_df.index.isin(changed_keys)]
+        )
+        return rediffed, fingerprints, changed_keys
+
+    @classmethod
+    def diff_partition(
+        cls,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        baseline: Optional[pd.DataFrame] = None
+    ) -> Tuple[Dict[str, Any], Optional[pd.DataFrame], Optional[pd.Index]]:
+        """
+        Diffs one key-hash partition of a run, given the baseline's
+        fingerprints of the same partition (None without a baseline). Like
+        `diff`, but with a baseline the keys returned are all those whose
+        baseline entries the result replaces: every key of the partition
+        when it had to be diffed in full, e.g. because its keys are not unique.
+        """
+        result, fingerprints, changed_keys = cls.diff(source_df, target_df, baseline)
+        if baseline is not None and changed_keys is None:
+            changed_keys = source_df.index.append([target_df.index, baseline.index]).unique()
+        return result, fingerprints, changed_keys
+
+    @classmethod
+    def combine_partitions(
+        cls,
+        results: Iterable[Dict[str, Any]],
+        fingerprints: Iterable[Optional[pd.DataFrame]],
+        changed_keys: Optional[Iterable[Iterable]],
+        unique_fields: List[str],
+        baseline_report: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+        """
+        Combines the results, fingerprints and changed keys of every
+        partition of a run, as returned by `diff_partition`, into the report
+        and fingerprints frame of the whole run, as `reconcile` returns them.
+        `changed_keys` is None for a run without a baseline; otherwise the
+        baseline report's entries for every other key are carried forward.
+        The fingerprints are None if any partition could not be fingerprinted.
+        """
+        result = DataReconciler.merge_results(results)
+        fingerprints = list(fingerprints)
+        changed = None
+        if changed_keys is not None:
+            changed = [key for keys in changed_keys for key in keys]
+            result = DataReconciler.merge_results(
+                [cls.carry_forward(baseline_report or {}, changed, unique_fields), result]
+            )
+        if not fingerprints or any(part is None for part in fingerprints):
+            return result, None
+        combined = pd.concat(fingerprints)
+        combined.attrs["columns"] = fingerprints[0].attrs["columns"]
+        combined.attrs["changed_keys"] = None if changed is None else len(changed)
+        return result, combined
+
+    @classmethod
+    def reconcile(
+        cls,
+        source_chunks: Iterable[pd.DataFrame],
+        target_chunks: Iterable[pd.DataFrame],
+        unique_fields: List[str],
+        baseline: Optional[pd.DataFrame] = None,
+        baseline_report: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+        """
+        Reconciles two datasets supplied as DataFrame chunks and returns the
+        report and the fingerprints frame of the run (None if the keys are
+        not unique). Given the fingerprints and report of a compatible
+        baseline run, only the changed keys are diffed; otherwise both
+        datasets are reconciled in full. The number of keys diffed again is
+        recorded in the fingerprints' `attrs["changed_keys"]`, which is None
+        after a full reconciliation.
+
+        If a `stats` dict is passed, the seconds spent concatenating the
+        chunks (which includes reading them, as they are consumed lazily),
+        indexing the frames by key, fingerprinting them and diffing them are
+        recorded in it.
+        """
+        if stats is None:
+            stats = {}
+        start = time.perf_counter()
+        if unique_fields == []:
+            raise ValueError("Unique fields cannot be empty")
+
+        source_df = DataReconciler.concat_chunks(source_chunks)
+        if source_df.empty:
+            raise ValueError("Source dataset cannot be empty")
+        target_df = DataReconciler.concat_chunks(target_chunks)
+        if target_df.empty:
+            raise ValueError("Target dataset cannot be empty")
+        stats["concat_seconds"], start = time.perf_counter() - start, time.perf_counter()
+
+        source_df = source_df.set_index(unique_fields)
+        target_df = target_df.set_index(unique_fields)
+        stats["index_seconds"], start = time.perf_counter() - start, time.perf_counter()
+
+        result, fingerprints, changed_keys = cls.diff(source_df, target_df, baseline, stats)
+        if changed_keys is not None:
+            result = DataReconciler.merge_results(
+                [cls.carry_forward(baseline_report or {}, changed_keys, unique_fields), result]
+            )
+        if fingerprints is not None:
+            fingerprints.attrs["changed_keys"] = None if changed_keys is None else len(changed_keys)
+        stats["diff_seconds"] = time.perf_counter() - start - stats["fingerprint_seconds"]
+        return result, fingerprints
+
+    @staticmethod
+    def write_fingerprints(fingerprints: pd.DataFrame, file: IO) -> None:
+        """Writes a fingerprints frame, with its key fields and columns, to a binary file as Parquet."""
+        table = pa.Table.from_pandas(fingerprints.reset_index(), preserve_index=False)
+        metadata = {
+            "unique_fields": list(fingerprints.index.names),
+            "columns": fingerprints.attrs["columns"],
+        }
+        pq.write_table(table.replace_schema_metadata({b"reconciliation": json.dumps(metadata).encode()}), file)
+
+    @staticmethod
+    def read_fingerprints(file: IO) -> pd.DataFrame:
+        """Reads back a fingerprints frame written by `write_fingerprints`."""
+        table = pq.read_table(file)
+        metadata = json.loads(table.schema.metadata[b"reconciliation"])
+        fingerprints = table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+        fingerprints = fingerprints.set_index(metadata["unique_fields"])
+        fingerprints.attrs["columns"] = metadata["columns"]
+        return fingerprints
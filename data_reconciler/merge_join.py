@@ -0,0 +1,144 @@
+import math
+import re
+from decimal import Decimal
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+
+NUMBER_PATTERN = re.compile(r"-?\d+(\.\d+)?")
+
+
+class UnsortedInputError(ValueError):
+    """Raised when a dataset passed to SortedMergeReconciler is not sorted by its key."""
+
+
+class SortedMergeReconciler:
+    """
+    Reconciles two row streams that are already sorted by their unique fields
+    in a single forward pass (a merge-join), holding only one row per side in
+    memory at a time.
+
+    Key parts that look like numbers are ordered numerically, before all
+    others, which are ordered as strings. Exports that sort numeric keys as
+    strings ("10" before "2") are therefore not accepted as sorted. Keys
+    must be strictly increasing on each side; anything else raises
+    UnsortedInputError and the caller should fall back to DataReconciler.
+    """
+
+    @staticmethod
+    def sort_key_part(value: Any) -> Tuple:
+        if value is None:
+            return (-1,)
+        text = str(value)
+        if NUMBER_PATTERN.fullmatch(text):
+            return (0, Decimal(text), text)
+        return (1, text)
+
+    @classmethod
+    def keyed_rows(
+        cls,
+        rows: Iterable[Dict[str, Any]],
+        unique_fields: List[str],
+        name: str
+    ) -> Iterator[Tuple[Tuple, Tuple, Dict[str, Any]]]:
+        """
+        Yields (sort_key, key, row) for every row and checks that the keys
+        are strictly increasing.
+        """
+        previous = None
+        for position, row in enumerate(rows):
+            key = tuple(row[field] for field in unique_fields)
+            sort_key = tuple(cls.sort_key_part(value) for value in key)
+            if previous is not None and sort_key <= previous:
+                raise UnsortedInputError(
+                    f"{name} dataset is not sorted by {', '.join(unique_fields)} (row {position + 1})"
+                )
+            previous = sort_key
+            yield sort_key, key, row
+
+    @staticmethod
+    def _is_null(value: Any) -> bool:
+        return value is None or (isinstance(value, float) and math.isnan(value))
+
+    @classmethod
+    def get_differences(cls, source: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+        """Compares two records field by field; two null values are equal."""
+        diff = {}
+        for col, src_val in source.items():
+            tgt_val = target[col]
+            if cls._is_null(src_val) and cls._is_null(tgt_val):
+                continue
+            if src_val != tgt_val:
+                diff[col] = {"source": src_val, "target": tgt_val}
+        return diff
+
+    @staticmethod
+    def _split(row: Dict[str, Any], unique_fields: List[str]) -> Dict[str, Any]:
+        return {col: value for col, value in row.items() if col not in unique_fields}
+
+    @classmethod
+    def _missing_record(cls, row: Dict[str, Any], unique_fields: List[str]) -> Dict[str, Any]:
+        # Same column order as DataReconciler: key fields first.
+        record = {field: row[field] for field in unique_fields}
+        record.update(cls._split(row, unique_fields))
+        return record
+
+    @classmethod
+    def reconcile(
+        cls,
+        source_rows: Iterable[Dict[str, Any]],
+        target_rows: Iterable[Dict[str, Any]],
+        unique_fields: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Produces the same report as DataReconciler.reconcile for two row
+        streams sorted by `unique_fields`.
+        """
+        if unique_fields == []:
+            raise ValueError("Unique fields cannot be empty")
+
+        source = cls.keyed_rows(source_rows, unique_fields, "Source")
+        target = cls.keyed_rows(target_rows, unique_fields, "Target")
+        src = next(source, None)
+        if src is None:
+            raise ValueError("Source dataset cannot be empty")
+        tgt = next(target, None)
+        if tgt is None:
+            raise ValueError("Target dataset cannot be empty")
+
+        missing_in_target = []
+        missing_in_source = []
+        discrepancies = []
+        while src is not None and tgt is not None:
+            if src[0] < tgt[0]:
+                missing_in_target.append(cls._missing_record(src[2], unique_fields))
+                src = next(source, None)
+            elif src[0] > tgt[0]:
+                missing_in_source.append(cls._missing_record(tgt[2], unique_fields))
+                tgt = next(target, None)
+            else:
+                src_record = cls._split(src[2], unique_fields)
+                tgt_record = {col: tgt[2][col] for col in src_record}
+                diff = cls.get_differences(src_record, tgt_record)
+                if diff:
+                    discrepancies.append({
+                        "key": src[1],
+                        "original_records": {
+                            "source": src_record,
+                            "target": tgt_record
+                        },
+                        "differences": diff
+                    })
+                src = next(source, None)
+                tgt = next(target, None)
+
+        while src is not None:
+            missing_in_target.append(cls._missing_record(src[2], unique_fields))
+            src = next(source, None)
+        while tgt is not None:
+            missing_in_source.append(cls._missing_record(tgt[2], unique_fields))
+            tgt = next(target, None)
+
+        return {
+            "missing_in_target": missing_in_target,
+            "missing_in_source": missing_in_source,
+            "discrepancies": discrepancies
+        }
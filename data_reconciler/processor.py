@@ -1,37 +1,130 @@
-from typing import List, Dict, Any
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
 import pandas as pd
 
+FINGERPRINT_PRIME = np.uint64(1099511628211)
+# Object columns mixing these types may hash distinct values alike (e.g. 1 and "1").
+UNHASHABLE_DTYPES = ("mixed", "mixed-integer")
+
 class DataReconciler:
     @staticmethod
-    def get_discrepancies(source_df: pd.DataFrame, target_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def row_fingerprints(frame: pd.DataFrame, categorize: bool = True) -> Optional[np.ndarray]:
+        """
+        Computes a 64-bit hash of every row's values (index excluded). Returns
+        None when a column mixes value types, as equal hashes would not
+        reliably mean equal values. `categorize=False` hashes mostly distinct
+        values several times faster, but None and NaN then hash differently.
+        """
+        fingerprints = np.zeros(len(frame), dtype=np.uint64)
+        for position in range(frame.shape[1]):
+            column = frame.iloc[:, position]
+            if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) in UNHASHABLE_DTYPES:
+                return None
+            # Values are factorized before hashing, so every null (None, NaN,
+            # NaT) gets the same hash, distinct from any string's.
+            hashes = pd.util.hash_array(column.to_numpy(), categorize=categorize)
+            fingerprints = fingerprints * FINGERPRINT_PRIME + hashes
+        return fingerprints
+
+    @classmethod
+    def common_positions(cls, source_df: pd.DataFrame, target_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the positions, in each frame, of the rows whose index appears
+        in both frames, paired up and in source order.
+        """
+        source_index, target_index = source_df.index, target_df.index
+        if not (source_index.is_unique and target_index.is_unique):
+            # Duplicate keys: the n-th row with a key on one side is paired
+            # with the n-th row with that key on the other, in file order.
+            # Rows left over on the side with more of them are unpaired.
+            source_index = cls.occurrence_index(source_index)
+            target_index = cls.occurrence_index(target_index)
+        indexer = target_index.get_indexer(source_index)
+        source_positions = np.flatnonzero(indexer >= 0)
+        return source_positions, indexer[source_positions]
+
+    @staticmethod
+    def occurrence_index(index: pd.Index) -> pd.MultiIndex:
+        """
+        Returns `index` with one more level numbering the occurrences of each
+        label, which makes it unique.
+        """
+        levels = list(range(index.nlevels))
+        occurrences = pd.Series(0, index=index).groupby(level=levels, sort=False, dropna=False).cumcount()
+        return pd.MultiIndex.from_arrays(
+            [index.get_level_values(level) for level in levels] + [occurrences.to_numpy()]
+        )
+
+    @classmethod
+    def get_discrepancies(
+        cls,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        positions: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> List[Dict[str, Any]]:
         """
             Compute list of fields in records from two similar datasets 
             with discrepancies 
+
+            Both frames are aligned on their common index once (`positions`,
+            as returned by `common_positions`, may be passed in if already
+            known). Rows whose fingerprints match are skipped; the rest are
+            compared column-wise, two null values being considered equal.
+            Python dicts are only built for the rows that actually differ.
         """
-        
+
+        source_positions, target_positions = positions or cls.common_positions(source_df, target_df)
+        if len(source_positions) == 0:
+            return []
+
+        columns = source_df.columns
+        src = source_df.iloc[source_positions]
+        tgt = target_df.iloc[target_positions]
+        if not tgt.columns.equals(columns):
+            tgt = tgt[columns]
+        # Compare the aligned rows by position; keys are only looked up for
+        # the rows that differ.
+        keys = src.index
+        src.index = tgt.index = pd.RangeIndex(len(keys))
+
+        src_fingerprints = cls.row_fingerprints(src)
+        tgt_fingerprints = cls.row_fingerprints(tgt)
+        if src_fingerprints is not None and tgt_fingerprints is not None:
+            candidates = np.flatnonzero(src_fingerprints != tgt_fingerprints)
+            if len(candidates) == 0:
+                return []
+            keys = keys[candidates]
+            src = src.iloc[candidates].reset_index(drop=True)
+            tgt = tgt.iloc[candidates].reset_index(drop=True)
+
+        diff_mask = src.ne(tgt) & ~(src.isna() & tgt.isna())
+        changed = diff_mask.any(axis=1).to_numpy()
+        if not changed.any():
+            return []
+
         discrepancies = []
-        common_idx = source_df.index.intersection(target_df.index)
-        for idx in common_idx:
-            src_row = source_df.loc[idx]
-            tgt_row = target_df.loc[idx]
-            diff = {}
-            for col in source_df.columns:
-                src_val = src_row[col]
-                tgt_val = tgt_row[col]
-                if pd.isnull(src_val) and pd.isnull(tgt_val):
-                    continue
-                if src_val != tgt_val:
-                    diff[col] = {"source": src_val, "target": tgt_val}
-            if diff:
-                discrepancies.append({
-                    "key": idx if isinstance(idx, tuple) else (idx, ),
-                    "original_records": {
-                        "source": source_df.loc[idx].to_dict(),
-                        "target": target_df.loc[idx].to_dict()
-                    },
-                    "differences": diff
-
-                })
+        for idx, src_record, tgt_record, row_mask in zip(
+            keys[changed],
+            src.loc[changed].to_dict(orient='records'),
+            tgt.loc[changed].to_dict(orient='records'),
+            diff_mask.to_numpy()[changed],
+        ):
+            diff = {
+                col: {"source": src_record[col], "target": tgt_record[col]}
+                for col, differs in zip(columns, row_mask) if differs
+            }
+            discrepancies.append({
+                "key": idx if isinstance(idx, tuple) else (idx, ),
+                "original_records": {
+                    "source": src_record,
+                    "target": tgt_record
+                },
+                "differences": diff
+
+            })
         return discrepancies
     
     @classmethod
@@ -58,28 +151,116 @@ class DataReconciler:
         # Convert data to pandas' dataframe and set index for easy comparison
         source_df = pd.DataFrame(source_data)
         target_df = pd.DataFrame(target_data)
-        source_df.set_index(unique_fields, inplace=True)
-        target_df.set_index(unique_fields, inplace=True)
+        return cls.reconcile_frames(source_df, target_df, unique_fields)
+
+    @classmethod
+    def reconcile_chunks(
+        cls,
+        source_chunks: Iterable[pd.DataFrame],
+        target_chunks: Iterable[pd.DataFrame],
+        unique_fields: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Reconciles two datasets supplied as iterables of DataFrame chunks, such
+        as the ones yielded by `CSVParser.read_csv_chunks`. Each dataset is
+        still concatenated into one DataFrame, so peak memory grows with the
+        file size; what chunking saves over `reconcile` is the dict built for
+        every row. Use ExternalReconciler for inputs larger than memory.
+        """
+        if unique_fields == []:
+            raise ValueError("Unique fields cannot be empty")
+
+        source_df = cls.concat_chunks(source_chunks)
+        if source_df.empty:
+            raise ValueError("Source dataset cannot be empty")
+        target_df = cls.concat_chunks(target_chunks)
+        if target_df.empty:
+            raise ValueError("Target dataset cannot be empty")
+
+        return cls.reconcile_frames(source_df, target_df, unique_fields)
+
+    @staticmethod
+    def merge_results(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Concatenates the results of reconciling disjoint subsets of the keys
+        (e.g. hash partitions) into a single report.
+        """
+        merged = {
+            "missing_in_target": [],
+            "missing_in_source": [],
+            "discrepancies": []
+        }
+        for result in results:
+            for section, records in merged.items():
+                records.extend(result.get(section, []))
+        return merged
+
+    @staticmethod
+    def summarize(report: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Counts the entries of each section of a report, and how many
+        discrepancies each column is involved in, most frequent first.
+        The field names of all discrepancies are chained together and counted
+        with a Counter in a single pass, and reports from every engine are
+        summarized the same way.
+        """
+        discrepancies = report.get("discrepancies", [])
+        histogram = Counter(chain.from_iterable(map(itemgetter("differences"), discrepancies)))
+        return {
+            "missing_in_target": len(report.get("missing_in_target", [])),
+            "missing_in_source": len(report.get("missing_in_source", [])),
+            "discrepancies": len(discrepancies),
+            "discrepancy_columns": dict(histogram.most_common()),
+        }
+
+    @staticmethod
+    def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenates DataFrame chunks into a single DataFrame. All chunks are
+        held until they are concatenated, but the copy only duplicates their
+        column arrays, not the cleaned values those arrays point to.
+        """
+        frames = list(chunks)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def reconcile_frames(
+        cls,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        unique_fields: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Reconciles two DataFrames using `unique_fields` as the record key.
+        """
+        return cls.reconcile_indexed(source_df.set_index(unique_fields), target_df.set_index(unique_fields))
 
-        if source_df.equals(target_df):
+    @classmethod
+    def reconcile_indexed(cls, source_df: pd.DataFrame, target_df: pd.DataFrame) -> Dict[str, Any]:
+        """Reconciles two DataFrames already indexed by the record key."""
+        positions = cls.common_positions(source_df, target_df)
+        in_target = np.zeros(len(source_df), dtype=bool)
+        in_target[positions[0]] = True
+        in_source = np.zeros(len(target_df), dtype=bool)
+        in_source[positions[1]] = True
+        discrepancies = cls.get_discrepancies(source_df, target_df, positions)
+
+        # Identical datasets, in any row order, are detected from the row
+        # fingerprints alone.
+        if not discrepancies and in_target.all() and in_source.all():
             return {
                 "missing_in_source": [],
                 "missing_in_target": [],
                 "discrepancies": []
             }
 
-        missing_in_target = source_df.loc[
-            ~source_df.index.isin(target_df.index)
-        ].reset_index().to_dict(orient='records')
-
-        missing_in_source = target_df.loc[
-            ~target_df.index.isin(source_df.index)
-        ].reset_index().to_dict(orient='records')
-
-        discrepancies = cls.get_discrepancies(source_df, target_df)
+        missing_in_target = source_df.loc[~in_target].reset_index().to_dict(orient='records')
+        missing_in_source = target_df.loc[~in_source].reset_index().to_dict(orient='records')
 
         return {
             "missing_in_target": missing_in_target,
             "missing_in_source": missing_in_source,
             "discrepancies": discrepancies
-        }
\ No newline at end of file
+        }
@@ -1,79 +1,109 @@
 import csv
-import io
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+
+from .streaming import DEFAULT_STREAM_CHUNK_SIZE, buffered
+
+
+class _Echo:
+    """A file-like object whose write() hands the written text straight back."""
+
+    def write(self, value: str) -> str:
+        return value
 
 
 class CSVReportGenerator:
     """
     Generates a CSV report from a reconciliation result JSON object.
+
+    The `iter_*` methods yield the report row by row, so a report can be
+    streamed without ever holding the full CSV text in memory. Sections may
+    be any iterable of records, not only lists.
     """
 
     @staticmethod
-    def _generate_csv_from_records(records: List[Dict[str, Any]], title: str) -> str:
-        """Generates a CSV formatted string for a list of records with a section title."""
-        output = io.StringIO()
-        writer = csv.writer(output)
+    def _iter_csv_from_records(records: Iterable[Dict[str, Any]], title: str) -> Iterator[str]:
+        """Yields the CSV lines for a list of records with a section title."""
+        writer = csv.writer(_Echo())
 
         # Section title
-        writer.writerow([title])
+        yield writer.writerow([title])
 
-        if not records:
-            writer.writerow(["None"])
-        else:
-            headers = list(records[0].keys())
-            writer.writerow(headers)
-            for record in records:
-                writer.writerow([record.get(header, "") for header in headers])
+        headers = None
+        for record in records:
+            if headers is None:
+                headers = list(record.keys())
+                yield writer.writerow(headers)
+            yield writer.writerow([record.get(header, "") for header in headers])
+        if headers is None:
+            yield writer.writerow(["None"])
 
-        writer.writerow([])  # Add blank line for separation
-        return output.getvalue()
+        yield writer.writerow([])  # Add blank line for separation
 
     @staticmethod
-    def _generate_discrepancies_csv(discrepancies: List[Dict[str, Any]]) -> str:
-        """Generates a CSV formatted string for discrepancies."""
-        output = io.StringIO()
-        writer = csv.writer(output)
+    def _iter_discrepancies_csv(discrepancies: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Yields the CSV lines for discrepancies."""
+        writer = csv.writer(_Echo())
 
         # Section title
-        writer.writerow(["Discrepancies"])
+        yield writer.writerow(["Discrepancies"])
 
-        if not discrepancies:
-            writer.writerow(["None"])
-        else:
-            headers = ["Key", "Field", "Source Value", "Target Value"]
-            writer.writerow(headers)
+        empty = True
+        for item in discrepancies:
+            if empty:
+                empty = False
+                yield writer.writerow(["Key", "Field", "Source Value", "Target Value"])
 
-            for item in discrepancies:
-                key = ", ".join(map(str, item.get("key", [])))
-                differences = item.get("differences", {})
+            key = ", ".join(map(str, item.get("key", [])))
+            differences = item.get("differences", {})
 
-                for field, values in differences.items():
-                    source_val = values.get("source", "")
-                    target_val = values.get("target", "")
-                    writer.writerow([key, field, source_val, target_val])
+            for field, values in differences.items():
+                source_val = values.get("source", "")
+                target_val = values.get("target", "")
+                yield writer.writerow([key, field, source_val, target_val])
+        if empty:
+            yield writer.writerow(["None"])
 
-        writer.writerow([])  # Add blank line for separation
-        return output.getvalue()
+        yield writer.writerow([])  # Add blank line for separation
 
     @classmethod
-    def generate_csv(cls, report_data: Dict[str, Any]) -> str:
+    def iter_csv(
+        cls,
+        report_data: Dict[str, Iterable[Dict[str, Any]]],
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+    ) -> Iterator[str]:
         """
-        Generates a full CSV report from the reconciliation data.
+        Yields the full CSV report in chunks of roughly `chunk_size`
+        characters, ready to be passed to a StreamingHttpResponse.
         """
-        discrepancies_csv = cls._generate_discrepancies_csv(
+        return buffered(cls._iter_lines(report_data), chunk_size)
+
+    @classmethod
+    def _iter_lines(cls, report_data: Dict[str, Iterable[Dict[str, Any]]]) -> Iterator[str]:
+        yield from cls._iter_discrepancies_csv(
             report_data.get("discrepancies", [])
         )
-
-        missing_in_target_csv = cls._generate_csv_from_records(
+        yield from cls._iter_csv_from_records(
             report_data.get("missing_in_target", []),
             "Missing in Target (Present in Source)"
         )
-
-        missing_in_source_csv = cls._generate_csv_from_records(
+        yield from cls._iter_csv_from_records(
             report_data.get("missing_in_source", []),
             "Missing in Source (Present in Target)"
         )
 
-        # Combine all sections
-        full_csv = f"{discrepancies_csv}{missing_in_target_csv}{missing_in_source_csv}"
-        return full_csv
+    @classmethod
+    def _generate_csv_from_records(cls, records: List[Dict[str, Any]], title: str) -> str:
+        """Generates a CSV formatted string for a list of records with a section title."""
+        return "".join(cls._iter_csv_from_records(records, title))
+
+    @classmethod
+    def _generate_discrepancies_csv(cls, discrepancies: List[Dict[str, Any]]) -> str:
+        """Generates a CSV formatted string for discrepancies."""
+        return "".join(cls._iter_discrepancies_csv(discrepancies))
+
+    @classmethod
+    def generate_csv(cls, report_data: Dict[str, Any]) -> str:
+        """
+        Generates a full CSV report from the reconciliation data.
+        """
+        return "".join(cls._iter_lines(report_data))
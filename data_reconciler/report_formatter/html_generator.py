@@ -1,54 +1,83 @@
 import html
-from typing import List, Dict, Any
+from itertools import chain
+from typing import List, Dict, Any, Iterable, Iterator
+
+from .streaming import DEFAULT_STREAM_CHUNK_SIZE, buffered
+
+STYLE = """
+        <style>
+            body { font-family: sans-serif; margin: 2em; }
+            table { border-collapse: collapse; margin-bottom: 20px; width: 100%; }
+            th, td { border: 1px solid #dddddd; text-align: left; padding: 8px; }
+            th { background-color: #f2f2f2; }
+            h1, h2 { color: #333; }
+        </style>
+        """
+
 
 class HTMLReportGenerator:
     """
     Generates an HTML report from a reconciliation result JSON object.
+
+    The `_iter_*` methods yield the page piece by piece and every piece is
+    assembled with joins, so rendering is linear in the report size and the
+    page can be streamed. Sections may be any iterable of records.
     """
 
     @staticmethod
-    def _generate_table_from_records(records: List[Dict[str, Any]], title: str) -> str:
-        """Generates an HTML table for a list of records (e.g., missing items)."""
-       
-        if not records:
-            return f"<h2>{html.escape(title)}</h2><p>None</p>"
+    def _iter_table_from_records(records: Iterable[Dict[str, Any]], title: str) -> Iterator[str]:
+        """Yields an HTML table for a list of records (e.g., missing items)."""
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            yield f"<h2>{html.escape(title)}</h2><p>None</p>"
+            return
 
-        headers = records[0].keys()
+        headers = first.keys()
         header_html = "".join(f"<th>{html.escape(str(header))}</th>" for header in headers)
 
-        rows_html = ""
-        for record in records:
-            row_data = "".join(f"<td>{html.escape(str(record.get(header, '')))}</td>" for header in headers)
-            rows_html += f"<tr>{row_data}</tr>"
-
-        return f"""
+        yield f"""
         <h2>{html.escape(title)}</h2>
         <table border="1">
             <thead>
                 <tr>{header_html}</tr>
             </thead>
             <tbody>
-                {rows_html}
+                """
+        for record in chain([first], records):
+            row_data = "".join(f"<td>{html.escape(str(record.get(header, '')))}</td>" for header in headers)
+            yield f"<tr>{row_data}</tr>"
+        yield """
             </tbody>
         </table>
         """
 
     @staticmethod
-    def _generate_discrepancies_table(discrepancies: List[Dict[str, Any]]) -> str:
-        """Generates a detailed HTML table for discrepancies."""
-        if not discrepancies:
-            return "<h2>Discrepancies</h2><p>None</p>"
+    def _iter_discrepancies_table(discrepancies: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Yields a detailed HTML table for discrepancies."""
+        discrepancies = iter(discrepancies)
+        first = next(discrepancies, None)
+        if first is None:
+            yield "<h2>Discrepancies</h2><p>None</p>"
+            return
 
         headers = ["Key", "Field", "Source Value", "Target Value"]
         header_html = "".join(f"<th>{header}</th>" for header in headers)
 
-        rows_html = ""
-        for item in discrepancies:
+        yield f"""
+            <h2>Discrepancies</h2>
+            <table border="1">
+                <thead>
+                    <tr>{header_html}</tr>
+                </thead>
+                <tbody>
+                    """
+        for item in chain([first], discrepancies):
             key = ", ".join(map(str, item.get("key", [])))
             for field, values in item.get("differences", {}).items():
                 source_val = values.get("source", "")
                 target_val = values.get("target", "")
-                rows_html += f"""
+                yield f"""
                 <tr>
                     <td>{html.escape(key)}</td>
                     <td>{html.escape(field)}</td>
@@ -56,48 +85,59 @@ class HTMLReportGenerator:
                     <td>{html.escape(str(target_val))}</td>
                 </tr>
                 """
-
-        return f"""
-            <h2>Discrepancies</h2>
-            <table border="1">
-                <thead>
-                    <tr>{header_html}</tr>
-                </thead>
-                <tbody>
-                    {rows_html}
+        yield """
                 </tbody>
             </table>
         """
 
     @classmethod
-    def generate_html(cls, report_data: Dict[str, Any]) -> str:
-        """
-        Generates a full HTML report from the reconciliation data.
-        """
-        style = """
-        <style>
-            body { font-family: sans-serif; margin: 2em; }
-            table { border-collapse: collapse; margin-bottom: 20px; width: 100%; }
-            th, td { border: 1px solid #dddddd; text-align: left; padding: 8px; }
-            th { background-color: #f2f2f2; }
-            h1, h2 { color: #333; }
-        </style>
-        """
-        discrepancies_html = cls._generate_discrepancies_table(report_data.get("discrepancies", []))
-        missing_in_target_html = cls._generate_table_from_records(report_data.get("missing_in_target", []), "Missing in Target (Present in Source)")
-        missing_in_source_html = cls._generate_table_from_records(report_data.get("missing_in_source", []), "Missing in Source (Present in Target)")
-
-        return f"""<!DOCTYPE html />
+    def _iter_html(cls, report_data: Dict[str, Iterable[Dict[str, Any]]]) -> Iterator[str]:
+        yield f"""<!DOCTYPE html />
                     <html>
                         <head>
                             <title>Reconciliation Report</title>
-                            {style}
+                            {STYLE}
                         </head>
                         <body>
                             <h1>Reconciliation Report</h1>
-                                {discrepancies_html}
-                                {missing_in_target_html}
-                                {missing_in_source_html}
+                                """
+        yield from cls._iter_discrepancies_table(report_data.get("discrepancies", []))
+        yield """
+                                """
+        yield from cls._iter_table_from_records(report_data.get("missing_in_target", []), "Missing in Target (Present in Source)")
+        yield """
+                                """
+        yield from cls._iter_table_from_records(report_data.get("missing_in_source", []), "Missing in Source (Present in Target)")
+        yield """
                         </body>
                     </html>
                 """
+
+    @classmethod
+    def iter_html(
+        cls,
+        report_data: Dict[str, Iterable[Dict[str, Any]]],
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE
+    ) -> Iterator[str]:
+        """
+        Yields the full HTML report in chunks of roughly `chunk_size`
+        characters, ready to be passed to a StreamingHttpResponse.
+        """
+        return buffered(cls._iter_html(report_data), chunk_size)
+
+    @classmethod
+    def _generate_table_from_records(cls, records: List[Dict[str, Any]], title: str) -> str:
+        """Generates an HTML table for a list of records (e.g., missing items)."""
+        return "".join(cls._iter_table_from_records(records, title))
+
+    @classmethod
+    def _generate_discrepancies_table(cls, discrepancies: List[Dict[str, Any]]) -> str:
+        """Generates a detailed HTML table for discrepancies."""
+        return "".join(cls._iter_discrepancies_table(discrepancies))
+
+    @classmethod
+    def generate_html(cls, report_data: Dict[str, Any]) -> str:
+        """
+        Generates a full HTML report from the reconciliation data.
+        """
+        return "".join(cls._iter_html(report_data))
@@ -0,0 +1,21 @@
+from typing import Iterable, Iterator
+
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def buffered(pieces: Iterable[str], chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Joins small pieces of text into chunks of roughly `chunk_size`
+    characters, so a streaming response is not written a row at a time.
+    """
+    parts = []
+    size = 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
@@ -123,3 +123,26 @@ class TestCSVReportGenerator:
         assert rows[2] == ["1", "Item, with comma"]
         assert rows[3] == ["2", "Line\nBreak"]
         assert rows[4] == ["3", 'Quoted "text"']
+
+    def test_iter_csv_matches_generate_csv(self):
+        report_data = {
+            "discrepancies": [
+                {"key": [1], "differences": {"amount": {"source": 100, "target": 90}}},
+            ],
+            "missing_in_target": [{"id": i, "value": "X" * 10} for i in range(100)],
+            "missing_in_source": [],
+        }
+        chunks = list(CSVReportGenerator.iter_csv(report_data, chunk_size=256))
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == CSVReportGenerator.generate_csv(report_data)
+
+    def test_iter_csv_accepts_iterators(self):
+        report_data = {
+            "missing_in_target": iter([{"id": 1, "name": "Alice"}]),
+            "missing_in_source": iter([]),
+        }
+        rows = list(csv.reader(io.StringIO("".join(CSVReportGenerator.iter_csv(report_data)))))
+
+        assert rows[3:6] == [["Missing in Target (Present in Source)"], ["id", "name"], ["1", "Alice"]]
+        assert rows[-3:] == [["Missing in Source (Present in Target)"], ["None"], []]
@@ -221,6 +221,23 @@ class TestHTMLReportGenerator(unittest.TestCase):
         # (sanity: the doc must still have our own structural tags)
         self.assertIn("<table", html_doc)
 
+    # ---------- Streaming ----------
+    def test_iter_html_matches_generate_html(self):
+        report = {
+            "discrepancies": [{"key": [1], "differences": {"a": {"source": 1, "target": 2}}}],
+            "missing_in_target": [{"id": i} for i in range(50)],
+            "missing_in_source": [],
+        }
+        chunks = list(HTMLReportGenerator.iter_html(report, chunk_size=512))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), HTMLReportGenerator.generate_html(report))
+
+    def test_iter_html_accepts_iterators(self):
+        report = {"missing_in_target": iter([{"id": 1}]), "missing_in_source": iter([])}
+        html_doc = "".join(HTMLReportGenerator.iter_html(report))
+        self.assertIn("<tr><td>1</td></tr>", html_doc)
+        self.assertIn("<h2>Missing in Source (Present in Target)</h2><p>None</p>", html_doc)
+
 
 if __name__ == "__main__":
     unittest.main()
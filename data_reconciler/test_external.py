@@ -0,0 +1,134 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+import pyarrow as pa
+
+from .external import PIECE_LENGTH, ExternalReconciler
+from .incremental import IncrementalReconciler
+from .processor import DataReconciler
+
+
+def _sorted(records):
+    return sorted(records, key=repr)
+
+
+class TestExternalReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.source_data = [
+            {"id": str(i), "name": f"name-{i}", "amount": str(i * 10)}
+            for i in range(200)
+        ]
+        self.target_data = [dict(row) for row in self.source_data[20:]]
+        self.target_data += [{"id": "500", "name": "new", "amount": "1"}]
+        for row in self.target_data[::15]:
+            row["amount"] = "changed"
+
+    def _chunks(self, rows, size=37):
+        return (pd.DataFrame(rows[i:i + size]) for i in range(0, len(rows), size))
+
+    def test_matches_in_memory_reconciliation(self):
+        result = ExternalReconciler.reconcile(
+            self._chunks(self.source_data),
+            self._chunks(self.target_data),
+            ["id"],
+            partition_count=8
+        )
+        expected = DataReconciler.reconcile(self.source_data, self.target_data, ["id"])
+        for section in ("missing_in_target", "missing_in_source", "discrepancies"):
+            self.assertEqual(_sorted(result[section]), _sorted(expected[section]))
+
+    def test_multi_column_key_and_more_partitions_than_rows(self):
+        source = [{"country": "usa", "year": "2020", "population": "331"},
+                  {"country": "usa", "year": "2021", "population": "333"}]
+        target = [{"country": "usa", "year": "2021", "population": "334"}]
+        result = ExternalReconciler.reconcile(
+            self._chunks(source), self._chunks(target), ["country", "year"], partition_count=16
+        )
+        self.assertEqual(result["missing_in_target"], [{"country": "usa", "year": "2020", "population": "331"}])
+        self.assertEqual(result["missing_in_source"], [])
+        self.assertEqual(len(result["discrepancies"]), 1)
+        self.assertEqual(result["discrepancies"][0]["key"], ("usa", "2021"))
+
+    def test_spill_files_are_removed(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            ExternalReconciler.reconcile(
+                self._chunks(self.source_data), self._chunks(self.target_data), ["id"],
+                partition_count=4, spill_dir=spill_dir
+            )
+            self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_spill_files_round_trip_as_arrow(self):
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = [pd.DataFrame([{"id": "1", "note": None}]), pd.DataFrame([{"id": "2", "note": "x"}])]
+            columns = ExternalReconciler.spill(iter(chunks), ["id"], 1, directory, "source")
+            with open(ExternalReconciler.spill_path(directory, "source", 0), "rb") as spill_file:
+                (size, ) = PIECE_LENGTH.unpack(spill_file.read(PIECE_LENGTH.size))
+                self.assertEqual(pa.ipc.open_stream(spill_file.read(size)).read_all().num_rows, 1)
+                spill_file.seek(0)
+                loaded = ExternalReconciler.load_partition(spill_file, columns)
+        self.assertEqual(loaded.to_dict(orient="records"), [{"id": "1", "note": None}, {"id": "2", "note": "x"}])
+
+    def _baseline(self):
+        report, fingerprints = ExternalReconciler.reconcile_incremental(
+            self._chunks(self.source_data), self._chunks(self.target_data), ["id"], partition_count=8
+        )
+        self.assertIsNone(fingerprints.attrs["changed_keys"])
+        buffer = io.BytesIO()
+        IncrementalReconciler.write_fingerprints(fingerprints, buffer)
+        buffer.seek(0)
+        return IncrementalReconciler.read_fingerprints(buffer), json.loads(json.dumps(report))
+
+    def test_partitions_are_fingerprinted_like_in_memory_runs(self):
+        baseline, baseline_report = self._baseline()
+        _, in_memory = IncrementalReconciler.reconcile(
+            self._chunks(self.source_data), self._chunks(self.target_data), ["id"]
+        )
+        pd.testing.assert_frame_equal(baseline.sort_index(), in_memory.sort_index(), check_index_type=False)
+        expected = json.loads(json.dumps(DataReconciler.reconcile(self.source_data, self.target_data, ["id"])))
+        for section in ("missing_in_target", "missing_in_source", "discrepancies"):
+            self.assertEqual(_sorted(baseline_report[section]), _sorted(expected[section]))
+
+    def test_only_changed_keys_are_diffed_against_a_baseline(self):
+        baseline, baseline_report = self._baseline()
+        source_data = [dict(row) for row in self.source_data if row["id"] != "5"]
+        source_data[30]["name"] = "renamed"
+        source_data.append({"id": "600", "name": "added", "amount": "2"})
+        target_data = [dict(row) for row in self.target_data]
+        target_data[1]["name"] = "other"
+
+        report, fingerprints = ExternalReconciler.reconcile_incremental(
+            self._chunks(source_data), self._chunks(target_data), ["id"], baseline, baseline_report, partition_count=8
+        )
+
+        self.assertEqual(fingerprints.attrs["changed_keys"], 4)
+        expected = json.loads(json.dumps(DataReconciler.reconcile(source_data, target_data, ["id"])))
+        report = json.loads(json.dumps(report))
+        for section in ("missing_in_target", "missing_in_source", "discrepancies"):
+            self.assertEqual(_sorted(report[section]), _sorted(expected[section]))
+
+    def test_partitions_with_duplicate_keys_replace_their_baseline_entries(self):
+        baseline, baseline_report = self._baseline()
+        source_data = self.source_data + [{"id": "0", "name": "twin", "amount": "0"}]
+
+        report, fingerprints = ExternalReconciler.reconcile_incremental(
+            self._chunks(source_data), self._chunks(self.target_data), ["id"], baseline, baseline_report, partition_count=8
+        )
+
+        self.assertIsNone(fingerprints)
+        expected = json.loads(json.dumps(DataReconciler.reconcile(source_data, self.target_data, ["id"])))
+        report = json.loads(json.dumps(report))
+        for section in ("missing_in_target", "missing_in_source", "discrepancies"):
+            self.assertEqual(_sorted(report[section]), _sorted(expected[section]))
+
+    def test_empty_source_raises(self):
+        with self.assertRaises(ValueError):
+            ExternalReconciler.reconcile(iter([]), self._chunks(self.target_data), ["id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
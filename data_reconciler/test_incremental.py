@@ -0,0 +1,105 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from .incremental import IncrementalReconciler
+from .processor import DataReconciler
+
+
+def _sorted(records):
+    return sorted(records, key=repr)
+
+
+class TestIncrementalReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.source_data = [
+            {"id": str(i), "name": f"name-{i}", "amount": str(i * 10)}
+            for i in range(200)
+        ]
+        self.target_data = [dict(row) for row in self.source_data[20:]]
+        self.target_data += [{"id": "500", "name": "new", "amount": "1"}]
+        for row in self.target_data[::15]:
+            row["amount"] = "changed"
+
+    def _chunks(self, rows, size=37):
+        return (pd.DataFrame(rows[i:i + size]) for i in range(0, len(rows), size))
+
+    def _baseline(self):
+        report, fingerprints = IncrementalReconciler.reconcile(
+            self._chunks(self.source_data), self._chunks(self.target_data), ["id"]
+        )
+        self.assertIsNone(fingerprints.attrs["changed_keys"])
+        buffer = io.BytesIO()
+        IncrementalReconciler.write_fingerprints(fingerprints, buffer)
+        buffer.seek(0)
+        # Reports are read back from JSON, as stored on the job.
+        return IncrementalReconciler.read_fingerprints(buffer), json.loads(json.dumps(report))
+
+    def test_only_changed_keys_are_diffed(self):
+        baseline, baseline_report = self._baseline()
+
+        source_data = [dict(row) for row in self.source_data if row["id"] != "5"]
+        source_data[30]["name"] = "renamed"
+        source_data.append({"id": "600", "name": "added", "amount": "2"})
+        target_data = [dict(row) for row in self.target_data]
+        target_data[0]["amount"] = source_data[19]["amount"]  # fixes a discrepancy
+        target_data[1]["name"] = "other"
+
+        with patch.object(
+            DataReconciler, "reconcile_indexed", wraps=DataReconciler.reconcile_indexed
+        ) as reconcile_indexed:
+            report, fingerprints = IncrementalReconciler.reconcile(
+                self._chunks(source_data), self._chunks(target_data), ["id"], baseline, baseline_report
+            )
+
+        self.assertEqual(fingerprints.attrs["changed_keys"], 5)
+        diffed_source = reconcile_indexed.call_args.args[0]
+        self.assertEqual(sorted(diffed_source.index), ["20", "21", "31", "600"])
+        expected = json.loads(json.dumps(DataReconciler.reconcile(source_data, target_data, ["id"])))
+        report = json.loads(json.dumps(report))
+        for section in ("missing_in_target", "missing_in_source", "discrepancies"):
+            self.assertEqual(_sorted(report[section]), _sorted(expected[section]))
+
+    def test_unchanged_run_carries_the_baseline_forward(self):
+        baseline, baseline_report = self._baseline()
+        report, fingerprints = IncrementalReconciler.reconcile(
+            self._chunks(self.source_data), self._chunks(self.target_data), ["id"], baseline, baseline_report
+        )
+        self.assertEqual(fingerprints.attrs["changed_keys"], 0)
+        self.assertEqual(json.loads(json.dumps(report)), baseline_report)
+
+    def test_changed_columns_are_reconciled_in_full(self):
+        baseline, baseline_report = self._baseline()
+        source_data = [{**row, "extra": "x"} for row in self.source_data]
+        target_data = [{**row, "extra": "x"} for row in self.target_data]
+
+        report, fingerprints = IncrementalReconciler.reconcile(
+            self._chunks(source_data), self._chunks(target_data), ["id"], baseline, baseline_report
+        )
+        self.assertIsNone(fingerprints.attrs["changed_keys"])
+        self.assertEqual(report, DataReconciler.reconcile(source_data, target_data, ["id"]))
+
+    def test_duplicate_keys_have_no_fingerprints(self):
+        report, fingerprints = IncrementalReconciler.reconcile(
+            self._chunks(self.source_data + self.source_data[:1]), self._chunks(self.target_data), ["id"]
+        )
+        self.assertIsNone(fingerprints)
+        self.assertEqual(len(report["missing_in_target"]), 21)
+
+    def test_fingerprints_round_trip_with_composite_keys(self):
+        _, fingerprints = IncrementalReconciler.reconcile(
+            self._chunks(self.source_data), self._chunks(self.target_data), ["id", "name"]
+        )
+        buffer = io.BytesIO()
+        IncrementalReconciler.write_fingerprints(fingerprints, buffer)
+        buffer.seek(0)
+        loaded = IncrementalReconciler.read_fingerprints(buffer)
+
+        pd.testing.assert_frame_equal(loaded, fingerprints)
+        self.assertEqual(loaded.attrs["columns"], {"source": ["amount"], "target": ["amount"]})
+        # Keys only present on one side have no fingerprint on the other.
+        self.assertTrue(pd.isna(loaded.loc[("0", "name-0"), "target"]))
@@ -0,0 +1,67 @@
+import unittest
+
+from .merge_join import SortedMergeReconciler, UnsortedInputError
+from .processor import DataReconciler
+
+
+class TestSortedMergeReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.source_data = [
+            {"id": "1", "name": "alice", "age": "25"},
+            {"id": "2", "name": "bob", "age": "30"},
+            {"id": "3", "name": "charlie", "age": "35"},
+            {"id": "10", "name": "judy", "age": None},
+        ]
+        self.target_data = [
+            {"id": "1", "name": "alice", "age": "25"},
+            {"id": "2", "name": "bob", "age": "31"},
+            {"id": "4", "name": "david", "age": "40"},
+            {"id": "10", "name": "judy", "age": None},
+            {"id": "11", "name": "ken", "age": "50"},
+        ]
+
+    def test_matches_data_reconciler(self):
+        result = SortedMergeReconciler.reconcile(iter(self.source_data), iter(self.target_data), ["id"])
+        expected = DataReconciler.reconcile(self.source_data, self.target_data, ["id"])
+        self.assertEqual(result, expected)
+
+    def test_multi_column_key(self):
+        source = [
+            {"country": "canada", "year": "2020", "population": "38"},
+            {"country": "usa", "year": "2021", "population": "333"},
+        ]
+        target = [
+            {"country": "canada", "year": "2021", "population": "39"},
+            {"country": "usa", "year": "2021", "population": "334"},
+        ]
+        result = SortedMergeReconciler.reconcile(iter(source), iter(target), ["country", "year"])
+        expected = DataReconciler.reconcile(source, target, ["country", "year"])
+        self.assertEqual(result, expected)
+
+    def test_lexically_sorted_keys_are_accepted(self):
+        source = [{"id": "a10", "v": "x"}, {"id": "a2", "v": "y"}]
+        target = [{"id": "a10", "v": "x"}, {"id": "a2", "v": "z"}]
+        result = SortedMergeReconciler.reconcile(iter(source), iter(target), ["id"])
+        self.assertEqual(len(result["discrepancies"]), 1)
+        self.assertEqual(result["discrepancies"][0]["key"], ("a2",))
+
+    def test_unsorted_input_raises(self):
+        source = [{"id": "2", "v": "x"}, {"id": "1", "v": "y"}]
+        target = [{"id": "1", "v": "y"}, {"id": "2", "v": "x"}]
+        with self.assertRaises(UnsortedInputError):
+            SortedMergeReconciler.reconcile(iter(source), iter(target), ["id"])
+
+    def test_duplicate_keys_raise(self):
+        source = [{"id": "1", "v": "x"}, {"id": "2", "v": "y"}]
+        target = [{"id": "1", "v": "x"}, {"id": "1", "v": "y"}]
+        with self.assertRaises(UnsortedInputError):
+            SortedMergeReconciler.reconcile(iter(source), iter(target), ["id"])
+
+    def test_empty_source_raises(self):
+        with self.assertRaises(ValueError):
+            SortedMergeReconciler.reconcile(iter([]), iter(self.target_data), ["id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
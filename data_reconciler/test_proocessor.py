@@ -1,4 +1,5 @@
 import unittest
+import pandas as pd
 from .processor import DataReconciler 
 
 
@@ -131,5 +132,102 @@ class TestDataReconciler(unittest.TestCase):
         self.assertEqual(len(result['missing_in_source']), 1)
         self.assertEqual(result['discrepancies'], [])
 
+    def test_discrepancy_report_shape(self):
+        result = DataReconciler.reconcile(
+            self.source_data,
+            self.target_data,
+            unique_fields=['id']
+        )
+        self.assertEqual(result['discrepancies'], [{
+            "key": (2,),
+            "original_records": {
+                "source": {"name": "Bob", "age": 30},
+                "target": {"name": "Bob", "age": 31},
+            },
+            "differences": {"age": {"source": 30, "target": 31}},
+        }])
+
+    def test_null_against_value_is_a_discrepancy(self):
+        source = [{'id': 1, 'a': None, 'b': 'x'}, {'id': 2, 'a': 'y', 'b': None}]
+        target = [{'id': 1, 'a': 'z', 'b': 'x'}, {'id': 2, 'a': 'y', 'b': None}]
+        result = DataReconciler.reconcile(source, target, unique_fields=['id'])
+        self.assertEqual(len(result['discrepancies']), 1)
+        discrepancy = result['discrepancies'][0]
+        self.assertEqual(discrepancy['key'], (1,))
+        self.assertEqual(discrepancy['differences'], {'a': {'source': None, 'target': 'z'}})
+
+    def test_reconcile_chunks_matches_reconcile(self):
+        source_chunks = [pd.DataFrame(self.source_data[:2]), pd.DataFrame(self.source_data[2:])]
+        target_chunks = [pd.DataFrame(self.target_data[:1]), pd.DataFrame(self.target_data[1:])]
+        result = DataReconciler.reconcile_chunks(iter(source_chunks), iter(target_chunks), ['id'])
+        expected = DataReconciler.reconcile(self.source_data, self.target_data, unique_fields=['id'])
+        self.assertEqual(result, expected)
+
+    def test_reconcile_chunks_empty_source_raises(self):
+        with self.assertRaises(ValueError):
+            DataReconciler.reconcile_chunks(iter([]), iter([pd.DataFrame(self.target_data)]), ['id'])
+
+    def test_identical_datasets_in_different_row_order(self):
+        result = DataReconciler.reconcile(
+            self.source_data,
+            list(reversed(self.source_data)),
+            unique_fields=['id']
+        )
+        self.assertEqual(result, {"missing_in_source": [], "missing_in_target": [], "discrepancies": []})
+
+    def test_duplicate_keys_are_paired_in_order(self):
+        source = [{'id': 1, 'v': 'x'}, {'id': 1, 'v': 'y'}, {'id': 2, 'v': 'y'}]
+        for target in (
+            [{'id': 2, 'v': 'y'}, {'id': 1, 'v': 'x'}, {'id': 1, 'v': 'y'}],
+            [{'id': 1, 'v': 'x'}, {'id': 2, 'v': 'y'}, {'id': 1, 'v': 'y'}],
+        ):
+            with self.subTest(target=target):
+                result = DataReconciler.reconcile(source, target, unique_fields=['id'])
+                self.assertEqual(result, {"missing_in_source": [], "missing_in_target": [], "discrepancies": []})
+
+        target = [{'id': 1, 'v': 'x'}, {'id': 2, 'v': 'y'}, {'id': 1, 'v': 'z'}]
+        result = DataReconciler.reconcile(source, target, unique_fields=['id'])
+        self.assertEqual(len(result['discrepancies']), 1)
+        self.assertEqual(result['discrepancies'][0]['differences'], {'v': {'source': 'y', 'target': 'z'}})
+
+    def test_unequal_duplicate_counts(self):
+        source = [{'id': 1, 'v': 'x'}, {'id': 1, 'v': 'y'}, {'id': 1, 'v': 'z'}, {'id': 2, 'v': 'y'}]
+        target = [{'id': 2, 'v': 'y'}, {'id': 1, 'v': 'x'}, {'id': 2, 'v': 'w'}]
+        result = DataReconciler.reconcile(source, target, unique_fields=['id'])
+        # Rows left over once the rows with the same key are paired in order are missing on the other side.
+        self.assertEqual(result['missing_in_target'], [{'id': 1, 'v': 'y'}, {'id': 1, 'v': 'z'}])
+        self.assertEqual(result['missing_in_source'], [{'id': 2, 'v': 'w'}])
+        self.assertEqual(result['discrepancies'], [])
+
+    def test_mixed_type_columns_are_still_compared(self):
+        # 1 and "1" hash alike once stringified, so fingerprints must not be trusted here
+        source = [{'id': 1, 'value': 1}, {'id': 2, 'value': 'a'}]
+        target = [{'id': 1, 'value': '1'}, {'id': 2, 'value': 'a'}]
+        result = DataReconciler.reconcile(source, target, unique_fields=['id'])
+        self.assertEqual(len(result['discrepancies']), 1)
+        self.assertEqual(result['discrepancies'][0]['key'], (1,))
+
+    def test_row_fingerprints(self):
+        frame = pd.DataFrame([{'a': 'x', 'b': None}, {'a': 'x', 'b': float('nan')}, {'a': 'y', 'b': None}])
+        fingerprints = DataReconciler.row_fingerprints(frame)
+        self.assertEqual(fingerprints[0], fingerprints[1])
+        self.assertNotEqual(fingerprints[0], fingerprints[2])
+        swapped = pd.DataFrame([{'a': 'p', 'b': 'q'}, {'a': 'q', 'b': 'p'}])
+        fingerprints = DataReconciler.row_fingerprints(swapped)
+        self.assertNotEqual(fingerprints[0], fingerprints[1])
+
+    def test_summarize(self):
+        source = self.source_data + [{"id": 5, "name": "Eve", "age": 50}]
+        target = self.target_data + [{"id": 5, "name": "Eva", "age": 51}]
+        result = DataReconciler.reconcile(source, target, unique_fields=['id'])
+        summary = DataReconciler.summarize(result)
+        self.assertEqual(summary, {
+            "missing_in_target": 1,
+            "missing_in_source": 1,
+            "discrepancies": 2,
+            "discrepancy_columns": {"age": 2, "name": 1},
+        })
+        self.assertEqual(DataReconciler.summarize({})["discrepancy_columns"], {})
+
 if __name__ == '__main__':
     unittest.main()
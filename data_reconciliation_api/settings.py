@@ -162,6 +162,13 @@ else:
     MEDIA_ROOT = os.path.join(PROJECT_BASE, "media")
     MEDIA_URL = os.path.join(PROJECT_BASE, "media/")
 
+# Uploads are hashed while they stream in, so identical ones can be stored
+# once and their reconciliation reused.
+FILE_UPLOAD_HANDLERS = [
+    "csv_handler.uploads.HashingMemoryFileUploadHandler",
+    "csv_handler.uploads.HashingTemporaryFileUploadHandler",
+]
+
 
 # Celery Config
 CELERY_BROKER_URL = env("RECONCILIATION_CELERY_BROKER_URL", default="redis://localhost:6379/0")
@@ -170,3 +177,61 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+
+
+# Job events
+# Status changes and progress of running jobs are published on Redis pub/sub
+# and pushed to clients as server-sent events. Events are disabled when this
+# is not a redis:// URL; the event stream then polls the database instead.
+RECONCILIATION_EVENTS_URL = env("RECONCILIATION_EVENTS_URL", default=CELERY_BROKER_URL)
+# Seconds between keep-alive comments on an idle event stream.
+RECONCILIATION_EVENTS_HEARTBEAT = env.int("RECONCILIATION_EVENTS_HEARTBEAT", default=15)
+# Seconds after which an event stream is closed; EventSource clients reconnect.
+RECONCILIATION_EVENTS_TIMEOUT = env.int("RECONCILIATION_EVENTS_TIMEOUT", default=300)
+# Minimum number of seconds between two progress updates of a running job.
+RECONCILIATION_PROGRESS_INTERVAL = env.float("RECONCILIATION_PROGRESS_INTERVAL", default=5)
+
+
+# Caches
+# Both caches take any django-environ cache URL, e.g. redis://localhost:6379/1.
+# The default cache holds job statuses written by the Celery workers, so in
+# production it must be shared by the web and worker processes. Rendered CSV
+# and HTML reports are cached under the "reports" alias; give a redis cache a
+# maxmemory limit with the allkeys-lru policy so it evicts by size.
+CACHES = {
+    "default": env.cache_url("RECONCILIATION_CACHE_URL", default="locmemcache://"),
+    "reports": env.cache_url("RECONCILIATION_REPORT_CACHE_URL", default="locmemcache://reports"),
+}
+# Seconds a job status stays in the default cache.
+RECONCILIATION_STATUS_CACHE_TIMEOUT = env.int("RECONCILIATION_STATUS_CACHE_TIMEOUT", default=3600)
+# Renderings longer than this many characters are streamed but never cached.
+RECONCILIATION_REPORT_CACHE_MAX_SIZE = env.int("RECONCILIATION_REPORT_CACHE_MAX_SIZE", default=16 * 1024 * 1024)
+
+
+# Reconciliation engine config
+# Number of CSV rows parsed and cleaned at a time when streaming uploads.
+RECONCILIATION_CSV_CHUNK_SIZE = env.int("RECONCILIATION_CSV_CHUNK_SIZE", default=50000)
+# Jobs whose source and target files add up to at least this many bytes are
+# reconciled out-of-core: both files are hash-partitioned into spill files on
+# local disk and reconciled one partition at a time.
+RECONCILIATION_OUT_OF_CORE_THRESHOLD = env.int("RECONCILIATION_OUT_OF_CORE_THRESHOLD", default=512 * 1024 * 1024)
+RECONCILIATION_PARTITION_COUNT = env.int("RECONCILIATION_PARTITION_COUNT", default=64)
+# Directory for spill files; the system temp directory when empty.
+RECONCILIATION_SPILL_DIR = env("RECONCILIATION_SPILL_DIR", default="") or None
+# Jobs whose source and target files add up to at least this many bytes are
+# split into key-hash partitions that are reconciled by separate Celery tasks,
+# spread across every worker, and merged in a chord callback.
+RECONCILIATION_FAN_OUT_THRESHOLD = env.int("RECONCILIATION_FAN_OUT_THRESHOLD", default=2 * 1024 * 1024 * 1024)
+RECONCILIATION_FAN_OUT_PARTITION_COUNT = env.int("RECONCILIATION_FAN_OUT_PARTITION_COUNT", default=16)
+# Report entries are also stored one per row in ReconciliationRecord, for
+# paginated access; they are bulk inserted this many at a time.
+RECONCILIATION_RECORD_BATCH_SIZE = env.int("RECONCILIATION_RECORD_BATCH_SIZE", default=5000)
+# Keep a cleaned Parquet copy of every upload once it has been parsed, so
+# re-running a job reads it instead of parsing the CSV again.
+RECONCILIATION_COLUMNAR_CACHE = env.bool("RECONCILIATION_COLUMNAR_CACHE", default=True)
+# Codec the JSON report of a job is stored with: 'none', 'gzip' or 'zstd'
+# (which needs the zstandard package).
+RECONCILIATION_REPORT_COMPRESSION = env.str("RECONCILIATION_REPORT_COMPRESSION", default="none")
+# Reports this many bytes long or longer, once encoded, are written to the
+# default storage backend instead of the database.
+RECONCILIATION_REPORT_OFFLOAD_THRESHOLD = env.int("RECONCILIATION_REPORT_OFFLOAD_THRESHOLD", default=1024 * 1024)
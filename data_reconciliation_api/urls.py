@@ -20,6 +20,7 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
     SpectacularRedocView,
 )
+from csv_handler.prometheus_metrics import metrics_view
 
 
 urlpatterns = [
@@ -36,4 +37,6 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc",
     ),
+    # Prometheus metrics
+    path("metrics", metrics_view, name="metrics"),
 ]
\ No newline at end of file